@@ -88,4 +88,10 @@ async def run_migrations_online() -> None:
 if context.is_offline_mode():
     run_migrations_offline()
 else:
-    asyncio.run(run_migrations_online())
+    connection = config.attributes.get("connection", None)
+    if connection is None:
+        asyncio.run(run_migrations_online())
+    else:
+        # Invoked in-process by app.core.bootstrap, which already holds the
+        # migration lock on this connection.
+        do_run_migrations(connection)
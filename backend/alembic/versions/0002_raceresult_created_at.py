@@ -0,0 +1,70 @@
+"""raceresult created_at and indexes, job checkpoints
+
+Existing results get the time of the upgrade as created_at, so incremental jobs
+treat them as already present when their first checkpoint is taken.
+
+Every step is skipped when its table, column or index already exists: databases
+created from the models before revisions shipped are stamped at the baseline and
+brought up from there.
+
+Revision ID: 0002_raceresult_created_at
+Revises: 0001_baseline
+Create Date: 2026-10-19 14:20:03.118207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_raceresult_created_at'
+down_revision: Union[str, Sequence[str], None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _columns(table: str) -> set:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table: str) -> set:
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if 'created_at' not in _columns('raceresult'):
+        # Added nullable, backfilled, then tightened: SQLite cannot add a NOT NULL
+        # column with a non-constant default
+        op.add_column('raceresult', sa.Column('created_at', sa.DateTime(), nullable=True))
+        op.execute(sa.text("UPDATE raceresult SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+        with op.batch_alter_table('raceresult') as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    indexes = _indexes('raceresult')
+    if 'ix_raceresult_created_at' not in indexes:
+        op.create_index(op.f('ix_raceresult_created_at'), 'raceresult', ['created_at'], unique=False)
+    if 'ix_raceresult_player_id' not in indexes:
+        op.create_index(op.f('ix_raceresult_player_id'), 'raceresult', ['player_id'], unique=False)
+    if not _has_table('jobcheckpoint'):
+        op.create_table('jobcheckpoint',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('high_water', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('jobcheckpoint')
+    op.drop_index(op.f('ix_raceresult_player_id'), table_name='raceresult')
+    op.drop_index(op.f('ix_raceresult_created_at'), table_name='raceresult')
+    with op.batch_alter_table('raceresult') as batch_op:
+        batch_op.drop_column('created_at')
@@ -0,0 +1,114 @@
+"""bracket nodes, player ratings, result event log
+
+Tables are skipped when they already exist (see 0002).
+
+Revision ID: 0003_brackets_ratings_events
+Revises: 0002_raceresult_created_at
+Create Date: 2026-10-19 14:24:41.530962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_brackets_ratings_events'
+down_revision: Union[str, Sequence[str], None] = '0002_raceresult_created_at'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table('bracketnode'):
+        op.create_table('bracketnode',
+        sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('stage_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('group_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('match_id', sqlmodel.sql.sqltypes.GUID(), nullable=True),
+        sa.Column('key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('bracket', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('round', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('advance', sa.Integer(), nullable=False),
+        sa.Column('entrants', sa.JSON(), nullable=False),
+        sa.Column('routes', sa.JSON(), nullable=False),
+        sa.Column('feeds_remaining', sa.Integer(), nullable=False),
+        sa.Column('resolved', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['group_id'], ['group.id'], ),
+        sa.ForeignKeyConstraint(['match_id'], ['match.id'], ),
+        sa.ForeignKeyConstraint(['stage_id'], ['stage.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_bracketnode_match_id'), 'bracketnode', ['match_id'], unique=False)
+        op.create_index(op.f('ix_bracketnode_stage_id'), 'bracketnode', ['stage_id'], unique=False)
+    if not _has_table('playerrating'):
+        op.create_table('playerrating',
+        sa.Column('player_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('races', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['player_id'], ['player.id'], ),
+        sa.PrimaryKeyConstraint('player_id')
+        )
+    if not _has_table('ratinghistory'):
+        op.create_table('ratinghistory',
+        sa.Column('race_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('player_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('rating_before', sa.Float(), nullable=False),
+        sa.Column('rating_after', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['player_id'], ['player.id'], ),
+        sa.ForeignKeyConstraint(['race_id'], ['race.id'], ),
+        sa.PrimaryKeyConstraint('race_id', 'player_id')
+        )
+        op.create_index(op.f('ix_ratinghistory_player_id'), 'ratinghistory', ['player_id'], unique=False)
+    if not _has_table('resultevent'):
+        op.create_table('resultevent',
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('stage_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('match_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('race_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('race_number', sa.Integer(), nullable=False),
+        sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('results', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['match_id'], ['match.id'], ),
+        sa.ForeignKeyConstraint(['race_id'], ['race.id'], ),
+        sa.ForeignKeyConstraint(['stage_id'], ['stage.id'], ),
+        sa.PrimaryKeyConstraint('seq')
+        )
+        op.create_index(op.f('ix_resultevent_stage_id'), 'resultevent', ['stage_id'], unique=False)
+    if not _has_table('stagesnapshot'):
+        op.create_table('stagesnapshot',
+        sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('stage_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('races', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['stage_id'], ['stage.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_stagesnapshot_stage_id'), 'stagesnapshot', ['stage_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_stagesnapshot_stage_id'), table_name='stagesnapshot')
+    op.drop_table('stagesnapshot')
+    op.drop_index(op.f('ix_resultevent_stage_id'), table_name='resultevent')
+    op.drop_table('resultevent')
+    op.drop_index(op.f('ix_ratinghistory_player_id'), table_name='ratinghistory')
+    op.drop_table('ratinghistory')
+    op.drop_table('playerrating')
+    op.drop_index(op.f('ix_bracketnode_stage_id'), table_name='bracketnode')
+    op.drop_index(op.f('ix_bracketnode_match_id'), table_name='bracketnode')
+    op.drop_table('bracketnode')
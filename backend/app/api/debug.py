@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.auth import get_current_user
+from app.core.instrumentation import route_summary
+from app.models import User
+
+router = APIRouter()
+
+@router.get("/sql")
+async def sql_summary(current_user: User = Depends(get_current_user)):
+    """
+    Admin only: rolling per-route SQL statement counts and DB time (only mounted when
+    SQL_INSTRUMENTATION=1). Routes with the most statements per request come first.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {"window": route_summary.window, "routes": route_summary.snapshot()}
+
+@router.delete("/sql", status_code=204)
+async def reset_sql_summary(current_user: User = Depends(get_current_user)):
+    """Admin only: clears the rolling summary."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    route_summary.reset()
+    return None
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Response
 from sqlmodel import select, col
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db import get_session
@@ -6,6 +6,7 @@ from app.services.tournament_service import TournamentService
 from app.models.tournament import Match, MatchParticipant, Group, Stage, MatchStatus
 from app.models.user import User
 from app.api.auth import get_current_user
+from app.core.responses import VARY_ACCEPT, MsgPackResponse, wants_msgpack
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
@@ -33,11 +34,14 @@ class MatchResponse(BaseModel):
 
 @router.get("/my", response_model=List[MatchResponse])
 async def get_my_matches(
+    request: Request,
+    http_response: Response,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     """
     Get active matches for the current user.
+    Honors `Accept: application/msgpack`.
     """
     # 1. Find player ID for this user
     # Assuming 1-to-1 mapping for simplicity or taking the first one
@@ -54,8 +58,9 @@ async def get_my_matches(
     stmt_players = select(Player.id).where(Player.user_id == current_user.id)
     player_ids = (await session.exec(stmt_players)).all()
     
+    http_response.headers.update(VARY_ACCEPT)
     if not player_ids:
-        return []
+        return MsgPackResponse([]) if wants_msgpack(request) else []
 
     # 2. Find Matches
     # Join MatchParticipant -> Match -> Group -> Stage
@@ -98,6 +103,8 @@ async def get_my_matches(
             opponent_names=list(opp_names)
         ))
         
+    if wants_msgpack(request):
+        return MsgPackResponse(response)
     return response
 
 @router.patch("/{match_id}/room")
@@ -130,5 +137,8 @@ async def record_result(
 ):
     service = TournamentService(session)
     # Pass the list of PlayerRank objects directly to the service
-    results = await service.record_race_result(match_id, input_data.race_number, input_data.rankings)
+    try:
+        results = await service.record_race_result(match_id, input_data.race_number, input_data.rankings)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"message": "Results recorded", "count": len(results)}
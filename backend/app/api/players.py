@@ -1,10 +1,11 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from sqlmodel import select, or_
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db import get_session
 from app.services.player_service import PlayerService
+from app.services.rating_service import RatingService
 from app.models import User, Player
 from app.models.tournament import TournamentParticipant
 from app.api.auth import get_current_user
@@ -33,6 +34,15 @@ class PlayerResponse(BaseModel):
     checked_in: bool = False
     joined_tournament: bool = False
 
+class PlayerProfile(BaseModel):
+    id: UUID
+    in_game_name: str
+    user_id: Optional[UUID] = None
+    is_npc: bool = False
+    seed_level: int = 0
+    # All-time counters kept by the background stats job (app/services/stats_service.py)
+    stats: Dict[str, Any] = {}
+
 @router.post("/", status_code=201)
 async def create_player(
     req: CreatePlayerRequest,
@@ -161,6 +171,54 @@ async def get_my_player_profile(
         
     return player
 
+@router.get("/ratings")
+async def rating_leaderboard(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_session)
+):
+    """Players by cross-tournament rating (pairwise Elo over every race), best first."""
+    return ORJSONResponse(await RatingService(session).leaderboard(limit, offset))
+
+@router.post("/ratings/recompute")
+async def recompute_ratings(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Admin only: rebuild every rating and its history from all recorded races.
+    Removes the drift left by corrected results.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await RatingService(session).recompute()
+
+@router.get("/{player_id}/rating")
+async def get_player_rating(
+    player_id: UUID,
+    history: int = Query(50, ge=0, le=1000),
+    session: AsyncSession = Depends(get_session)
+):
+    """Current rating and the latest rating changes (one per race), newest first."""
+    rating = await RatingService(session).player_rating(player_id, history)
+    if rating is None:
+        raise HTTPException(status_code=404, detail="Player has no rating yet")
+    return ORJSONResponse(rating)
+
+@router.get("/{player_id}/profile", response_model=PlayerProfile)
+async def get_player_profile(
+    player_id: UUID,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Public profile with the cached all-time stats (first places, races, matches, aces,
+    tournaments). Read from Player.stats, so it lags new results by up to one job cycle.
+    """
+    player = await session.get(Player, player_id)
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return player
+
 @router.get("/", response_model=List[PlayerResponse])
 async def list_players(
     claimed: bool = False,
@@ -198,22 +256,31 @@ async def list_players(
     # Sort by claimed first, then name
     stmt = stmt.order_by(Player.user_id.desc(), Player.in_game_name)
     
+    # Rows are built directly in the PlayerResponse shape and returned through
+    # ORJSONResponse, skipping per-row Player.dict() and response_model re-validation.
+    results = await session.exec(stmt)
+    response = []
     if tournament_id:
-        results = await session.exec(stmt)
-        response = []
         for player, participant in results:
-            p_dict = player.dict()
+            p_dict = _player_row(player)
             if participant:
                 p_dict['joined_tournament'] = True
                 p_dict['checked_in'] = True if participant.checked_in else False
-            else:
-                p_dict['joined_tournament'] = False
-                p_dict['checked_in'] = False
             response.append(p_dict)
-        return response
     else:
-        results = await session.exec(stmt)
-        return [p.dict() for p in results.all()]
+        response = [_player_row(p) for p in results.all()]
+    return ORJSONResponse(response)
+
+def _player_row(player: Player) -> dict:
+    return {
+        "id": player.id,
+        "in_game_name": player.in_game_name,
+        "qq_id": player.qq_id,
+        "user_id": player.user_id,
+        "is_npc": player.is_npc,
+        "checked_in": False,
+        "joined_tournament": False,
+    }
 
 @router.patch("/{player_id}", response_model=Player)
 async def update_player(
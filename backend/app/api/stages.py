@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db import get_session
-from app.models.tournament import Stage, Group, Match, GroupParticipant, Tournament, MatchParticipant, Race, RaceResult
-from app.models.user import Player
+from app.api.auth import get_current_user
+from app.models.tournament import Stage, Group, Match, GroupParticipant, Tournament, MatchParticipant, Race, RaceResult, BracketNode
+from app.models.user import Player, User
 from app.services.logic.draw_engine import DrawEngine
+from app.services.logic.host_assignment import HostAssignmentEngine
+from app.services.logic.bracket import BracketEngine
+from app.services.logic.simulation import QualificationSimulator
+from app.services.logic.clinch import ClinchCalculator
+from app.services.logic.tiebreak import TieBreakEngine
 from app.services.tournament_service import TournamentService
+from app.services.export_service import EXPORT_KINDS, ExportService, stream_export
+from app.services.event_service import ResultLog
+from app.services.rescore_service import RescoreService
 from app.models.view_models import StageStandingsResponse, PlayerStanding
+from app.core.responses import VARY_ACCEPT, MsgPackResponse, negotiated, wants_msgpack
 from uuid import UUID
+from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
 from sqlmodel import select
 from pydantic import BaseModel
@@ -40,28 +52,38 @@ class GroupView(BaseModel):
 
 @router.get("/", response_model=List[Stage])
 async def list_stages(
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     tournament_id: Optional[UUID] = None
 ):
     """
     List all stages, optionally filtered by tournament_id.
     Ordered by sequence_order.
+    Honors `Accept: application/msgpack`.
     """
     if tournament_id:
         stmt = select(Stage).where(Stage.tournament_id == tournament_id).order_by(Stage.sequence_order)
     else:
         stmt = select(Stage).order_by(Stage.sequence_order)
     result = await session.exec(stmt)
-    return result.all()
+    stages = result.all()
+    if wants_msgpack(request):
+        return MsgPackResponse([stage.model_dump() for stage in stages])
+    response.headers.update(VARY_ACCEPT)
+    return stages
 
 
 @router.get("/{stage_id}/standings", response_model=StageStandingsResponse)
 async def get_stage_standings(
     stage_id: UUID,
+    request: Request,
+    http_response: Response,
     session: AsyncSession = Depends(get_session)
 ):
     """
     Returns the calculated standings (leaderboard) for the stage.
+    Honors `Accept: application/msgpack`.
     """
     service = TournamentService(session)
     try:
@@ -82,20 +104,29 @@ async def get_stage_standings(
         for s in standings_data
     ]
 
-    return StageStandingsResponse(
+    response = StageStandingsResponse(
         stage_id=stage_id,
         standings=player_standings
     )
+    if wants_msgpack(request):
+        return MsgPackResponse(response)
+    http_response.headers.update(VARY_ACCEPT)
+    return response
 
 @router.get("/{stage_id}/matches_view", response_model=List[GroupView])
 async def get_stage_matches_view(
     stage_id: UUID,
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     """
     Returns a hierarchical view of groups -> matches -> participants for the Referee Dashboard.
+    Honors `Accept: application/msgpack`.
     """
     service = TournamentService(session)
+    stage = await session.get(Stage, stage_id)
+    if not stage:
+        raise HTTPException(status_code=404, detail="Stage not found")
     
     # 1. Get Groups
     stmt = select(Group).where(Group.stage_id == stage_id).order_by(Group.name)
@@ -112,6 +143,9 @@ async def get_stage_matches_view(
     # But `get_stage_standings` returns a flat list. 
     # Let's filter it by group participants.
 
+    # Built as plain dicts and returned through negotiated(): this skips the
+    # response_model re-validation + jsonable_encoder pass, which dominated CPU on big stages.
+    # The shape matches List[GroupView].
     view_data = []
 
     for group in groups:
@@ -121,6 +155,7 @@ async def get_stage_matches_view(
 
         matches_view = []
         group_player_ids = set()
+        group_results = []
 
         for match in matches:
             # Get Participants
@@ -130,13 +165,12 @@ async def get_stage_matches_view(
             participants_view = []
             for mp, player in mp_results:
                 group_player_ids.add(str(player.id))
-                participants_view.append(ParticipantView(
-                    player=PlayerView(id=player.id, name=player.in_game_name)
-                ))
+                participants_view.append({"player": {"id": player.id, "name": player.in_game_name}})
 
             # Get Results
             r_stmt = select(RaceResult).join(Race).where(Race.match_id == match.id)
             race_results = (await session.exec(r_stmt)).all()
+            group_results.extend(race_results)
 
             results_list = []
             for rr in race_results:
@@ -146,39 +180,41 @@ async def get_stage_matches_view(
                     "points": rr.points_awarded
                 })
 
-            matches_view.append(MatchView(
-                id=match.id,
-                name=match.name,
-                status=match.status,
-                host_player_id=match.host_player_id,
-                participants=participants_view,
-                results=results_list
-            ))
+            matches_view.append({
+                "id": match.id,
+                "name": match.name,
+                "status": match.status,
+                "host_player_id": match.host_player_id,
+                "participants": participants_view,
+                "results": results_list
+            })
             
-        # Filter standings for this group
+        # Filter standings for this group and rank within it with the stage's
+        # tie-breakers, as qualification does (head-to-head from this group's races)
         group_standings = [s for s in full_standings if str(s['player_id']) in group_player_ids]
-        # Re-rank within group
-        group_standings.sort(key=lambda x: (x["total_points"], x["wins"]), reverse=True)
-        for i, s in enumerate(group_standings):
-            s['rank'] = i + 1
+        group_standings = TieBreakEngine.sort_standings(
+            group_standings, group_results, stage.rules_config, points_key="total_points"
+        )
 
-        view_data.append(GroupView(
-            id=group.id,
-            name=group.name,
-            matches=matches_view,
-            standings=group_standings
-        ))
+        view_data.append({
+            "id": group.id,
+            "name": group.name,
+            "matches": matches_view,
+            "standings": group_standings
+        })
 
-    return view_data
+    return negotiated(request, view_data)
 
 @router.post("/{stage_id}/draw_preview")
 async def draw_preview(
     stage_id: UUID,
+    seed: Optional[int] = None,
     session: AsyncSession = Depends(get_session)
 ):
     """
     Generates a preview of the group draw for the given stage.
     Does NOT save to DB.
+    Pass `seed` to get a reproducible draw; group-mates from the previous stage are kept apart.
     """
     engine = DrawEngine(session)
     try:
@@ -196,7 +232,10 @@ async def draw_preview(
     num_groups = rules.get("group_count", 14)
 
     # Perform Draw
-    groups_preview = engine.perform_draw(players, num_groups=num_groups)
+    previous_groups = await engine.get_previous_group_map(stage_id)
+    groups_preview = engine.perform_draw(
+        players, num_groups=num_groups, seed=seed, previous_groups=previous_groups
+    )
 
     return groups_preview
 
@@ -244,9 +283,278 @@ async def save_groups(
     # For streamlined flow: YES.
     # Generate Matches
     service = TournamentService(session)
-    await service.generate_matches_for_stage(str(stage_id))
+    matches = await service.generate_matches_for_stage(str(stage_id))
+
+    # Everyone seated counts, so players who host nothing show up in the report
+    seated = (await session.exec(
+        select(MatchParticipant.player_id).where(MatchParticipant.match_id.in_([m.id for m in matches])).distinct()
+    )).all() if matches else []
 
-    return {"message": "Groups saved and matches generated", "count": len(saved_groups)}
+    return {
+        "message": "Groups saved and matches generated",
+        "count": len(saved_groups),
+        "hosts": HostAssignmentEngine.summarize([m.host_player_id for m in matches], seated)
+    }
+
+@router.get("/{stage_id}/qualification_odds")
+async def get_qualification_odds(
+    stage_id: UUID,
+    request: Request,
+    iterations: int = 10000,
+    seed: Optional[int] = None,
+    model: str = "form",
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Monte Carlo qualification probabilities: the stage's pending matches are played
+    `iterations` times. Cached until the next result comes in.
+    Honors `Accept: application/msgpack`.
+    """
+    try:
+        return negotiated(request, await QualificationSimulator(session).qualification_odds(stage_id, iterations, seed, model))
+    except ValueError as e:
+        status_code = 404 if str(e) == "Stage not found" else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+
+@router.get("/{stage_id}/clinch")
+async def get_clinch_status(
+    stage_id: UUID,
+    request: Request,
+    group_id: Optional[UUID] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Exact status per player from the pending matches: clinched / eliminated / alive,
+    best and worst possible rank, and the points that guarantee a spot.
+    Pass group_id to compute a single (large) group.
+    Honors `Accept: application/msgpack`.
+    """
+    try:
+        return negotiated(request, await ClinchCalculator(session).stage_status(stage_id, group_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/{stage_id}/export/{kind}")
+async def export_stage(
+    stage_id: UUID,
+    kind: str,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    CSV download of the stage's race_results, match_scores or standings, streamed
+    row by row.
+    """
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+    try:
+        scope = await ExportService(session).stages_in_scope(stage_id=stage_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return StreamingResponse(
+        stream_export(session.bind, kind, scope),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="stage_{stage_id}_{kind}.csv"'},
+    )
+
+@router.get("/{stage_id}/events")
+async def get_result_events(
+    stage_id: UUID,
+    request: Request,
+    after: int = 0,
+    limit: int = 100,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    The stage's result log in order: one event per submission or correction of a
+    race. Page with `after` = the last seq seen.
+    Honors `Accept: application/msgpack`.
+    """
+    try:
+        return negotiated(request, await ResultLog(session).events(stage_id, after, min(limit, 1000)))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/{stage_id}/replay")
+async def replay_stage(
+    stage_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Standings and match scores rebuilt from the result log (from its latest snapshot).
+    Honors `Accept: application/msgpack`.
+    """
+    try:
+        return negotiated(request, await ResultLog(session).rebuild_view(stage_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/{stage_id}/replay/rebuild")
+async def rebuild_stage_results(
+    stage_id: UUID,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Admin only: rewrites the stage's race results from the result log and drops derived caches."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        return await ResultLog(session).rebuild_results(stage_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/{stage_id}/snapshot")
+async def snapshot_stage(
+    stage_id: UUID,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Admin only: snapshots the replayed state at the end of the log, so later replays start there."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        return await ResultLog(session).snapshot(stage_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+class RescoreRequest(BaseModel):
+    # Keys to change in Stage.rules_config (points_map, ace_bonus_points, npc_scoring, ...)
+    rules_config: Optional[Dict[str, Any]] = None
+    dry_run: bool = False
+
+@router.post("/{stage_id}/rescore")
+async def rescore_stage(
+    stage_id: UUID,
+    body: Optional[RescoreRequest] = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Admin only: recomputes the points of every race in the stage under its (updated)
+    rules in one transaction. Returns the players whose rank or points change; with
+    dry_run nothing is saved. Invalid rules or tie-breakers are a 400.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if not await session.get(Stage, stage_id):
+        raise HTTPException(status_code=404, detail="Stage not found")
+    body = body or RescoreRequest()
+    try:
+        return await RescoreService(session).rescore(stage_id, body.rules_config, body.dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class ScheduleRequest(BaseModel):
+    # Defaults: Stage.rules_config, then one slot after the previous stage / the tournament start
+    start_time: Optional[datetime] = None
+    slot_minutes: Optional[int] = None
+    host_rest_slots: Optional[int] = None
+    max_parallel_matches: Optional[int] = None
+
+@router.post("/{stage_id}/schedule")
+async def schedule_stage(
+    stage_id: UUID,
+    body: Optional[ScheduleRequest] = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Admin only: assigns start times to the stage's unfinished matches: no player
+    double-booked, hosts get rest slots around the matches they host, shortest total duration.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    body = body or ScheduleRequest()
+    start_time = body.start_time
+    if start_time and start_time.tzinfo:
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+    try:
+        return await TournamentService(session).schedule_stage(
+            str(stage_id), start_time, body.slot_minutes, body.host_rest_slots, body.max_parallel_matches
+        )
+    except ValueError as e:
+        status_code = 404 if str(e) == "Stage not found" else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+
+class BracketRequest(BaseModel):
+    # Qualifiers in seed order (best first). Omit to seed the eligible players
+    # by their standings in the previous stage.
+    player_ids: Optional[List[UUID]] = None
+
+@router.post("/{stage_id}/bracket")
+async def generate_bracket(
+    stage_id: UUID,
+    body: Optional[BracketRequest] = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Admin only: builds the knockout bracket for an elimination stage and creates its
+    first matches. Later matches are created automatically as results come in.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    stage = await session.get(Stage, stage_id)
+    if not stage:
+        raise HTTPException(status_code=404, detail="Stage not found")
+
+    player_ids = body.player_ids if body else None
+    if player_ids is None:
+        players = await DrawEngine(session).get_eligible_players_for_stage(stage_id)
+        stmt = select(Stage).where(
+            Stage.tournament_id == stage.tournament_id,
+            Stage.sequence_order == stage.sequence_order - 1
+        )
+        prev_stage = (await session.exec(stmt)).first()
+        ranks = {}
+        if prev_stage:
+            standings = await TournamentService(session).get_stage_standings(str(prev_stage.id))
+            ranks = {str(s["player_id"]): s["rank"] for s in standings}
+        players.sort(key=lambda p: (ranks.get(str(p.id), len(ranks) + 1), p.in_game_name))
+        player_ids = [p.id for p in players]
+
+    try:
+        nodes = await BracketEngine(session).generate(stage_id, player_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "message": "Bracket generated",
+        "nodes": len(nodes),
+        "matches": sum(1 for n in nodes if n.match_id is not None),
+    }
+
+@router.get("/{stage_id}/bracket")
+async def get_bracket(
+    stage_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    The bracket graph: every node with its seats, routes and match (once created).
+    Honors `Accept: application/msgpack`.
+    """
+    stmt = select(BracketNode).where(BracketNode.stage_id == stage_id)
+    nodes = list((await session.exec(stmt)).all())
+    bracket_order = {"upper": 0, "lower": 1, "final": 2}
+    nodes.sort(key=lambda n: (bracket_order.get(n.bracket, 3), n.round, n.position))
+    return negotiated(request, [
+        {
+            "id": str(n.id),
+            "key": n.key,
+            "name": n.name,
+            "bracket": n.bracket,
+            "round": n.round,
+            "position": n.position,
+            "match_id": str(n.match_id) if n.match_id else None,
+            "entrants": n.entrants,
+            "routes": n.routes,
+            "resolved": n.resolved,
+        }
+        for n in nodes
+    ])
 
 @router.post("/{stage_id}/settle")
 async def settle_stage(
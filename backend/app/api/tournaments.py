@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db import get_session
 from app.models.tournament import Tournament, TournamentStatus, Stage, StageType, TournamentParticipant
 from app.models.user import Player, User
 from app.api.auth import get_current_user
+from app.services.logic.rules import ScoringRules
+from app.services.export_service import EXPORT_KINDS, ExportService, stream_export
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel
 from datetime import datetime, timezone
@@ -33,6 +36,14 @@ async def create_tournament(
     t_data: TournamentCreate,
     session: AsyncSession = Depends(get_session)
 ):
+    # Reject malformed scoring rules before anything is saved
+    try:
+        ScoringRules.compile(None, t_data.rules_config)
+        for s_cfg in t_data.stages_config or []:
+            ScoringRules.compile(s_cfg.get("rules_config", {}), t_data.rules_config)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Handle timezone for start_time
     start_time = t_data.start_time
     if start_time and start_time.tzinfo:
@@ -97,6 +108,10 @@ async def update_tournament(
     if update_data.status is not None:
         tourney.status = update_data.status
     if update_data.rules_config is not None:
+        try:
+            ScoringRules.compile(None, update_data.rules_config)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         tourney.rules_config = update_data.rules_config
     if update_data.prize_pool_config is not None:
         tourney.prize_pool_config = update_data.prize_pool_config
@@ -181,6 +196,29 @@ async def get_participants(
         })
     return data
 
+@router.get("/{tournament_id}/export/{kind}")
+async def export_tournament(
+    tournament_id: UUID,
+    kind: str,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    CSV download of race_results, match_scores or standings for every stage of the
+    tournament, streamed row by row.
+    """
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+    try:
+        scope = await ExportService(session).stages_in_scope(tournament_id=tournament_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return StreamingResponse(
+        stream_export(session.bind, kind, scope),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="tournament_{tournament_id}_{kind}.csv"'},
+    )
+
 @router.delete("/{tournament_id}/participants/{player_id}", status_code=204)
 async def remove_participant(
     tournament_id: UUID,
@@ -216,8 +254,9 @@ def generate_rules_template(tourney: Tournament) -> str:
     prizes = tourney.prize_pool_config or {}
     total = prizes.get("total", "1100 RMB")
     
-    points_map = tourney.rules_config.get("points_map", {1:9, 2:5, 3:3, 4:2, 5:1})
-    points_text = ", ".join([f"{k}名得{v}分" for k, v in sorted(points_map.items())])
+    # Same compiled table the scoring uses (string keys from JSON sort correctly too)
+    points = ScoringRules.compile(None, tourney.rules_config).points
+    points_text = ", ".join([f"{rank}名得{v}分" for rank, v in enumerate(points, start=1)])
 
     lines = [
         f"# {tourney.name} 赛事规则与赛程",
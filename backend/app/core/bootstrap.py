@@ -0,0 +1,172 @@
+"""
+In-process startup tasks, run once per container before the web workers start.
+
+Replaces shelling out to `python -m alembic` at boot:
+    1. Acquire a Postgres advisory lock so concurrently starting replicas
+       migrate one at a time (the others wait, then see an up-to-date schema).
+    2. Compare the database revision with the script head and only run
+       `upgrade head` when they differ. Databases from before the revisions
+       shipped (no alembic_version, or an id autogenerated at boot) are stamped
+       at the baseline revision first.
+    3. Check the live schema against the models and refuse to start when tables,
+       columns or indexes are missing (a model change shipped without a
+       revision would otherwise go unnoticed).
+    4. Create the default admin once, instead of on every worker's startup.
+
+Each phase is timed and reported.
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import pool, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = BACKEND_DIR / "alembic.ini"
+
+# Arbitrary but stable key shared by all replicas ("meow" in ASCII)
+MIGRATION_LOCK_ID = 0x6D656F77
+
+# Set for the web workers once bootstrap has run, so they skip duplicate work
+BOOTSTRAPPED_ENV = "MEOW_BOOTSTRAPPED"
+
+# Revision matching the schema of the first release
+BASELINE_REVISION = "0001_baseline"
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases: List[Tuple[str, float, str]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, str]]:
+        info = {"detail": ""}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.phases.append((name, elapsed, info["detail"]))
+            suffix = f" ({info['detail']})" if info["detail"] else ""
+            print(f"[startup] {name}: {elapsed:.1f} ms{suffix}")
+
+    def report(self):
+        total = sum(p[1] for p in self.phases)
+        print(f"[startup] total: {total:.1f} ms")
+
+
+def _alembic_config(connection=None):
+    from alembic.config import Config
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    if connection is not None:
+        cfg.attributes["connection"] = connection
+    return cfg
+
+
+class SchemaMismatchError(RuntimeError):
+    """The database schema is behind the models after migrating."""
+
+
+def schema_drift(connection) -> List[str]:
+    """Tables, columns and named indexes the models declare but the database lacks."""
+    from sqlalchemy import inspect
+    from sqlmodel import SQLModel
+    import app.models  # noqa: F401  (register tables)
+
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    missing: List[str] = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing:
+            missing.append(f"table {table.name}")
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        missing.extend(f"column {table.name}.{c.name}" for c in table.columns if c.name not in columns)
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        missing.extend(f"index {i.name}" for i in table.indexes if i.name and i.name not in indexes)
+    return missing
+
+
+def _upgrade_if_needed(connection) -> str:
+    """Runs on the sync side of the async connection. Returns what was done."""
+    from alembic import command
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from sqlalchemy import inspect
+
+    script = ScriptDirectory.from_config(_alembic_config())
+    heads = set(script.get_heads())
+    known = {rev.revision for rev in script.walk_revisions()}
+
+    current = set(MigrationContext.configure(connection).get_current_heads())
+    if current == heads:
+        return f"up-to-date at {', '.join(sorted(heads))}"
+
+    adopted = ""
+    tables = set(inspect(connection).get_table_names()) - {"alembic_version"}
+    if tables and (not current or not current <= known):
+        # Built before revisions shipped: by create_all (no version) or by a revision
+        # autogenerated at boot (unknown id). Both hold at least the baseline tables;
+        # the later revisions skip whatever already exists.
+        command.stamp(_alembic_config(connection), BASELINE_REVISION, purge=True)
+        adopted = f" (adopted {', '.join(sorted(current)) or 'unversioned schema'} as {BASELINE_REVISION})"
+        current = {BASELINE_REVISION}
+
+    command.upgrade(_alembic_config(connection), "head")
+    before = ", ".join(sorted(current)) or "base"
+    return f"upgraded {before} -> {', '.join(sorted(heads))}{adopted}"
+
+
+async def run_migrations(database_url: str, timer: PhaseTimer) -> str:
+    engine = create_async_engine(database_url, poolclass=pool.NullPool)
+    is_postgres = engine.dialect.name == "postgresql"
+    missing: List[str] = []
+    try:
+        async with engine.connect() as conn:
+            if is_postgres:
+                with timer.phase("migration lock"):
+                    await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_ID})
+                    await conn.commit()
+            try:
+                with timer.phase("migrations") as info:
+                    outcome = await conn.run_sync(_upgrade_if_needed)
+                    await conn.commit()
+                    info["detail"] = outcome
+                with timer.phase("schema check") as info:
+                    missing = await conn.run_sync(schema_drift)
+                    info["detail"] = f"{len(missing)} missing" if missing else "matches models"
+            finally:
+                if is_postgres:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_ID})
+                    await conn.commit()
+    finally:
+        await engine.dispose()
+    if missing:
+        print(f"[startup] ERROR: database schema does not match the models: {', '.join(missing)}")
+        raise SchemaMismatchError(
+            "database schema is missing " + ", ".join(missing) + "; add an alembic revision for it"
+        )
+    return outcome
+
+
+async def bootstrap(database_url: Optional[str] = None) -> PhaseTimer:
+    from app.db import DATABASE_URL
+
+    timer = PhaseTimer()
+    await run_migrations(database_url or DATABASE_URL, timer)
+
+    with timer.phase("default admin"):
+        from app.core.create_admin import create_default_admin
+        await create_default_admin()
+
+    timer.report()
+    return timer
+
+
+def run():
+    asyncio.run(bootstrap())
+    os.environ[BOOTSTRAPPED_ENV] = "1"
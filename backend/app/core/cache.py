@@ -0,0 +1,175 @@
+"""
+In-process caches that stay coherent across worker processes.
+
+Every worker keeps its own `LocalCache` instances (no network hop on reads).
+Keys are strings so they survive the trip over the channel unchanged.
+Writes call `await invalidate(namespace, key)`, which clears the local entry
+and publishes the invalidation on a shared channel; the other workers drop
+their copy when the message arrives.
+
+The channel is Redis pub/sub when REDIS_URL is set. Without it (single
+process, tests) invalidation is local only.
+
+Other in-process subscribers (e.g. live-update brokers) can hook into the
+same channel through `bus.add_listener`.
+"""
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from uuid import uuid4
+from app.core import metrics
+
+REDIS_URL = os.getenv("REDIS_URL")
+INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "meow:cache-invalidation")
+
+# Identifies this process so it can ignore its own broadcasts
+WORKER_ID = uuid4().hex
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Bounded LRU map with hit/miss accounting (exported via /metrics)."""
+
+    def __init__(self, namespace: str, max_entries: int = 1024):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate_local(self, key: Optional[Hashable] = None):
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+
+_caches: Dict[str, LocalCache] = {}
+
+
+def get_cache(namespace: str, max_entries: int = 1024) -> LocalCache:
+    """Returns the process-wide cache for `namespace`, creating (and registering) it on first use."""
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches[namespace] = LocalCache(namespace, max_entries)
+        metrics.register_cache(namespace, lambda c=cache: (c.hits, c.misses))
+    return cache
+
+
+def _apply(namespace: str, key: Optional[str]):
+    cache = _caches.get(namespace)
+    if cache is not None:
+        cache.invalidate_local(key)
+
+
+Listener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class InvalidationBus:
+    """Fan-out of invalidation messages between workers over Redis pub/sub."""
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL, channel: str = INVALIDATION_CHANNEL):
+        self.redis_url = redis_url
+        self.channel = channel
+        self._redis = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Listener] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.redis_url)
+
+    def add_listener(self, listener: Listener):
+        """Extra subscribers receive every message (including non-cache kinds)."""
+        self._listeners.append(listener)
+
+    async def start(self):
+        if not self.enabled or self._task:
+            return
+        import redis.asyncio as aioredis
+        self._redis = aioredis.from_url(self.redis_url)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def publish(self, message: Dict[str, Any]):
+        if self._redis is None:
+            return
+        payload = json.dumps({**message, "origin": WORKER_ID})
+        try:
+            await self._redis.publish(self.channel, payload)
+        except Exception as e:
+            # Other workers keep a stale copy until their own write; never fail the request for it
+            print(f"Warning: could not publish cache invalidation: {e}")
+
+    async def _dispatch(self, message: Dict[str, Any]):
+        if message.get("origin") == WORKER_ID:
+            return
+        if message.get("kind") == "invalidate":
+            _apply(message["namespace"], message.get("key"))
+        for listener in self._listeners:
+            await listener(message)
+
+    async def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                backoff = 1
+                async for raw in pubsub.listen():
+                    if raw.get("type") != "message":
+                        continue
+                    await self._dispatch(json.loads(raw["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Messages published while disconnected are lost, so start from a clean slate
+                print(f"Warning: cache invalidation channel error: {e}; retrying in {backoff}s")
+                for cache in _caches.values():
+                    cache.invalidate_local()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+
+bus = InvalidationBus()
+
+
+async def invalidate(namespace: str, key: Optional[str] = None):
+    """Drops `key` (or the whole namespace) in this worker and broadcasts it to the others."""
+    _apply(namespace, key)
+    await bus.publish({"kind": "invalidate", "namespace": namespace, "key": key})
@@ -0,0 +1,183 @@
+"""
+Opt-in SQL instrumentation.
+
+Hooks SQLAlchemy engine events to count statements and DB time per request.
+Enable with SQL_INSTRUMENTATION=1; every response then carries a
+`Server-Timing` header (db / app durations) and a rolling per-route summary is
+available at GET /api/v1/debug/sql.
+
+Tests can use `capture_statements` / `assert_max_statements` directly to catch
+N+1 regressions without enabling the middleware.
+"""
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "false").lower() in ("1", "true", "yes")
+
+# Number of recent requests kept per route for the rolling summary
+ROUTE_WINDOW = int(os.getenv("SQL_INSTRUMENTATION_WINDOW", "200"))
+
+
+class QueryStats:
+    """Mutable counter shared between the request task and SQLAlchemy's greenlets."""
+
+    __slots__ = ("count", "duration", "statements", "keep_statements")
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.keep_statements = keep_statements
+        self.statements: List[str] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+# All collectors active in the current context (request middleware + test captures can nest)
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar("sql_instrumentation_active", default=())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_instrumentation_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_instrumentation_start")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    for stats in _active.get():
+        stats.count += 1
+        stats.duration += elapsed
+        if stats.keep_statements:
+            stats.statements.append(statement)
+
+
+def install(engine: Any) -> None:
+    """Attaches the cursor listeners to an (async) engine. Safe to call more than once."""
+    sync_engine: Engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def capture_statements(engine: Any = None, keep_statements: bool = True) -> Iterator[QueryStats]:
+    """
+    Counts statements executed in the current context.
+    If `engine` is given its listeners are installed first.
+    """
+    if engine is not None:
+        install(engine)
+    stats = QueryStats(keep_statements=keep_statements)
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_max_statements(limit: int, engine: Any = None) -> Iterator[QueryStats]:
+    """
+    Pytest helper: fails if the wrapped block runs more than `limit` statements.
+
+        with assert_max_statements(3, engine):
+            await service.get_stage_standings(stage_id)
+    """
+    with capture_statements(engine) as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i + 1}. {s.splitlines()[0]}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"Expected at most {limit} SQL statements, got {stats.count}:\n{listing}")
+
+
+class RouteSummary:
+    """Rolling window of (statement count, db ms, total ms) per route."""
+
+    def __init__(self, window: int = ROUTE_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[Tuple[int, float, float]]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, count: int, db_ms: float, total_ms: float):
+        self._samples[route].append((count, db_ms, total_ms))
+        self._totals[route] += 1
+
+    def reset(self):
+        self._samples.clear()
+        self._totals.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        summary = []
+        for route, samples in self._samples.items():
+            n = len(samples)
+            counts = [s[0] for s in samples]
+            summary.append({
+                "route": route,
+                "requests": self._totals[route],
+                "window": n,
+                "avg_statements": round(sum(counts) / n, 2),
+                "max_statements": max(counts),
+                "avg_db_ms": round(sum(s[1] for s in samples) / n, 3),
+                "avg_total_ms": round(sum(s[2] for s in samples) / n, 3),
+            })
+        # Worst offenders first
+        summary.sort(key=lambda r: r["avg_statements"], reverse=True)
+        return summary
+
+
+route_summary = RouteSummary()
+
+
+def route_key(scope: Dict[str, Any]) -> str:
+    """`METHOD /path/{template}` for matched routes, falling back to the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Pure ASGI middleware (no extra task per request) that attaches a QueryStats
+    collector to each HTTP request and reports it as a Server-Timing header.
+    """
+
+    def __init__(self, app, summary: RouteSummary = route_summary):
+        self.app = app
+        self.summary = summary
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _active.set(_active.get() + (stats,))
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                timing = (
+                    f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries", '
+                    f"app;dur={total_ms:.2f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active.reset(token)
+            self.summary.record(
+                route_key(scope), stats.count, stats.duration_ms, (time.perf_counter() - start) * 1000
+            )
@@ -0,0 +1,252 @@
+"""
+Minimal Prometheus metrics (text exposition format 0.0.4).
+
+Collected by `MetricsMiddleware` for every router and rendered at GET /metrics:
+    - http_requests_total{method, route, status}
+    - http_request_duration_seconds{method, route} (histogram)
+    - db_pool_* gauges for the shared engine
+    - cache_hits_total / cache_misses_total / cache_hit_ratio per registered cache
+    - background_queue_depth per registered background queue
+
+Caches and background workers register callbacks with `register_cache` /
+`register_queue` so they are sampled at scrape time instead of on every hit.
+
+Off unless METRICS_ENABLED is set; with METRICS_TOKEN set, scrapes must send
+`Authorization: Bearer <token>`.
+"""
+import bisect
+import hmac
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Seconds; tuned for API calls between ~5 ms and a few seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (non-cumulative) + overflow, sum, count]
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, n) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {n}")
+        return lines
+
+
+def scrape_allowed(authorization: Optional[str], token: Optional[str] = None) -> bool:
+    """Checks an Authorization header against METRICS_TOKEN (no token configured: open)."""
+    token = token if token is not None else METRICS_TOKEN
+    if not token:
+        return True
+    return hmac.compare_digest((authorization or "").encode(), f"Bearer {token}".encode())
+
+
+class CallbackGauge:
+    """Gauge sampled at scrape time. `callback` returns {label values tuple: value}."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 callback: Callable[[], Dict[LabelValues, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            samples = self.callback()
+        except Exception as e:
+            # A broken collector must never take the whole scrape down
+            print(f"Warning: metrics collector {self.name} failed: {e}")
+            samples = {}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter kept elsewhere (e.g. a cache's hit count) and sampled at scrape time."""
+
+    metric_type = "counter"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._queues: Dict[str, Callable[[], int]] = {}
+        self._pools: Dict[str, Any] = {}
+
+        self.requests_total = self.add(Counter(
+            "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+        ))
+        self.request_duration = self.add(Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+        ))
+        self.add(CallbackGauge("db_pool_size", "Configured connection pool size.", ("engine",),
+                               lambda: self._pool_stat("size")))
+        self.add(CallbackGauge("db_pool_checked_out", "Connections currently checked out.", ("engine",),
+                               lambda: self._pool_stat("checkedout")))
+        self.add(CallbackGauge("db_pool_checked_in", "Idle connections in the pool.", ("engine",),
+                               lambda: self._pool_stat("checkedin")))
+        self.add(CallbackGauge("db_pool_overflow", "Connections opened beyond pool_size.", ("engine",),
+                               lambda: self._pool_stat("overflow")))
+        self.add(CallbackCounter("cache_hits_total", "Cache hits per cache.", ("cache",),
+                               lambda: self._cache_stat(0)))
+        self.add(CallbackCounter("cache_misses_total", "Cache misses per cache.", ("cache",),
+                               lambda: self._cache_stat(1)))
+        self.add(CallbackGauge("cache_hit_ratio", "Cache hit ratio (hits / lookups) per cache.", ("cache",),
+                               self._cache_ratio))
+        self.add(CallbackGauge("background_queue_depth", "Pending items per background queue.", ("queue",),
+                               lambda: {(name, ): fn() for name, fn in self._queues.items()}))
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_engine(self, name: str, engine: Any):
+        """Exports pool gauges for an (async) engine. Pools without size accounting are skipped."""
+        self._pools[name] = getattr(engine, "sync_engine", engine).pool
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]):
+        """`stats` returns (hits, misses) since process start."""
+        self._caches[name] = stats
+
+    def register_queue(self, name: str, depth: Callable[[], int]):
+        self._queues[name] = depth
+
+    def _pool_stat(self, attr: str) -> Dict[LabelValues, float]:
+        samples = {}
+        for name, pool in self._pools.items():
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                samples[(name, )] = fn()
+        return samples
+
+    def _cache_stat(self, idx: int) -> Dict[LabelValues, float]:
+        return {(name, ): fn()[idx] for name, fn in self._caches.items()}
+
+    def _cache_ratio(self) -> Dict[LabelValues, float]:
+        samples = {}
+        for name, fn in self._caches.items():
+            hits, misses = fn()
+            lookups = hits + misses
+            samples[(name, )] = round(hits / lookups, 4) if lookups else 0.0
+        return samples
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+register_engine = registry.register_engine
+register_cache = registry.register_cache
+register_queue = registry.register_queue
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency and status for every HTTP request.
+    Routes are labelled by their path template to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            self.registry.requests_total.inc(method, route, str(status["code"]))
+            self.registry.request_duration.observe(time.perf_counter() - start, method, route)
@@ -0,0 +1,81 @@
+"""
+Content negotiation for read endpoints.
+
+Clients sending `Accept: application/msgpack` (bots, the referee dashboard)
+get a MessagePack body instead of JSON. UUIDs are packed as their raw 16
+bytes (bin type) rather than 36-char strings; datetimes become ISO strings,
+enums their values and Pydantic/SQLModel objects their field dicts.
+
+Both representations carry `Vary: Accept`, so shared caches key on it.
+"""
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+import msgpack
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+VARY_ACCEPT = {"Vary": "Accept"}
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, UUID):
+        return obj.bytes
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def __init__(self, content: Any, *args, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        # Same URL, different representation depending on Accept
+        self.headers["Vary"] = "Accept"
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True when MessagePack is acceptable and preferred over JSON (by q-value, then order)."""
+    accept = request.headers.get("accept", "")
+    if not accept:
+        return False
+    best_msgpack, best_json = -1.0, -1.0
+    for part in accept.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        media = fields[0].lower()
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media in MSGPACK_MEDIA_TYPES:
+            best_msgpack = max(best_msgpack, q)
+        elif media in ("application/json", "*/*", "application/*"):
+            best_json = max(best_json, q)
+    return best_msgpack > 0 and best_msgpack >= best_json
+
+
+def negotiated(request: Request, content: Any) -> Response:
+    """`content` (plain dicts/lists) as MessagePack or JSON, whichever the client prefers."""
+    if wants_msgpack(request):
+        return MsgPackResponse(content)
+    return ORJSONResponse(content, headers=VARY_ACCEPT)
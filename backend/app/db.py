@@ -6,7 +6,10 @@ import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://meow_user:meow_password@db:5432/meow_db")
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# SQL echo is noisy under load (benchmarks, production); keep it on by default for dev.
+SQL_ECHO = os.getenv("SQL_ECHO", "true").lower() in ("1", "true", "yes")
+
+engine = create_async_engine(DATABASE_URL, echo=SQL_ECHO, future=True)
 
 async def get_session() -> AsyncSession:
     async_session = sessionmaker(
@@ -1,8 +1,15 @@
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api import auth, players, matches, stages, tournaments
+from app.core import cache, instrumentation, metrics
+from app.core.bootstrap import BOOTSTRAPPED_ENV
+from app.db import engine
+from app.services.stats_service import PlayerStatsJob
 
-app = FastAPI(title="Meow Meow Cup API", version="1.0.0")
+# orjson for every response; hot routes return pre-built dicts as ORJSONResponse directly
+app = FastAPI(title="Meow Meow Cup API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS Configuration
 origins = [
@@ -21,16 +28,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request SQL statement counting (Server-Timing header + admin-only /api/v1/debug/sql)
+if instrumentation.SQL_INSTRUMENTATION:
+    from app.api import debug
+    instrumentation.install(engine)
+    app.add_middleware(instrumentation.SQLInstrumentationMiddleware)
+    app.include_router(debug.router, prefix="/api/v1/debug", tags=["Debug"])
+
+# Prometheus metrics for every router, scraped at /metrics
+if metrics.METRICS_ENABLED:
+    metrics.register_engine("default", engine)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics(request: Request):
+        if not metrics.scrape_allowed(request.headers.get("authorization")):
+            return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(players.router, prefix="/api/v1/players", tags=["Players"])
 app.include_router(matches.router, prefix="/api/v1/matches", tags=["Matches"])
 app.include_router(stages.router, prefix="/api/v1/stages", tags=["Stages"])
 app.include_router(tournaments.router, prefix="/api/v1/tournaments", tags=["Tournaments"])
 
+# Keeps Player.stats up to date from new race results (STATS_JOB_INTERVAL=0 turns it off)
+stats_job = PlayerStatsJob(engine)
+
 @app.on_event("startup")
 async def on_startup():
-    from app.core.create_admin import create_default_admin
-    await create_default_admin()
+    # Keep in-process caches coherent across workers (no-op without REDIS_URL)
+    await cache.bus.start()
+
+    # start.py already created the admin once per container; plain `uvicorn` runs (dev) still do it here
+    if os.getenv(BOOTSTRAPPED_ENV) != "1":
+        from app.core.create_admin import create_default_admin
+        await create_default_admin()
+
+    await stats_job.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stats_job.stop()
+    await cache.bus.stop()
 
 @app.get("/")
 async def root():
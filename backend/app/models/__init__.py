@@ -1,2 +1,2 @@
 from .user import User, Player
-from .tournament import Tournament, Stage, Group, Match, MatchParticipant, Race, RaceResult, GroupParticipant, TournamentParticipant
+from .tournament import Tournament, Stage, Group, Match, MatchParticipant, Race, RaceResult, GroupParticipant, TournamentParticipant, BracketNode, JobCheckpoint, PlayerRating, RatingHistory, ResultEvent, StageSnapshot
@@ -122,14 +122,89 @@ class Race(SQLModel, table=True):
 class RaceResult(SQLModel, table=True):
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     race_id: UUID = Field(foreign_key="race.id")
-    player_id: UUID = Field(foreign_key="player.id")
+    player_id: UUID = Field(foreign_key="player.id", index=True)
     rank: int # 1, 2, 3... (Raw rank before NPC shift)
 
     # Computed points for this single race (can be cached here or calculated on fly)
     points_awarded: int = 0
 
+    # High-water mark of the Player.stats aggregation job (app/services/stats_service.py)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
     race: Race = Relationship(back_populates="results")
     player: "Player" = Relationship(back_populates="race_results")
 
+class BracketNode(SQLModel, table=True):
+    """
+    One match slot of a knockout bracket (see app/services/logic/bracket.py).
+    All nodes are created with the bracket; the Match row only once every node feeding
+    this one has finished (feeds_remaining == 0).
+    """
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    stage_id: UUID = Field(foreign_key="stage.id", index=True)
+    group_id: UUID = Field(foreign_key="group.id")
+    match_id: Optional[UUID] = Field(default=None, foreign_key="match.id", index=True)
+
+    key: str # "U1-1", "L2-1", "GF"
+    name: str # "Upper Bracket R1 M1"
+    bracket: str # "upper" / "lower" / "final"
+    round: int
+    position: int
+
+    # Top `advance` finishers move on via the first routes
+    advance: int = 1
+    # Player id (str) per seat, None while the seat is empty
+    entrants: List[Optional[str]] = Field(default=[], sa_type=JSON)
+    # routes[i] = [target node id, seat] for the (i+1)-th finisher, None = eliminated
+    routes: List[Any] = Field(default=[], sa_type=JSON)
+
+    feeds_remaining: int = 0
+    resolved: bool = False
+
+class JobCheckpoint(SQLModel, table=True):
+    """Progress of an incremental background job: rows up to `high_water` are done."""
+    name: str = Field(primary_key=True)
+    high_water: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PlayerRating(SQLModel, table=True):
+    """Current cross-tournament rating (pairwise Elo, see app/services/logic/rating.py)."""
+    player_id: UUID = Field(foreign_key="player.id", primary_key=True)
+    rating: float = 1500.0
+    races: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class RatingHistory(SQLModel, table=True):
+    """One rating change per rated player per race; a re-submitted race replaces its rows."""
+    race_id: UUID = Field(foreign_key="race.id", primary_key=True)
+    player_id: UUID = Field(foreign_key="player.id", primary_key=True, index=True)
+    rating_before: float
+    rating_after: float
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ResultEvent(SQLModel, table=True):
+    """
+    Append-only log of race result submissions (app/services/event_service.py).
+    Rows are never updated or deleted: a correction is a new event for the same race.
+    """
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    stage_id: UUID = Field(foreign_key="stage.id", index=True)
+    match_id: UUID = Field(foreign_key="match.id")
+    race_id: UUID = Field(foreign_key="race.id")
+    race_number: int
+    kind: str # "submitted" / "corrected" / "imported"
+    # [[player_id, rank, points_awarded], ...]
+    results: List[Any] = Field(default=[], sa_type=JSON)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class StageSnapshot(SQLModel, table=True):
+    """Replay state of a stage's result log up to event `seq`, so replays start from here."""
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    stage_id: UUID = Field(foreign_key="stage.id", index=True)
+    seq: int
+    # race id (str) -> [match id, race number, results as in ResultEvent]
+    races: Dict[str, Any] = Field(default={}, sa_type=JSON)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 from .user import User, Player
-from .tournament import Tournament, Stage, Group, Match, MatchParticipant, Race, RaceResult, GroupParticipant, TournamentParticipant
+from .tournament import Tournament, Stage, Group, Match, MatchParticipant, Race, RaceResult, GroupParticipant, TournamentParticipant, BracketNode
@@ -0,0 +1,249 @@
+"""
+Append-only log of race results, and stage state rebuilt by replaying it.
+
+Every submission or correction of a race appends a ResultEvent holding the full
+result of that race, so the log keeps what was entered when, while RaceResult
+only holds the latest version. Replaying a stage folds its events in order (the
+last event of a race wins); from the replayed results the standings, match
+scores and the RaceResult rows themselves can be rebuilt.
+
+Replay starts from the stage's latest StageSnapshot. Replays are read-only; the
+admin rebuild writes a new snapshot when it had to fold SNAPSHOT_EVERY events or
+more, and the admin snapshot route writes one on demand, so the cost of a replay
+is bounded by the events since the last snapshot rather than the stage's history.
+
+Stages that had results before the log existed are imported once ("imported"
+events) before their first result is logged, under a row lock on the stage so
+concurrent writers import them only once. Until then a replay folds those
+results in memory instead.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import String, cast, delete, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.cache import invalidate
+from app.models import Group, Match, Race, RaceResult, Stage, ResultEvent, StageSnapshot
+from app.services.logic.rules import load_stage_rules
+from app.services.logic.scoring import ScoringEngine
+
+# Events folded by one replay before it leaves a snapshot behind
+SNAPSHOT_EVERY = 500
+
+# Rows per INSERT batch
+CHUNK_ROWS = 5000
+
+# Caches derived from a stage's results
+DERIVED_CACHES = ("qualification_odds", "clinch")
+
+
+@dataclass
+class ReplayedResult:
+    """One player's result in a replayed race; shaped like RaceResult for the scoring code."""
+    race_id: UUID
+    player_id: UUID
+    rank: int
+    points_awarded: int
+
+
+@dataclass
+class StageReplay:
+    stage_id: str
+    # Last event folded in (0: none)
+    seq: int = 0
+    # race id (str) -> [match id (str), race number, [[player_id, rank, points], ...]]
+    races: Dict[str, List[Any]] = field(default_factory=dict)
+    snapshot_seq: int = 0
+    events_applied: int = 0
+
+    def results(self) -> List[Tuple[ReplayedResult, UUID]]:
+        """(result, match id) pairs, the input of TournamentService.standings_from_results."""
+        rows = []
+        for race_id, (match_id, _, results) in self.races.items():
+            race_uuid, match_uuid = UUID(race_id), UUID(match_id)
+            for player_id, rank, points in results:
+                rows.append((ReplayedResult(race_uuid, UUID(player_id), rank, points), match_uuid))
+        return rows
+
+
+class ResultLog:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def append(self, stage_id: Any, match_id: Any, race_id: Any, race_number: int,
+               results: List[RaceResult], corrected: bool = False):
+        """Adds the event for a race's (new) results to the caller's transaction."""
+        self.session.add(ResultEvent(
+            stage_id=stage_id, match_id=match_id, race_id=race_id, race_number=race_number,
+            kind="corrected" if corrected else "submitted",
+            results=[[str(r.player_id), r.rank, r.points_awarded] for r in results],
+        ))
+
+    async def ensure_backfilled(self, stage_id: Any) -> int:
+        """
+        Imports the stage's current results as events if it has none yet. Call before
+        changing results, so the log starts from what was there. Returns events added.
+
+        Whether a stage was imported is read from the log itself (one indexed lookup on
+        resultevent.stage_id), so every worker sees the same answer.
+        """
+        # Serializes concurrent first writers on the stage (a no-op on SQLite, which
+        # allows one writer at a time anyway), so the second sees the first's import
+        await self.session.exec(select(Stage.id).where(Stage.id == stage_id).with_for_update())
+        if await self._has_events(stage_id):
+            return 0
+
+        rows = await self._imported_rows(stage_id)
+        for i in range(0, len(rows), CHUNK_ROWS):
+            await self.session.execute(insert(ResultEvent.__table__), rows[i:i + CHUNK_ROWS])
+        return len(rows)
+
+    async def _has_events(self, stage_id: Any) -> bool:
+        exists = (await self.session.exec(
+            select(ResultEvent.seq).where(ResultEvent.stage_id == stage_id).limit(1)
+        )).first()
+        return exists is not None
+
+    async def _imported_rows(self, stage_id: Any) -> List[Dict[str, Any]]:
+        """The stage's current results as "imported" event rows, one per race."""
+        stmt = (
+            select(RaceResult.race_id, Race.match_id, Race.race_number,
+                   RaceResult.player_id, RaceResult.rank, RaceResult.points_awarded)
+            .join(Race, Race.id == RaceResult.race_id)
+            .join(Match, Match.id == Race.match_id)
+            .join(Group, Group.id == Match.group_id)
+            .where(Group.stage_id == stage_id)
+            .order_by(Match.id, Race.race_number, RaceResult.rank)
+        )
+        races: Dict[Any, Dict[str, Any]] = {}
+        for race_id, match_id, race_number, player_id, rank, points in (await self.session.exec(stmt)).all():
+            race = races.get(race_id)
+            if race is None:
+                race = races[race_id] = {"stage_id": stage_id, "match_id": match_id, "race_id": race_id,
+                                         "race_number": race_number, "kind": "imported", "results": [],
+                                         "created_at": datetime.utcnow()}
+            race["results"].append([str(player_id), rank, points])
+        return list(races.values())
+
+    async def events(self, stage_id: Any, after: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """The stage's log in order, from event `after` on (exclusive)."""
+        if not await self.session.get(Stage, stage_id):
+            raise ValueError("Stage not found")
+        stmt = (
+            select(ResultEvent)
+            .where(ResultEvent.stage_id == stage_id, ResultEvent.seq > after)
+            .order_by(ResultEvent.seq)
+            .limit(limit)
+        )
+        return [
+            {"seq": e.seq, "kind": e.kind, "match_id": e.match_id, "race_id": e.race_id,
+             "race_number": e.race_number, "results": e.results, "created_at": e.created_at}
+            for e in (await self.session.exec(stmt)).all()
+        ]
+
+    async def replay(self, stage_id: Any, snapshot: bool = False) -> StageReplay:
+        """
+        Folds the stage's log from its latest snapshot. Writes nothing unless `snapshot`
+        is set, in which case a replay that took long leaves a new snapshot behind.
+        """
+        if not await self.session.get(Stage, stage_id):
+            raise ValueError("Stage not found")
+
+        state = StageReplay(stage_id=str(stage_id))
+        if not await self._has_events(stage_id):
+            # Not imported yet: the current results are what the import would log
+            for row in await self._imported_rows(stage_id):
+                state.races[str(row["race_id"])] = [str(row["match_id"]), row["race_number"], row["results"]]
+            return state
+
+        latest = (await self.session.exec(
+            select(StageSnapshot).where(StageSnapshot.stage_id == stage_id).order_by(StageSnapshot.seq.desc()).limit(1)
+        )).first()
+        if latest is not None:
+            state.races = dict(latest.races)
+            state.seq = state.snapshot_seq = latest.seq
+
+        # Ids as text, the form they are stored in inside the events
+        stmt = (
+            select(ResultEvent.seq, cast(ResultEvent.race_id, String), cast(ResultEvent.match_id, String),
+                   ResultEvent.race_number, ResultEvent.results)
+            .where(ResultEvent.stage_id == stage_id, ResultEvent.seq > state.seq)
+            .order_by(ResultEvent.seq)
+        )
+        races = state.races
+        for seq, race_id, match_id, race_number, results in (await self.session.exec(stmt)).all():
+            races[race_id] = [match_id, race_number, results]
+            state.seq = seq
+            state.events_applied += 1
+
+        if snapshot and state.events_applied >= SNAPSHOT_EVERY:
+            await self._save_snapshot(state)
+        return state
+
+    async def snapshot(self, stage_id: Any) -> Dict[str, Any]:
+        """Imports the stage if needed and writes a snapshot at the end of the log now."""
+        if not await self.session.get(Stage, stage_id):
+            raise ValueError("Stage not found")
+        if await self.ensure_backfilled(stage_id):
+            await self.session.commit()
+        state = await self.replay(stage_id)
+        if state.seq and state.seq != state.snapshot_seq:
+            await self._save_snapshot(state)
+        return {"stage_id": state.stage_id, "seq": state.seq, "races": len(state.races)}
+
+    async def _save_snapshot(self, state: StageReplay):
+        # Older snapshots are never read again
+        await self.session.exec(delete(StageSnapshot).where(StageSnapshot.stage_id == UUID(state.stage_id)))
+        self.session.add(StageSnapshot(stage_id=UUID(state.stage_id), seq=state.seq, races=state.races))
+        await self.session.commit()
+        state.snapshot_seq = state.seq
+
+    async def rebuild_view(self, stage_id: Any) -> Dict[str, Any]:
+        """Standings and match scores computed from the replayed log alone."""
+        from app.services.tournament_service import TournamentService
+
+        state = await self.replay(stage_id)
+        stage = await self.session.get(Stage, stage_id)
+        rows = state.results()
+        standings = await TournamentService(self.session).standings_from_results(stage, rows) if rows else []
+
+        rules = await load_stage_rules(self.session, stage)
+        by_match = defaultdict(list)
+        for result, match_id in rows:
+            by_match[match_id].append(result)
+        return {
+            "stage_id": state.stage_id,
+            "seq": state.seq,
+            "snapshot_seq": state.snapshot_seq,
+            "events_replayed": state.events_applied,
+            "standings": standings,
+            "match_scores": [
+                {"match_id": match_id, "scores": ScoringEngine.calculate_match_score(results, rules)}
+                for match_id, results in by_match.items()
+            ],
+        }
+
+    async def rebuild_results(self, stage_id: Any) -> Dict[str, Any]:
+        """
+        Rewrites the stage's RaceResult rows from the log in one transaction (set-based
+        delete + bulk insert) and drops the caches derived from them. Snapshots the log
+        if the replay took long.
+        """
+        state = await self.replay(stage_id, snapshot=True)
+        stage_races = (
+            select(Race.id).join(Match, Match.id == Race.match_id).join(Group, Group.id == Match.group_id)
+            .where(Group.stage_id == stage_id)
+        )
+        await self.session.exec(delete(RaceResult).where(RaceResult.race_id.in_(stage_races)))
+        rows = [{"race_id": r.race_id, "player_id": r.player_id, "rank": r.rank, "points_awarded": r.points_awarded}
+                for r, _ in state.results()]
+        for i in range(0, len(rows), CHUNK_ROWS):
+            await self.session.execute(insert(RaceResult.__table__), rows[i:i + CHUNK_ROWS])
+        await self.session.commit()
+
+        for namespace in DERIVED_CACHES:
+            await invalidate(namespace)
+        return {"stage_id": state.stage_id, "seq": state.seq, "races": len(state.races), "results": len(rows)}
@@ -0,0 +1,154 @@
+from typing import Any, AsyncIterator, Iterable, List, Optional, Sequence
+import csv
+import io
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Tournament, Stage, Group, Match, Race, RaceResult, Player
+from app.services.logic.rules import ScoringRules
+from app.services.logic.scoring import ScoringEngine
+from app.services.tournament_service import TournamentService
+
+# Rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+# Rows per chunk written to the response
+CHUNK_ROWS = 500
+
+EXPORT_KINDS = ("race_results", "match_scores", "standings")
+
+HEADERS = {
+    "race_results": ["tournament", "stage", "group", "match", "match_id", "race_number",
+                     "player_id", "player_name", "rank", "points"],
+    "match_scores": ["tournament", "stage", "group", "match", "match_id",
+                     "player_id", "player_name", "points", "wins", "is_ace"],
+    "standings": ["tournament", "stage", "rank", "player_id", "player_name",
+                  "total_points", "bonus_points", "wins", "matches_played"],
+}
+
+
+async def csv_chunks(header: Sequence[str], rows: AsyncIterator[Sequence[Any]]) -> AsyncIterator[str]:
+    """CSV text in chunks of CHUNK_ROWS rows, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
+
+
+class ExportService:
+    """
+    Row generators for the CSV exports, scoped to one stage or a whole tournament.
+
+    Results are read through a server-side cursor (session.stream + yield_per) and
+    turned into rows on the fly, so memory stays flat however big the season is:
+    race results go out as they come, match scores keep one match in memory at a time,
+    standings one stage at a time (a ranking needs the whole stage).
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def stages_in_scope(self, stage_id: Optional[Any] = None, tournament_id: Optional[Any] = None) -> List[Any]:
+        """[(stage, tournament)] in play order; raises ValueError if the scope doesn't exist."""
+        stmt = select(Stage, Tournament).join(Tournament, Stage.tournament_id == Tournament.id)
+        if stage_id is not None:
+            stmt = stmt.where(Stage.id == stage_id)
+        else:
+            stmt = stmt.where(Stage.tournament_id == tournament_id)
+        rows = (await self.session.exec(stmt.order_by(Stage.sequence_order, Stage.name))).all()
+        if stage_id is not None and not rows:
+            raise ValueError("Stage not found")
+        if tournament_id is not None and not rows and not await self.session.get(Tournament, tournament_id):
+            raise ValueError("Tournament not found")
+        return list(rows)
+
+    def rows(self, kind: str, stages: List[Any]) -> AsyncIterator[Sequence[Any]]:
+        if kind == "race_results":
+            return self.race_result_rows(stages)
+        if kind == "match_scores":
+            return self.match_score_rows(stages)
+        if kind == "standings":
+            return self.standings_rows(stages)
+        raise ValueError(f"Unknown export: {kind}")
+
+    async def _stream_results(self, stages: List[Any]):
+        """Race results of `stages` in export order, one partition of YIELD_PER rows at a time."""
+        stmt = (
+            select(
+                Stage.id.label("stage_id"), Group.name.label("group_name"), Match.name.label("match_name"),
+                Match.id.label("match_id"), Race.race_number, Race.id.label("race_id"),
+                RaceResult.player_id, Player.in_game_name, RaceResult.rank, RaceResult.points_awarded,
+            )
+            .join(Group, Stage.id == Group.stage_id)
+            .join(Match, Group.id == Match.group_id)
+            .join(Race, Match.id == Race.match_id)
+            .join(RaceResult, Race.id == RaceResult.race_id)
+            .outerjoin(Player, RaceResult.player_id == Player.id)
+            .where(Stage.id.in_([stage.id for stage, _ in stages]))
+            .order_by(Stage.sequence_order, Group.name, Match.name, Match.id, Race.race_number, RaceResult.rank)
+            .execution_options(yield_per=YIELD_PER)
+        )
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def race_result_rows(self, stages: List[Any]) -> AsyncIterator[Sequence[Any]]:
+        names = {stage.id: (tournament.name, stage.name) for stage, tournament in stages}
+        async for partition in self._stream_results(stages):
+            for r in partition:
+                tournament_name, stage_name = names[r.stage_id]
+                yield (tournament_name, stage_name, r.group_name, r.match_name, r.match_id, r.race_number,
+                       r.player_id, r.in_game_name, r.rank, r.points_awarded)
+
+    async def match_score_rows(self, stages: List[Any]) -> AsyncIterator[Sequence[Any]]:
+        names = {stage.id: (tournament.name, stage.name) for stage, tournament in stages}
+        rules = {stage.id: ScoringRules.compile(stage.rules_config, tournament.rules_config) for stage, tournament in stages}
+
+        def scores(rows: List[Any]) -> Iterable[Sequence[Any]]:
+            first = rows[0]
+            player_names = {r.player_id: r.in_game_name for r in rows}
+            tournament_name, stage_name = names[first.stage_id]
+            for score in ScoringEngine.calculate_match_score(rows, rules[first.stage_id]):
+                yield (tournament_name, stage_name, first.group_name, first.match_name, first.match_id,
+                       score["player_id"], player_names.get(score["player_id"]), score["total_points"],
+                       score["wins"], score["is_ace"])
+
+        # Results arrive ordered by match: score each match when the next one starts
+        current: List[Any] = []
+        async for partition in self._stream_results(stages):
+            for r in partition:
+                if current and r.match_id != current[0].match_id:
+                    for row in scores(current):
+                        yield row
+                    current = []
+                current.append(r)
+        if current:
+            for row in scores(current):
+                yield row
+
+    async def standings_rows(self, stages: List[Any]) -> AsyncIterator[Sequence[Any]]:
+        service = TournamentService(self.session)
+        for stage, tournament in stages:
+            for entry in await service.get_stage_standings(str(stage.id)):
+                yield (tournament.name, stage.name, entry["rank"], entry["player_id"], entry["player_name"],
+                       entry["total_points"], entry["bonus_points"], entry["wins"], entry["matches_played"])
+            # Drop the stage's results before loading the next one
+            self.session.expunge_all()
+
+
+async def stream_export(bind: Any, kind: str, stages: List[Any]) -> AsyncIterator[str]:
+    """
+    Body of a StreamingResponse. The request's session is closed before a streamed body
+    is sent (dependencies with yield exit first), so the rows come from a session of
+    their own on the same engine.
+    """
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        async for chunk in csv_chunks(HEADERS[kind], ExportService(session).rows(kind, stages)):
+            yield chunk
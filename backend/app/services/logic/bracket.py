@@ -0,0 +1,436 @@
+from typing import List, Dict, Any, Optional
+from uuid import UUID, uuid4
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.tournament import Stage, StageType, Group, Match, MatchParticipant, Race, RaceResult, BracketNode
+from app.services.logic.scoring import ScoringEngine
+from app.services.logic.rules import load_stage_rules
+from app.services.logic.host_assignment import HostAssignmentEngine
+
+
+def seed_order(num_matches: int, fan_in: int = 2) -> List[int]:
+    """
+    Top seed of each first-round match, in bracket order, so seeds 1 and 2 can only meet
+    in the final (1, 4, 2, 3 for 4 matches). `fan_in` is how many matches feed one match
+    of the next round.
+    """
+    order = [1]
+    n = 1
+    while n < num_matches:
+        expanded = []
+        for x in order:
+            expanded.append(x)
+            for j in range(1, fan_in):
+                expanded.append(j * n + (n + 1 - x) if j % 2 else j * n + x)
+        order = expanded
+        n *= fan_in
+    return order
+
+
+def first_round_seats(num_players: int, num_matches: int, capacity: int, fan_in: int = 2) -> List[List[Optional[int]]]:
+    """
+    Seeds (0-based) per seat of each first-round match; None = bye.
+    Seeds are dealt in pots of `num_matches`, snaking back and forth over the bracket
+    order, so the top seeds get the byes when the field doesn't fill the bracket.
+    """
+    order = seed_order(num_matches, fan_in)
+    match_of = {top: idx for idx, top in enumerate(order)}
+    seats: List[List[Optional[int]]] = [[None] * capacity for _ in range(num_matches)]
+    for s in range(num_players):
+        pot, j = divmod(s, num_matches)
+        top = j + 1 if pot % 2 == 0 else num_matches - j
+        seats[match_of[top]][pot] = s
+    return seats
+
+
+def plan_double_elimination(num_players: int, advance: int = 1) -> List[Dict[str, Any]]:
+    """
+    Lays out a double-elimination bracket as plain node specs.
+
+    Matches have 2 * `advance` seats: the top `advance` finishers stay in their bracket,
+    the rest drop from upper to lower (or are out, in the lower bracket). With advance=1
+    this is the classic 1v1 bracket. The grand final is a single match (no reset).
+
+    Each spec: key, name, group, bracket, round, position, capacity, routes, seeds.
+    routes[i] = (target key, seat) for the (i+1)-th finisher, or None.
+    """
+    capacity = 2 * advance
+    if num_players <= advance:
+        raise ValueError(f"Need more than {advance} players for a bracket")
+
+    first_round = 1
+    while first_round * capacity < num_players:
+        first_round *= 2
+    rounds = first_round.bit_length()  # upper rounds, the last one is the upper final
+    lower_rounds = 2 * (rounds - 1)
+    has_final = rounds > 1
+
+    def lower_count(lr: int) -> int:
+        return first_round >> ((lr + 1) // 2)
+
+    def winners_to(target: str, first_seat: int) -> List[Any]:
+        return [(target, first_seat + t) for t in range(advance)]
+
+    specs: List[Dict[str, Any]] = []
+    seeds = first_round_seats(num_players, first_round, capacity)
+
+    for u in range(1, rounds + 1):
+        count = first_round >> (u - 1)
+        for i in range(count):
+            if u < rounds:
+                routes = winners_to(f"U{u + 1}-{i // 2 + 1}", (i % 2) * advance)
+            elif has_final:
+                routes = winners_to("GF", 0)
+            else:
+                routes = [None] * advance
+
+            if not has_final:
+                routes += [None] * advance
+            elif u == 1:
+                routes += winners_to(f"L1-{i // 2 + 1}", (i % 2) * advance)
+            else:
+                # Drops enter the second half of the lower match; every other round is
+                # reversed so players don't meet the same opponents straight away
+                lr = 2 * (u - 1)
+                n = lower_count(lr)
+                j = n - 1 - i if u % 2 == 0 else i
+                routes += winners_to(f"L{lr}-{j + 1}", advance)
+
+            specs.append({
+                "key": f"U{u}-{i + 1}",
+                "name": f"Upper Bracket R{u} M{i + 1}",
+                "group": "Upper Bracket",
+                "bracket": "upper",
+                "round": u,
+                "position": i,
+                "capacity": capacity,
+                "routes": routes,
+                "seeds": seeds[i] if u == 1 else None,
+            })
+
+    for lr in range(1, lower_rounds + 1):
+        count = lower_count(lr)
+        for j in range(count):
+            if lr == lower_rounds:
+                routes = winners_to("GF", advance)
+            elif lr % 2 == 1:
+                routes = winners_to(f"L{lr + 1}-{j + 1}", 0)
+            else:
+                routes = winners_to(f"L{lr + 1}-{j // 2 + 1}", (j % 2) * advance)
+            specs.append({
+                "key": f"L{lr}-{j + 1}",
+                "name": f"Lower Bracket R{lr} M{j + 1}",
+                "group": "Lower Bracket",
+                "bracket": "lower",
+                "round": lr,
+                "position": j,
+                "capacity": capacity,
+                "routes": routes + [None] * advance,
+                "seeds": None,
+            })
+
+    if has_final:
+        specs.append({
+            "key": "GF",
+            "name": "Grand Final",
+            "group": "Grand Final",
+            "bracket": "final",
+            "round": rounds + 1,
+            "position": 0,
+            "capacity": capacity,
+            "routes": [None] * capacity,
+            "seeds": None,
+        })
+
+    return specs
+
+
+def plan_single_elimination(num_players: int, players_per_match: int = 2, advance: int = 1) -> List[Dict[str, Any]]:
+    """
+    Lays out a single-elimination bracket as plain node specs (same shape as
+    plan_double_elimination).
+
+    The top `advance` of each `players_per_match`-player match move on, so
+    players_per_match / advance matches feed each match of the next round (3-player
+    matches, winner advances: 9 -> 3 -> 1). Seats left empty by a short field are byes.
+    """
+    if advance < 1 or players_per_match % advance or players_per_match // advance < 2:
+        raise ValueError("players_per_match must be a multiple (2x or more) of advance_per_match")
+    if num_players <= advance:
+        raise ValueError(f"Need more than {advance} players for a bracket")
+    fan_in = players_per_match // advance
+
+    first_round = 1
+    rounds = 1
+    while first_round * players_per_match < num_players:
+        first_round *= fan_in
+        rounds += 1
+
+    specs: List[Dict[str, Any]] = []
+    seeds = first_round_seats(num_players, first_round, players_per_match, fan_in)
+    for r in range(1, rounds + 1):
+        count = first_round // fan_in ** (r - 1)
+        for i in range(count):
+            if r < rounds:
+                target, first_seat = f"R{r + 1}-{i // fan_in + 1}", (i % fan_in) * advance
+                routes = [(target, first_seat + t) for t in range(advance)]
+            else:
+                routes = [None] * advance
+            specs.append({
+                "key": f"R{r}-{i + 1}",
+                "name": "Final" if r == rounds else f"Round {r} M{i + 1}",
+                "group": "Bracket",
+                "bracket": "upper",
+                "round": r,
+                "position": i,
+                "capacity": players_per_match,
+                "routes": routes + [None] * (players_per_match - advance),
+                "seeds": seeds[i] if r == 1 else None,
+            })
+
+    return specs
+
+
+class BracketEngine:
+    """
+    Builds and advances knockout brackets (single or double elimination) stored as
+    BracketNode rows.
+
+    Every node knows where each finishing position goes (routes) and how many feeding
+    nodes are still open (feeds_remaining), so advancing a finished match is a couple of
+    primary-key lookups. A node's Match is created once all its feeders are done; a node
+    left with `advance` players or fewer (byes) passes them straight through.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._nodes: Dict[UUID, BracketNode] = {}
+        self._new_matches: List[BracketNode] = []
+
+    async def generate(self, stage_id: UUID, player_ids: List[Any]) -> List[BracketNode]:
+        """
+        Creates the bracket for a knockout stage.
+        player_ids: qualifiers in seed order (best first).
+        """
+        stage = await self.session.get(Stage, stage_id)
+        if not stage:
+            raise ValueError("Stage not found")
+
+        existing = await self.session.exec(select(BracketNode.id).where(BracketNode.stage_id == stage.id))
+        if existing.first() is not None:
+            raise ValueError("Bracket already generated for this stage")
+
+        player_ids = [str(pid) for pid in player_ids]
+        if len(set(player_ids)) != len(player_ids):
+            raise ValueError("Duplicate players in bracket seeding")
+
+        rules = stage.rules_config or {}
+        advance = rules.get("advance_per_match", 1)
+        if stage.stage_type == StageType.DOUBLE_ELIMINATION:
+            specs = plan_double_elimination(len(player_ids), advance)
+        elif stage.stage_type == StageType.ELIMINATION:
+            specs = plan_single_elimination(len(player_ids), rules.get("players_per_match", 2), advance)
+        else:
+            raise ValueError(f"Stage type {stage.stage_type} has no bracket")
+
+        # Groups (one per bracket), flushed first so matches can reference them
+        groups: Dict[str, Group] = {}
+        for spec in specs:
+            if spec["group"] not in groups:
+                groups[spec["group"]] = Group(stage_id=stage.id, name=spec["group"])
+                self.session.add(groups[spec["group"]])
+        await self.session.flush()
+
+        ids = {spec["key"]: uuid4() for spec in specs}
+        feeds: Dict[str, int] = {key: 0 for key in ids}
+        for spec in specs:
+            for target in {route[0] for route in spec["routes"] if route}:
+                feeds[target] += 1
+
+        nodes = []
+        for spec in specs:
+            seeds = spec["seeds"] or [None] * spec["capacity"]
+            node = BracketNode(
+                id=ids[spec["key"]],
+                stage_id=stage.id,
+                group_id=groups[spec["group"]].id,
+                key=spec["key"],
+                name=spec["name"],
+                bracket=spec["bracket"],
+                round=spec["round"],
+                position=spec["position"],
+                advance=advance,
+                entrants=[player_ids[s] if s is not None else None for s in seeds],
+                routes=[[str(ids[r[0]]), r[1]] if r else None for r in spec["routes"]],
+                feeds_remaining=feeds[spec["key"]],
+            )
+            self.session.add(node)
+            self._nodes[node.id] = node
+            nodes.append(node)
+        await self.session.flush()
+
+        # First-round nodes (nothing feeds them); byes cascade into later rounds from here
+        for node in [n for n in nodes if n.feeds_remaining == 0]:
+            await self._activate(node)
+        await self._create_matches(stage)
+
+        await self.session.commit()
+        return nodes
+
+    async def node_for_match(self, match_id: Any) -> Optional[BracketNode]:
+        stmt = select(BracketNode).where(BracketNode.match_id == UUID(str(match_id)))
+        node = (await self.session.exec(stmt)).first()
+        if node is not None:
+            self._nodes[node.id] = node
+        return node
+
+    async def races_complete(self, node: BracketNode) -> bool:
+        """A bracket match is done once `races_per_match` races have results (any race if unset)."""
+        stage = await self.session.get(Stage, node.stage_id)
+        required = (stage.rules_config or {}).get("races_per_match", 1)
+        stmt = (
+            select(func.count(func.distinct(Race.id)))
+            .join(RaceResult, RaceResult.race_id == Race.id)
+            .where(Race.match_id == node.match_id)
+        )
+        played = (await self.session.exec(stmt)).one()
+        return played >= required
+
+    async def advance(self, node: BracketNode, commit: bool = True):
+        """
+        Moves the finishers of `node`'s match to their next matches.
+        Safe to call again after a corrected result: seats are overwritten in place.
+        Raises ValueError when a correction would change the line-up of a next match
+        that has already started.
+        commit=False leaves the changes in the caller's transaction.
+        """
+        stage = await self.session.get(Stage, node.stage_id)
+        await self._resolve(node, await self.finishing_order(node, stage))
+        await self._create_matches(stage)
+        if commit:
+            await self.session.commit()
+
+    async def finishing_order(self, node: BracketNode, stage: Stage) -> List[str]:
+        """Entrants by match score (points, then wins), seed order breaking ties."""
+        stmt = (
+            select(RaceResult)
+            .join(Race, RaceResult.race_id == Race.id)
+            .where(Race.match_id == node.match_id)
+        )
+        race_results = (await self.session.exec(stmt)).all()
+        rules = await load_stage_rules(self.session, stage)
+        scores = {
+            str(s["player_id"]): s
+            for s in ScoringEngine.calculate_match_score(race_results, rules)
+        }
+        seated = [(seat, pid) for seat, pid in enumerate(node.entrants) if pid]
+
+        def sort_key(item):
+            seat, pid = item
+            score = scores.get(pid, {"total_points": 0, "wins": 0})
+            return (-score["total_points"], -score["wins"], seat)
+
+        return [pid for _, pid in sorted(seated, key=sort_key)]
+
+    async def _node(self, node_id: Any) -> BracketNode:
+        node_id = UUID(str(node_id))
+        if node_id not in self._nodes:
+            self._nodes[node_id] = await self.session.get(BracketNode, node_id)
+        return self._nodes[node_id]
+
+    async def _activate(self, node: BracketNode):
+        """All feeders are done: play the match, or pass byes straight through."""
+        players = [pid for pid in node.entrants if pid]
+        if len(players) > node.advance:
+            self._new_matches.append(node)
+        else:
+            await self._resolve(node, players)
+
+    async def _resolve(self, node: BracketNode, order: List[str]):
+        first_time = not node.resolved
+        node.resolved = True
+        self.session.add(node)
+
+        # Seats grouped per next node, so finishers who move on together (or swap
+        # seats after a correction) are placed in one step
+        placements: Dict[str, Dict[int, str]] = {}
+        for pos, pid in enumerate(order):
+            route = node.routes[pos] if pos < len(node.routes) else None
+            if route:
+                placements.setdefault(str(route[0]), {})[route[1]] = pid
+        for target_id, seats in placements.items():
+            await self._place(target_id, seats)
+
+        if first_time:
+            for target_id in {route[0] for route in node.routes if route}:
+                target = await self._node(target_id)
+                target.feeds_remaining -= 1
+                self.session.add(target)
+                if target.feeds_remaining == 0:
+                    await self._activate(target)
+
+    async def _place(self, node_id: Any, seats: Dict[int, str]):
+        """Seats players in a node; its match's participants change only for players who came or left."""
+        target = await self._node(node_id)
+        entrants = list(target.entrants)
+        for seat, player_id in seats.items():
+            entrants[seat] = player_id
+        if entrants == target.entrants:
+            return
+
+        if target.match_id is not None:
+            played = await self.session.exec(select(Race.id).where(Race.match_id == target.match_id))
+            if played.first() is not None:
+                # Moving players into a match with races would leave results for the wrong line-up
+                raise ValueError(
+                    f"{target.name} has already started; reset its results before correcting this match"
+                )
+
+        before = {pid for pid in target.entrants if pid}
+        after = {pid for pid in entrants if pid}
+        target.entrants = entrants  # reassign so the JSON column is marked dirty
+        self.session.add(target)
+
+        if target.match_id is not None:
+            for pid in before - after:
+                old = await self.session.get(MatchParticipant, (target.match_id, UUID(pid)))
+                if old:
+                    await self.session.delete(old)
+            for pid in after - before:
+                self.session.add(MatchParticipant(match_id=target.match_id, player_id=UUID(pid)))
+        elif target.resolved:
+            # A bye that already passed its players on: pass the corrected ones on too
+            await self._resolve(target, [pid for pid in target.entrants if pid])
+
+    async def _create_matches(self, stage: Stage):
+        """Creates Match rows for newly playable nodes, hosts balanced over the tournament."""
+        if not self._new_matches:
+            return
+        pending, self._new_matches = self._new_matches, []
+
+        entrant_lists = [[UUID(pid) for pid in node.entrants if pid] for node in pending]
+        all_players = {pid for players in entrant_lists for pid in players}
+        stmt = (
+            select(Match.host_player_id, func.count())
+            .join(Group, Match.group_id == Group.id)
+            .join(Stage, Group.stage_id == Stage.id)
+            .where(Stage.tournament_id == stage.tournament_id)
+            .where(Match.host_player_id.in_(all_players))
+            .group_by(Match.host_player_id)
+        )
+        prior_counts = {host_id: count for host_id, count in (await self.session.exec(stmt)).all()}
+        hosts = HostAssignmentEngine.assign(entrant_lists, prior_counts=prior_counts)
+
+        matches = []
+        for node, host_id in zip(pending, hosts):
+            match = Match(group_id=node.group_id, name=node.name, host_player_id=host_id, status="pending")
+            self.session.add(match)
+            matches.append(match)
+        # Matches must exist before nodes and participants point at them
+        await self.session.flush()
+
+        for node, match, players in zip(pending, matches, entrant_lists):
+            node.match_id = match.id
+            self.session.add(node)
+            for pid in players:
+                self.session.add(MatchParticipant(match_id=match.id, player_id=pid))
@@ -0,0 +1,361 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+from functools import lru_cache
+from itertools import permutations
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.cache import get_cache
+from app.models.tournament import Stage
+from app.services.logic.progression import ProgressionEngine
+from app.services.logic.simulation import QualificationSimulator, SimulationInput
+
+# Search nodes per player and direction; past this the answer falls back to the safe bounds
+NODE_BUDGET = 20_000
+
+_cache = get_cache("clinch", max_entries=128)
+
+
+@lru_cache(maxsize=64)
+def match_outcomes(seats: int, races: int, table: Tuple[int, ...], ace_bonus: int) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    Every distinct (points per seat, 1st places per seat) a match can end with.
+
+    Built race by race with duplicates merged, so 3 races of 3 players are a few dozen
+    outcomes instead of 6^3 finishing orders.
+    """
+    race_points = [table[pos] if pos < len(table) else 0 for pos in range(seats)]
+    first_counts = table[0] > 0 if table else False
+    states = {((0,) * seats, (0,) * seats)}
+    for _ in range(races):
+        nxt = set()
+        for order in permutations(range(seats)):
+            # order[pos] = seat finishing at pos
+            add_pts = [0] * seats
+            add_win = [0] * seats
+            for pos, seat in enumerate(order):
+                add_pts[seat] = race_points[pos]
+            if first_counts:
+                add_win[order[0]] = 1
+            for pts, wins in states:
+                nxt.add((tuple(a + b for a, b in zip(pts, add_pts)), tuple(a + b for a, b in zip(wins, add_win))))
+        states = nxt
+
+    outcomes = set()
+    for pts, wins in states:
+        if ace_bonus:
+            pts = tuple(p + ace_bonus if w > races / 2 else p for p, w in zip(pts, wins))
+        outcomes.add((pts, wins))
+    return sorted(outcomes)
+
+
+def seeded_outcomes(races: int, table: Tuple[int, ...], ace_bonus: int, played: Tuple[Tuple[int, ...], Tuple[int, ...], int]
+                    ) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """
+    match_outcomes() for a match already under way: `played` is (points per seat, 1st
+    places per seat, races recorded), and the ace bonus is settled over the whole match.
+    """
+    so_far_pts, so_far_wins, recorded = played
+    total = recorded + races
+    outcomes = set()
+    for pts, wins in match_outcomes(len(so_far_pts), races, table, 0):
+        wins = tuple(a + b for a, b in zip(so_far_wins, wins))
+        pts = tuple(a + b + (ace_bonus if w > total / 2 else 0) for a, b, w in zip(so_far_pts, pts, wins))
+        outcomes.add((pts, wins))
+    return sorted(outcomes)
+
+
+class GroupSearch:
+    """
+    Best and worst final rank of each player in one group, over every way its pending
+    matches can end. A pending entry is (seats, races left), or (seats, races left, played)
+    for a match already under way (see seeded_outcomes).
+
+    A player's best case has them take their own matches' outcome with the most points
+    (then 1st places), their worst case the one with the fewest: with the points tables
+    ScoringRules accepts that is winning (losing) every race, at least as good (bad) for
+    them as anything else, so only the other seats of their matches and the other
+    matches are searched.
+    Players level on points count as ahead in the worst case and behind in the best
+    case, whatever the tie-breakers would say, so "clinched" and "eliminated" are
+    never wrong.
+
+    Depth-first branch and bound: a player counts as ahead once their score passes the
+    target (scores only grow), the bound is how many can't be kept back (best case) or
+    can still get there (worst case), outcomes that differ only for decided players are
+    merged, and positions reached before are skipped.
+    """
+
+    def __init__(self, points: List[int], wins: List[int], matches: List[int], dominance_points: int,
+                 pending: List[Tuple], table: Tuple[int, ...], ace_bonus: int):
+        self.n = len(points)
+        self.points = points
+        self.wins = wins
+        self.half = [m // 2 for m in matches]
+        self.played = matches
+        self.dominance_points = dominance_points
+        self.pending = [
+            (seats, seeded_outcomes(races, table, ace_bonus, extra[0]) if extra
+             else match_outcomes(len(seats), races, table, ace_bonus))
+            for seats, races, *extra in pending
+        ]
+
+    def score(self, i: int, pts: int, wins: int) -> int:
+        if self.dominance_points and self.played[i] > 0:
+            return pts + self.dominance_points * max(wins - self.half[i], 0)
+        return pts
+
+    def current_scores(self) -> List[int]:
+        return [self.score(i, self.points[i], self.wins[i]) for i in range(self.n)]
+
+    def max_scores(self) -> List[int]:
+        """Each player's score if they won every race left (independently of everyone else)."""
+        pts, wins = list(self.points), list(self.wins)
+        for seats, outcomes in self.pending:
+            for s, i in enumerate(seats):
+                pts[i] += max(o[0][s] for o in outcomes)
+                wins[i] += max(o[1][s] for o in outcomes)
+        return [self.score(i, pts[i], wins[i]) for i in range(self.n)]
+
+    def rank(self, player: int, best: bool, budget: int = NODE_BUDGET) -> Tuple[int, int, bool]:
+        """
+        Returns (rank found, safe bound, exact).
+
+        rank found is reachable; with exact=False the search ran out of budget and the
+        true best (worst) rank may be better (worse), but never past the safe bound.
+        """
+        # The player's own matches are fixed to their best / worst finish
+        matches = []
+        pts = list(self.points)
+        wins = list(self.wins)
+        for seats, outcomes in self.pending:
+            if player in seats:
+                s = seats.index(player)
+                # One outcome by the player's own ordering (points, then 1st places), so
+                # the pair always exists even when points and wins don't go together
+                pick = max if best else min
+                chosen = pick(outcomes, key=lambda o: (o[0][s], o[1][s]))
+                target = chosen[0][s], chosen[1][s]
+                outcomes = [o for o in outcomes if (o[0][s], o[1][s]) == target]
+                pts[player] += target[0]
+                wins[player] += target[1]
+            matches.append((seats, outcomes))
+        target = self.score(player, pts[player], wins[player])
+        others = [i for i in range(self.n) if i != player]
+        slot = {i: k for k, i in enumerate(others)}
+
+        # Ahead = beats the target outright (best case) or at least ties it (worst case)
+        if best:
+            ahead = lambda i, p, w: self.score(i, p, w) > target
+        else:
+            ahead = lambda i, p, w: self.score(i, p, w) >= target
+
+        # Per match index: the least and the most each player can still add
+        depth = len(matches)
+        lo_pts = [[0] * self.n for _ in range(depth + 1)]
+        lo_wins = [[0] * self.n for _ in range(depth + 1)]
+        hi_pts = [[0] * self.n for _ in range(depth + 1)]
+        hi_wins = [[0] * self.n for _ in range(depth + 1)]
+        for mi in range(depth - 1, -1, -1):
+            seats, outcomes = matches[mi]
+            lo_pts[mi], lo_wins[mi] = list(lo_pts[mi + 1]), list(lo_wins[mi + 1])
+            hi_pts[mi], hi_wins[mi] = list(hi_pts[mi + 1]), list(hi_wins[mi + 1])
+            for s, i in enumerate(seats):
+                lo_pts[mi][i] += min(o[0][s] for o in outcomes)
+                lo_wins[mi][i] += min(o[1][s] for o in outcomes)
+                hi_pts[mi][i] += max(o[0][s] for o in outcomes)
+                hi_wins[mi][i] += max(o[1][s] for o in outcomes)
+
+        def bound(mi: int) -> int:
+            # Best case: players who end up ahead even with the least; worst: those who can with the most
+            rest_pts, rest_wins = (lo_pts[mi], lo_wins[mi]) if best else (hi_pts[mi], hi_wins[mi])
+            return sum(1 for i in others if ahead(i, pts[i] + rest_pts[i], wins[i] + rest_wins[i]))
+
+        root_bound = bound(0)
+        found = len(others) + 1 if best else -1
+        seen = set()
+        nodes = 0
+        exhausted = False
+
+        def dfs(mi: int) -> None:
+            nonlocal found, nodes, exhausted
+            nodes += 1
+            if nodes > budget:
+                exhausted = True
+                return
+            b = bound(mi)
+            if (best and b >= found) or (not best and b <= found) or found == root_bound:
+                # Bounds only tighten going down, so reaching the root bound ends the search
+                return
+            if mi == depth:
+                # bound(depth) is the exact count once nothing is left to play
+                found = b
+                return
+
+            # Players whose fate is already sealed don't matter from here on
+            undecided = []
+            for i in others:
+                if ahead(i, pts[i] + lo_pts[mi][i], wins[i] + lo_wins[mi][i]):
+                    undecided.append(True)
+                elif not ahead(i, pts[i] + hi_pts[mi][i], wins[i] + hi_wins[mi][i]):
+                    undecided.append(False)
+                else:
+                    undecided.append((pts[i], wins[i]))
+            key = (mi, tuple(undecided))
+            if key in seen:
+                return
+            seen.add(key)
+
+            seats, outcomes = matches[mi]
+            live = [s for s, i in enumerate(seats) if i != player and not isinstance(undecided[slot[i]], bool)]
+            options = {}
+            for o in outcomes:
+                options.setdefault(tuple((o[0][s], o[1][s]) for s in live), o)
+            # Try the outcomes that push the fewest (best case) / most (worst case) players ahead
+            # first; among those, leave the most room (best) / the least gap (worst) to the target
+            def order_key(o):
+                crossed, gaps = 0, []
+                for s, i in enumerate(seats):
+                    if i == player:
+                        continue
+                    if ahead(i, pts[i] + o[0][s], wins[i] + o[1][s]):
+                        crossed += 1
+                    else:
+                        gaps.append(target - self.score(i, pts[i] + o[0][s], wins[i] + o[1][s]))
+                if best:
+                    return crossed, -min(gaps, default=0)
+                return -crossed, sum(gaps)
+
+            ordered = sorted(options.values(), key=order_key)
+
+            for o in ordered:
+                for s, i in enumerate(seats):
+                    pts[i] += o[0][s]
+                    wins[i] += o[1][s]
+                dfs(mi + 1)
+                for s, i in enumerate(seats):
+                    pts[i] -= o[0][s]
+                    wins[i] -= o[1][s]
+                if exhausted:
+                    return
+
+        dfs(0)
+        if exhausted and ((best and found > len(others)) or (not best and found < 0)):
+            found = root_bound
+        return found + 1, root_bound + 1, not exhausted
+
+
+class ClinchCalculator:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def stage_status(self, stage_id: Any, group_id: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Exact qualification status per player: "clinched", "eliminated" or "alive",
+        with best / worst possible final rank and the points that guarantee a spot.
+
+        Based on the stage's advancement rules (determine_group_qualifiers) and its
+        pending matches. Wildcards are not counted: "eliminated" means no direct spot.
+        points_needed compares against each rival's own ceiling, so it is a guarantee
+        but can be more than strictly necessary (None: no total in reach guarantees it).
+        Cached per result version, like the qualification odds.
+        """
+        inp, version, names = await QualificationSimulator(self.session).build_input(stage_id, model="uniform")
+        key = f"{stage_id}:{version}:{group_id}"
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+
+        stage = await self.session.get(Stage, stage_id)
+        selected = [g for g, gid in enumerate(inp.group_ids) if group_id is None or gid == str(group_id)]
+        if group_id is not None and not selected:
+            raise ValueError("Group not found")
+
+        # Big groups can take a few seconds; keep the event loop free meanwhile
+        loop = asyncio.get_running_loop()
+        groups = await loop.run_in_executor(
+            None, lambda: [self.group_status(stage, inp, g, names) for g in selected]
+        )
+
+        result = {"stage_id": str(stage_id), "version": version, "groups": groups}
+        _cache.set(key, result)
+        return result
+
+    @staticmethod
+    def group_status(stage: Stage, inp: SimulationInput, g: int, names: Dict[str, str]) -> Dict[str, Any]:
+        members = [i for i in range(len(inp.player_ids)) if inp.group_of[i] == g]
+        local = {i: j for j, i in enumerate(members)}
+        pending = []
+        for participants, races, played, played_points, played_wins in inp.pending:
+            for row, row_points, row_wins in zip(participants, played_points, played_wins):
+                if int(inp.group_of[row[0]]) == g:
+                    seats = [local[int(i)] for i in row]
+                    if played:
+                        so_far = (tuple(int(p) for p in row_points), tuple(int(w) for w in row_wins), played)
+                        pending.append((seats, races, so_far))
+                    else:
+                        pending.append((seats, races))
+
+        search = GroupSearch(
+            points=[int(inp.points[i]) for i in members],
+            wins=[int(inp.wins[i]) for i in members],
+            matches=[int(inp.matches[i]) for i in members],
+            dominance_points=inp.dominance_points,
+            pending=pending,
+            table=tuple(int(p) for p in inp.points_table),
+            ace_bonus=inp.ace_bonus,
+        )
+
+        # Rank -> destination, from the advancement rules
+        size = len(members)
+        ranked = [{"player_id": r, "rank": r} for r in range(1, size + 1)]
+        destinations = {q["player_id"]: q["destination"] for q in ProgressionEngine.determine_group_qualifiers(stage, ranked)}
+        # Top ranks that all qualify: finishing inside them is what "points_needed" guarantees
+        cut = 0
+        while cut + 1 in destinations:
+            cut += 1
+
+        current = search.current_scores()
+        ceiling = search.max_scores()
+        players = []
+        for j, i in enumerate(members):
+            best_rank, best_bound, best_exact = search.rank(j, best=True)
+            worst_rank, worst_bound, worst_exact = search.rank(j, best=False)
+            possible = range(best_bound, worst_bound + 1) if not (best_exact and worst_exact) else range(best_rank, worst_rank + 1)
+
+            reachable = {destinations.get(r) for r in possible}
+            if None not in reachable:
+                status = "clinched"
+            elif reachable == {None}:
+                status = "eliminated"
+            else:
+                status = "alive"
+
+            points_needed = None
+            if status == "clinched":
+                points_needed = 0
+            elif status == "alive" and cut:
+                rivals = sorted((ceiling[k] for k in range(size) if k != j), reverse=True)
+                needed = rivals[cut - 1] + 1 if len(rivals) >= cut else 0
+                if needed <= ceiling[j]:
+                    points_needed = max(needed - current[j], 0)
+
+            pid = inp.player_ids[i]
+            players.append({
+                "player_id": pid,
+                "player_name": names.get(pid, "Unknown"),
+                "points": current[j],
+                "max_points": ceiling[j],
+                "best_rank": best_rank,
+                "worst_rank": worst_rank,
+                "exact": best_exact and worst_exact,
+                "status": status,
+                "destination": reachable.pop() if status == "clinched" and len(reachable) == 1 else None,
+                "points_needed": points_needed,
+            })
+        players.sort(key=lambda p: (p["best_rank"], p["worst_rank"], -p["points"]))
+
+        return {
+            "group_id": inp.group_ids[g],
+            "group_name": inp.group_names[g],
+            "pending_matches": len(pending),
+            "players": players,
+        }
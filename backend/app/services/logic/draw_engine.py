@@ -4,9 +4,11 @@ from uuid import UUID
 from collections import defaultdict
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.models.tournament import Stage, Player, Tournament, StageType, Group, Match, Race, RaceResult
+from app.models.tournament import Stage, Player, Tournament, StageType, Group, GroupParticipant, Match, Race, RaceResult
 from app.services.logic.progression import ProgressionEngine
 from app.services.logic.scoring import ScoringEngine
+from app.services.logic.rules import load_stage_rules
+from app.services.logic.tiebreak import TieBreakEngine
 
 class DrawEngine:
     def __init__(self, session: AsyncSession):
@@ -43,7 +45,11 @@ class DrawEngine:
             if prev_stage:
                 # 1. Fetch Promoted Players from Stage 1 (or previous)
                 promoted_ids = set()
+                non_qualifiers = []
                 
+                # Scoring rules of the previous stage, compiled once for all its groups
+                prev_rules = await load_stage_rules(self.session, prev_stage)
+
                 # Get all groups from previous stage
                 stmt_groups = select(Group).where(Group.stage_id == prev_stage.id)
                 groups = (await self.session.exec(stmt_groups)).all()
@@ -64,25 +70,33 @@ class DrawEngine:
                     for rr, match in results:
                         results_by_match[match.id].append(rr)
                         
-                    group_stats = defaultdict(lambda: {"points": 0, "wins": 0, "player_id": None})
+                    group_stats = defaultdict(lambda: {"points": 0, "wins": 0, "matches": 0, "player_id": None})
                     
                     for match_id, race_results in results_by_match.items():
                         # We use previous stage's rules for scoring
-                        match_scores = ScoringEngine.calculate_match_score(race_results, prev_stage.rules_config)
+                        match_scores = ScoringEngine.calculate_match_score(race_results, prev_rules)
                         for score in match_scores:
                             pid = str(score["player_id"])
                             group_stats[pid]["player_id"] = pid
                             group_stats[pid]["points"] += score["total_points"]
                             group_stats[pid]["wins"] += score["wins"]
+                            group_stats[pid]["matches"] += 1
+
+                    # Dominance Bonus (bonus_rules) counts towards qualification too
+                    bonuses = ProgressionEngine.calculate_dominance_bonuses(
+                        prev_stage,
+                        [rr for rr, _ in results],
+                        {pid: stats["matches"] for pid, stats in group_stats.items()},
+                    )
+                    for pid, bonus in bonuses.items():
+                        if pid in group_stats:
+                            group_stats[pid]["points"] += bonus
 
                     # Convert to list and sort
-                    standings = list(group_stats.values())
-                    # Sort by Points desc, then Wins desc
-                    standings.sort(key=lambda x: (x["points"], x["wins"]), reverse=True)
-                    
-                    # Add Rank
-                    for i, entry in enumerate(standings):
-                        entry["rank"] = i + 1
+                    # Points desc, then the stage's tie-breakers (adds Rank)
+                    standings = TieBreakEngine.sort_standings(
+                        list(group_stats.values()), (rr for rr, _ in results), prev_stage.rules_config
+                    )
                     
                     # Determine Qualifiers using ProgressionEngine
                     # Passing prev_stage because the advancement rules are usually defined THERE 
@@ -94,6 +108,13 @@ class DrawEngine:
                     for q in qualifiers:
                         promoted_ids.add(q["player_id"])
 
+                    qualified = {q["player_id"] for q in qualifiers}
+                    non_qualifiers.extend(s for s in standings if s["player_id"] not in qualified)
+
+                # Wildcards: best non-qualifiers across all groups (prev_stage.wildcard_rules)
+                for w in ProgressionEngine.select_wildcards(prev_stage, non_qualifiers):
+                    promoted_ids.add(w["player_id"])
+
                 if promoted_ids:
                     stmt_promoted = select(Player).where(Player.id.in_(list(promoted_ids)))
                     promoted_players = list((await self.session.exec(stmt_promoted)).all())
@@ -114,57 +135,144 @@ class DrawEngine:
                 
             return list(final_map.values())
 
-    def perform_draw(self, players: List[Player], num_groups: int = 14) -> Dict[str, List[Dict[str, Any]]]:
+    async def get_previous_group_map(self, stage_id: UUID) -> Dict[str, str]:
+        """
+        Maps player id -> group id in the previous stage (same tournament).
+        Players sharing a value were group-mates there; the draw tries to split them up.
+        """
+        stage = await self.session.get(Stage, stage_id)
+        if not stage or stage.sequence_order <= 1:
+            return {}
+
+        stmt = (
+            select(GroupParticipant.player_id, GroupParticipant.group_id)
+            .join(Group, GroupParticipant.group_id == Group.id)
+            .join(Stage, Group.stage_id == Stage.id)
+            .where(
+                Stage.tournament_id == stage.tournament_id,
+                Stage.sequence_order == stage.sequence_order - 1,
+            )
+        )
+        rows = (await self.session.exec(stmt)).all()
+        return {str(player_id): str(group_id) for player_id, group_id in rows}
+
+    @staticmethod
+    def group_name(index: int) -> str:
+        """Group A ... Group Z, then Group AA, Group AB, ... (spreadsheet style)."""
+        letters = ""
+        index += 1
+        while index:
+            index, rem = divmod(index - 1, 26)
+            letters = chr(65 + rem) + letters
+        return f"Group {letters}"
+
+    def perform_draw(
+        self,
+        players: List[Player],
+        num_groups: int = 14,
+        seed: Optional[int] = None,
+        previous_groups: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Performs the pot-based draw.
         Returns a dictionary: { "Group A": [Player1, ...], "Group B": ... }
+
+        Constraints:
+        - Pot A (seed_level 1) is spread evenly, at most one seed more per group than any other
+          (seeds are listed first in each group)
+        - group sizes differ by at most one
+        - players who shared a group in `previous_groups` (player id -> previous group id)
+          are split up as far as possible (fewest repeated pairs)
+
+        The same `seed` with the same players always gives the same draw.
         """
+        if num_groups < 1:
+            raise ValueError("num_groups must be at least 1")
+
+        rng = random.Random(seed)
+        prev = previous_groups or {}
+
+        # Sort first so the result doesn't depend on the order the DB returned players in
+        ordered = sorted(players, key=lambda p: str(p.id))
+        rng.shuffle(ordered)
+
         # 1. Separate into Pots
-        pot_a = [p for p in players if p.seed_level == 1]
-        pot_b = [p for p in players if p.seed_level != 1] # Includes seed_level 0 and potentially others if logic permits
-
-        # 2. Initialize Groups
-        # Naming: Group A, Group B, ...
-        group_names = [f"Group {chr(65+i)}" for i in range(num_groups)]
-        groups: Dict[str, List[Player]] = {name: [] for name in group_names}
-
-        # 3. Distribute Pot A (Seeds)
-        # Shuffle Pot A to ensure random assignment of seeds to groups
-        random.shuffle(pot_a)
-
-        # Assign one seed per group as far as possible
-        for i, group_name in enumerate(group_names):
-            if i < len(pot_a):
-                groups[group_name].append(pot_a[i])
-            else:
-                # If we run out of seeds, we just continue.
-                # (User said "14 Audition Seeds matching 14 Groups", so should be exact)
-                pass
-
-        # Note: If there are MORE seeds than groups, the extras should probably go back to Pot B or overflow?
-        # User said: "Overflow Pot logic is still good to keep for robustness... Pot B will just contain normal players".
-        # If Pot A has leftovers, add them to Pot B?
-        if len(pot_a) > len(group_names):
-            leftovers = pot_a[len(group_names):]
-            pot_b.extend(leftovers)
-
-        # 4. Distribute Pot B
-        random.shuffle(pot_b)
-
-        # Snake draft or simple fill? User said "Randomly fill the remaining slots".
-        # We'll just distribute evenly.
-        group_keys = list(groups.keys())
-        current_group_idx = 0
-
-        for player in pot_b:
-            groups[group_keys[current_group_idx]].append(player)
-            current_group_idx = (current_group_idx + 1) % len(group_keys)
-
-        # 5. Format Output
+        pot_a = [p for p in ordered if p.seed_level == 1]
+        pot_b = [p for p in ordered if p.seed_level != 1] # Includes seed_level 0 and potentially others if logic permits
+
+        # 2. Group capacities: the first (n % g) groups take one extra player.
+        #    Seeds are dealt in the same group order, so a group with an extra seed always
+        #    has an extra slot too.
+        base, extra = divmod(len(ordered), num_groups)
+        capacity = [base + (1 if i < extra else 0) for i in range(num_groups)]
+        members: List[List[Player]] = [[] for _ in range(num_groups)]
+        # counts[g][prev_group] = players from that previous group already in g
+        counts: List[Dict[str, int]] = [defaultdict(int) for _ in range(num_groups)]
+        # where[prev_group] = groups holding at least one player from it
+        where: Dict[str, set] = defaultdict(set)
+
+        def key_of(p: Player) -> Optional[str]:
+            return prev.get(str(p.id))
+
+        def place(p: Player, g: int):
+            members[g].append(p)
+            k = key_of(p)
+            if k is not None:
+                counts[g][k] += 1
+                where[k].add(g)
+
+        def pick(p: Player, open_groups: List[int]) -> int:
+            """Open group adding the fewest repeated pairs for `p`, random among equals."""
+            k = key_of(p)
+            taken = where.get(k, ()) if k is not None else ()
+            if len(taken) < len(open_groups):
+                # Usually most groups are conflict-free: a few random probes find one
+                # without scanning every group (this keeps big draws fast)
+                for _ in range(8):
+                    g = open_groups[rng.randrange(len(open_groups))]
+                    if g not in taken:
+                        return g
+                free = [g for g in open_groups if g not in taken]
+                if free:
+                    return free[rng.randrange(len(free))]
+            best = min(counts[g][k] for g in open_groups)
+            tied = [g for g in open_groups if counts[g][k] == best]
+            return tied[rng.randrange(len(tied))]
+
+        # 3. Distribute Pot A (Seeds): dealt in rounds, one seed per group per round
+        for start in range(0, len(pot_a), num_groups):
+            round_groups = list(range(min(num_groups, len(pot_a) - start)))
+            for p in pot_a[start:start + num_groups]:
+                g = pick(p, round_groups)
+                round_groups.remove(g)
+                place(p, g)
+
+        # 4. Distribute Pot B into the remaining slots.
+        #    Players from the largest previous groups are hardest to spread, so they go first.
+        key_sizes = defaultdict(int)
+        for p in pot_b:
+            k = key_of(p)
+            if k is not None:
+                key_sizes[k] += 1
+        pot_b.sort(key=lambda p: -key_sizes.get(key_of(p), 0))
+
+        open_groups = [g for g in range(num_groups) if len(members[g]) < capacity[g]]
+        for p in pot_b:
+            g = pick(p, open_groups)
+            place(p, g)
+            if len(members[g]) >= capacity[g]:
+                open_groups.remove(g)
+
+        # 5. Repair: swap players of the same pot between groups while that removes repeats
+        if prev:
+            self._reduce_conflicts(members, counts, key_of, rng)
+
+        # 6. Format Output
         # Convert Players to dicts for JSON response
         result = {}
-        for g_name, g_players in groups.items():
-            result[g_name] = [
+        for i, g_players in enumerate(members):
+            g_players.sort(key=lambda p: p.seed_level != 1)  # seeds first
+            result[self.group_name(i)] = [
                 {
                     "id": str(p.id),
                     "in_game_name": p.in_game_name,
@@ -174,3 +282,49 @@ class DrawEngine:
             ]
 
         return result
+
+    @staticmethod
+    def _reduce_conflicts(members, counts, key_of, rng, max_passes: int = 3):
+        """
+        Local search after the greedy fill. A player repeating a previous group-mate is
+        swapped with a player of the same pot elsewhere when the swap lowers the number
+        of repeated pairs. Same-pot swaps keep seed spread and group sizes intact.
+        """
+        num_groups = len(members)
+        for _ in range(max_passes):
+            improved = False
+            for g in range(num_groups):
+                for i, p in enumerate(members[g]):
+                    kp = key_of(p)
+                    if kp is None or counts[g][kp] < 2:
+                        continue
+                    p_seed = p.seed_level == 1
+                    order = list(range(num_groups))
+                    rng.shuffle(order)
+                    swapped = False
+                    for h in order:
+                        if h == g or counts[h][kp] >= counts[g][kp] - 1:
+                            continue
+                        for j, q in enumerate(members[h]):
+                            if (q.seed_level == 1) != p_seed:
+                                continue
+                            kq = key_of(q)
+                            if kq == kp:
+                                continue
+                            # pairs gained minus pairs lost
+                            delta = counts[h][kp] - (counts[g][kp] - 1)
+                            if kq is not None:
+                                delta += counts[g][kq] - (counts[h][kq] - 1)
+                            if delta < 0:
+                                members[g][i], members[h][j] = q, p
+                                counts[g][kp] -= 1
+                                counts[h][kp] += 1
+                                if kq is not None:
+                                    counts[h][kq] -= 1
+                                    counts[g][kq] += 1
+                                swapped = improved = True
+                                break
+                        if swapped:
+                            break
+            if not improved:
+                break
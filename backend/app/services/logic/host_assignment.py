@@ -0,0 +1,153 @@
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+from collections import Counter, deque
+
+class HostAssignmentEngine:
+    @staticmethod
+    def assign(
+        matches: Sequence[Sequence[Hashable]],
+        max_per_player: Optional[int] = None,
+        prior_counts: Optional[Dict[Hashable, int]] = None,
+    ) -> List[Hashable]:
+        """
+        Chooses one host per match, solving the whole stage at once.
+
+        Args:
+            matches: participant ids per match (the host must be one of them).
+            max_per_player: optional cap on hosts per player within these matches.
+            prior_counts: hosts already done (e.g. earlier stages); balanced against too.
+
+        Returns:
+            host id per match, same order as `matches`.
+
+        This is an optimal semi-matching: start from a greedy assignment, then flip
+        "cost-reducing paths" (host chain u -> ... -> v where v has at least 2 fewer
+        total hosts than u) until none remain. With no such path left, the total
+        host counts are as even as the match memberships allow (sum of squares minimal).
+        Each BFS is O(matches * players_per_match), so 1000+ matches take milliseconds.
+        """
+        prior = prior_counts or {}
+        load: Dict[Hashable, int] = {}   # prior + hosted here
+        hosted: Dict[Hashable, int] = {}  # hosted here (capped by max_per_player)
+        for members in matches:
+            for p in members:
+                load.setdefault(p, prior.get(p, 0))
+                hosted.setdefault(p, 0)
+
+        def can_take(p: Hashable) -> bool:
+            return max_per_player is None or hosted[p] < max_per_player
+
+        hosts: List[Optional[Hashable]] = [None] * len(matches)
+        hosted_by: Dict[Hashable, List[int]] = {p: [] for p in load}
+
+        def give(idx: int, p: Hashable):
+            old = hosts[idx]
+            if old is not None:
+                load[old] -= 1
+                hosted[old] -= 1
+                hosted_by[old].remove(idx)
+            hosts[idx] = p
+            load[p] += 1
+            hosted[p] += 1
+            hosted_by[p].append(idx)
+
+        # 1. Greedy: least-loaded eligible participant (stable on input order for determinism)
+        unplaced = []
+        for idx, members in enumerate(matches):
+            if not members:
+                raise ValueError(f"Match {idx} has no participants")
+            eligible = [p for p in members if can_take(p)]
+            if eligible:
+                give(idx, min(eligible, key=lambda p: load[p]))
+            else:
+                unplaced.append(idx)
+
+        # 2. Repair matches whose participants were all at the cap: move one of their
+        #    hosted matches along an alternating path to someone with spare capacity.
+        for idx in unplaced:
+            path = HostAssignmentEngine._find_path(
+                matches, hosts, hosted_by, list(matches[idx]), lambda p, _: can_take(p)
+            )
+            if path is None:
+                raise ValueError(f"Cannot assign hosts with max {max_per_player} per player")
+            start, moves = path
+            for m_idx, new_host in moves:
+                give(m_idx, new_host)
+            give(idx, start)
+
+        # 3. Balance: flip cost-reducing paths, highest loads first.
+        #    Players reached by a failed search (with load <= the searcher's) cannot start
+        #    a cost-reducing path either, so they are skipped until the next flip.
+        improved = True
+        while improved:
+            improved = False
+            dead: set = set()
+            for u in sorted(load, key=lambda p: load[p], reverse=True):
+                while hosted_by[u] and u not in dead:
+                    target_load = load[u] - 2
+                    visited: set = set()
+                    path = HostAssignmentEngine._find_path(
+                        matches, hosts, hosted_by, [u],
+                        lambda p, _: load[p] <= target_load and can_take(p),
+                        skip=dead, visited=visited,
+                    )
+                    if path is None:
+                        dead.update(p for p in visited if load[p] <= load[u])
+                        break
+                    _, moves = path
+                    for m_idx, new_host in moves:
+                        give(m_idx, new_host)
+                    dead.clear()
+                    improved = True
+
+        return hosts  # type: ignore[return-value]
+
+    @staticmethod
+    def _find_path(matches, hosts, hosted_by, sources, accept, skip=frozenset(), visited=None):
+        """
+        BFS over "p hosts match m, m also contains q" edges starting from `sources`.
+        Returns (source, [(match_idx, new_host), ...]) ending at the first player
+        satisfying `accept`, or None. Applying the moves shifts one host slot
+        from the source to that player.
+        """
+        parent: Dict[Hashable, Any] = {s: None for s in sources}
+        queue = deque(sources)
+        while queue:
+            p = queue.popleft()
+            if visited is not None:
+                visited.add(p)
+            if p in skip and parent[p] is not None:
+                continue
+            for m_idx in hosted_by[p]:
+                for q in matches[m_idx]:
+                    if q in parent:
+                        continue
+                    parent[q] = (p, m_idx)
+                    if accept(q, m_idx):
+                        moves = []
+                        node = q
+                        while parent[node] is not None:
+                            prev, via = parent[node]
+                            moves.append((via, node))
+                            node = prev
+                        return node, moves
+                    queue.append(q)
+        return None
+
+    @staticmethod
+    def summarize(hosts: Sequence[Hashable], participants: Optional[Sequence[Hashable]] = None) -> Dict[str, Any]:
+        """
+        Host distribution report: counts per player plus min/max/histogram.
+        Pass `participants` to include players that host nothing.
+        """
+        counts = Counter(str(h) for h in hosts if h is not None)
+        for p in participants or []:
+            counts.setdefault(str(p), 0)
+        values = list(counts.values())
+        return {
+            "matches": len(hosts),
+            "players": len(counts),
+            "min": min(values) if values else 0,
+            "max": max(values) if values else 0,
+            "histogram": {str(k): v for k, v in sorted(Counter(values).items())},
+            "per_player": dict(counts),
+        }
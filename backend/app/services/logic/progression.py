@@ -1,6 +1,8 @@
 from typing import List, Dict, Any
 from app.models import Match, Stage
 import math
+import heapq
+from collections import defaultdict
 
 class ProgressionEngine:
     @staticmethod
@@ -8,41 +10,60 @@ class ProgressionEngine:
         """
         Calculates Dominance Bonus based on Stage rules.
         Rule: If 1st_count > floor(total_rounds / 2), bonus = (count - floor) * 2
+        Single-player wrapper around calculate_dominance_bonuses.
+        """
+        bonuses = ProgressionEngine.calculate_dominance_bonuses(
+            stage, all_race_results, {str(player_id): len(player_matches)}
+        )
+        return bonuses.get(str(player_id), 0)
+
+    @staticmethod
+    def calculate_dominance_bonuses(stage: Stage, race_results: List[Any], matches_played: Dict[str, int]) -> Dict[str, int]:
+        """
+        Dominance Bonus for every player at once (one pass over the results).
+
+        Args:
+            race_results: all RaceResults of the stage (or group).
+            matches_played: player id (str) -> matches played ("total rounds" of the rule).
+
+        Returns:
+            player id (str) -> bonus points, only for players who earned one.
+
+        Rule (rules_config["bonus_rules"] entry {"type": "dominance_bonus"}):
+        1st places > floor(matches / 2) -> every extra 1st place is worth `points` (default 2).
+        A 1st place is the top score of a race (9 points with the default map).
         """
         rules = stage.rules_config or {}
         bonus_rules = rules.get("bonus_rules", [])
 
         # Check if dominance bonus is enabled
-        dominance_rule = next((r for r in bonus_rules if r["type"] == "dominance_bonus"), None)
+        dominance_rule = next((r for r in bonus_rules if r.get("type") == "dominance_bonus"), None)
         if not dominance_rule:
-            return 0
-
-        # 1. Count 1st places for this player in this stage
-        # We need race results where effective rank (or points == 9) was 1st.
-        # This implies we need to know the 'effective rank' from the scoring phase.
-        # Assuming points_awarded == 9 means 1st place.
-
-        first_place_count = 0
-        for res in all_race_results:
-            if str(res.player_id) == str(player_id) and res.points_awarded == 9:
-                first_place_count += 1
+            return {}
+        points_per_extra = dominance_rule.get("points", 2)
 
-        # 2. Determine Total Rounds
-        # "Total Rounds" usually means number of matches played by the player?
-        # Or total rounds in the stage definition?
-        # The example said "In a 3-round stage (Total=3)...".
-        # This usually implies the number of Matches the player participated in.
-        total_rounds = len(player_matches)
+        # 1. Top score per race, then 1st places per player (two linear sweeps)
+        top_points = {}
+        for res in race_results:
+            if res.points_awarded > top_points.get(res.race_id, 0):
+                top_points[res.race_id] = res.points_awarded
 
-        if total_rounds == 0:
-            return 0
+        first_place_count = defaultdict(int)
+        for res in race_results:
+            if res.points_awarded > 0 and res.points_awarded == top_points.get(res.race_id):
+                first_place_count[str(res.player_id)] += 1
 
-        threshold = math.floor(total_rounds / 2)
+        # 2. Compare against half the matches each player played
+        bonuses = {}
+        for pid, count in first_place_count.items():
+            total_rounds = matches_played.get(pid, 0)
+            if total_rounds == 0:
+                continue
+            threshold = math.floor(total_rounds / 2)
+            if count > threshold:
+                bonuses[pid] = (count - threshold) * points_per_extra
 
-        if first_place_count > threshold:
-            return (first_place_count - threshold) * 2
-
-        return 0
+        return bonuses
 
     @staticmethod
     def determine_group_qualifiers(stage: Stage, group_standings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -90,3 +111,47 @@ class ProgressionEngine:
                     })
         
         return qualifiers
+
+    @staticmethod
+    def select_wildcards(stage: Stage, non_qualifiers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Picks wildcards from the players who did not qualify, across all groups.
+
+        Args:
+            stage: stage whose wildcard_rules apply,
+                   e.g. {"wildcard_count": 12, "strategy": "global_best_losers"}.
+            non_qualifiers: standings entries from every group
+                            [{"player_id", "points", "wins", "matches", "rank"}, ...].
+
+        Returns:
+            List of dicts: [{"player_id": ..., "destination": "wildcard"}, ...], best first.
+
+        Groups of different sizes play different numbers of matches, so entries are
+        compared on points per match played ("normalize": "raw" compares raw points),
+        then wins per match, then group rank. heapq.nlargest keeps this O(n log k)
+        for audition stages with thousands of players.
+        """
+        rules = stage.wildcard_rules or {}
+        count = rules.get("wildcard_count", 0)
+        if count <= 0 or not non_qualifiers:
+            return []
+
+        strategy = rules.get("strategy", "global_best_losers")
+        if strategy != "global_best_losers":
+            raise ValueError(f"Unknown wildcard strategy: {strategy}")
+
+        normalize = rules.get("normalize", "per_match")
+        if normalize not in ("per_match", "raw"):
+            raise ValueError(f"Unknown wildcard normalization: {normalize}")
+
+        def score(entry):
+            matches = entry.get("matches") or 0
+            if normalize == "raw" or not matches:
+                points, wins = entry["points"], entry["wins"]
+            else:
+                points, wins = entry["points"] / matches, entry["wins"] / matches
+            return (points, wins, -entry.get("rank", 0))
+
+        best = heapq.nlargest(count, non_qualifiers, key=score)
+        return [{"player_id": e["player_id"], "destination": "wildcard"} for e in best]
+
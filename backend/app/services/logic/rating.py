@@ -0,0 +1,55 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_RATING = 1500.0
+# Rating points at stake per race; split over the pairwise games so a 3-player
+# race moves ratings about as much as one head-to-head game
+K_FACTOR = 32.0
+
+
+class EloEngine:
+    """
+    Multiplayer Elo: a race of n players counts as the n*(n-1)/2 head-to-head games
+    its finishing order implies, each worth K / (n - 1).
+    """
+
+    @staticmethod
+    def race_deltas(ratings: Sequence[float], k: float = K_FACTOR) -> List[float]:
+        """Rating change per player; `ratings` in finishing order (winner first). Zero-sum."""
+        n = len(ratings)
+        deltas = [0.0] * n
+        if n < 2:
+            return deltas
+        scale = k / (n - 1)
+        for i in range(n):
+            ri = ratings[i]
+            for j in range(i + 1, n):
+                # i beat j: actual 1, expected 1 / (1 + 10^((Rj - Ri) / 400))
+                change = scale * (1.0 - 1.0 / (1.0 + 10.0 ** ((ratings[j] - ri) / 400.0)))
+                deltas[i] += change
+                deltas[j] -= change
+        return deltas
+
+    @staticmethod
+    def replay(
+        races: Iterable[Tuple[Any, Sequence[Any]]],
+        ratings: Optional[Dict[Any, float]] = None,
+        k: float = K_FACTOR,
+    ) -> Tuple[Dict[Any, float], Dict[Any, int], List[Tuple[Any, Any, float, float]]]:
+        """
+        Rates `races` in order: (race id, player ids in finishing order) each.
+
+        Returns (rating per player, races per player, history) where history holds
+        (player id, race id, rating before, rating after) per player per race.
+        """
+        ratings = dict(ratings or {})
+        counts: Dict[Any, int] = {}
+        history: List[Tuple[Any, Any, float, float]] = []
+        get = ratings.get
+        for race_id, order in races:
+            before = [get(pid, DEFAULT_RATING) for pid in order]
+            for pid, old, delta in zip(order, before, EloEngine.race_deltas(before, k)):
+                new = old + delta
+                ratings[pid] = new
+                counts[pid] = counts.get(pid, 0) + 1
+                history.append((pid, race_id, old, new))
+        return ratings, counts, history
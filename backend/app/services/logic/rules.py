@@ -0,0 +1,106 @@
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass
+import hashlib
+import orjson
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.cache import get_cache
+from app.models.tournament import Stage, Tournament
+
+# Points for effective ranks 1..5 when neither the stage nor the tournament sets a points_map
+DEFAULT_POINTS = (9, 5, 3, 2, 1)
+
+NPC_MODES = ("skip", "rank")
+
+_cache = get_cache("scoring_rules", max_entries=256)
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """
+    Scoring rules of a stage, validated and compiled once.
+
+    points[i] is the score for effective rank i + 1 (ranks past the table score 0); it
+    never goes up as the rank gets worse.
+    npc_mode "rank" (default): NPCs are ranked and scored like everyone else;
+    "skip": NPCs score 0 and don't take a rank, the players behind them move up.
+    """
+    points: Tuple[int, ...] = DEFAULT_POINTS
+    ace_bonus: int = 0
+    npc_mode: str = "rank"
+
+    def points_for(self, effective_rank: int) -> int:
+        if 0 < effective_rank <= len(self.points):
+            return self.points[effective_rank - 1]
+        return 0
+
+    @staticmethod
+    def compile(stage_rules: Optional[Dict[str, Any]] = None, tournament_rules: Optional[Dict[str, Any]] = None) -> "ScoringRules":
+        """
+        Builds the rules from Stage.rules_config, falling back to Tournament.rules_config
+        for points_map / npc_scoring. Cached by a hash of the settings that matter, so an
+        edited config compiles again and an unchanged one never does.
+
+        Raises ValueError on a malformed config.
+        """
+        stage_rules = stage_rules or {}
+        tournament_rules = tournament_rules or {}
+        settings = {
+            "points_map": stage_rules.get("points_map", tournament_rules.get("points_map")),
+            "ace_bonus_points": stage_rules.get("ace_bonus_points", 0),
+            "npc_scoring": stage_rules.get("npc_scoring", tournament_rules.get("npc_scoring", "rank")),
+        }
+        key = hashlib.sha1(
+            orjson.dumps(settings, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        ).hexdigest()
+
+        rules = _cache.get(key)
+        if rules is None:
+            rules = ScoringRules._build(settings)
+            _cache.set(key, rules)
+        return rules
+
+    @staticmethod
+    def _build(settings: Dict[str, Any]) -> "ScoringRules":
+        points = DEFAULT_POINTS
+        points_map = settings["points_map"]
+        if points_map is not None:
+            # {"1": 9, "2": 5, ...} (JSON keys are strings) or [9, 5, ...]
+            if isinstance(points_map, (list, tuple)):
+                points_map = {i + 1: v for i, v in enumerate(points_map)}
+            if not isinstance(points_map, dict):
+                raise ValueError("points_map must be a mapping of rank -> points")
+            table: Dict[int, int] = {}
+            for rank, value in points_map.items():
+                try:
+                    rank = int(rank)
+                except (TypeError, ValueError):
+                    raise ValueError(f"points_map rank must be a number, got {rank!r}")
+                if rank < 1:
+                    raise ValueError(f"points_map rank must be 1 or more, got {rank}")
+                if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                    raise ValueError(f"points_map points must be a non-negative integer, got {value!r}")
+                table[rank] = value
+            points = tuple(table.get(r, 0) for r in range(1, max(table, default=0) + 1))
+            # A better finish never scores less (standings, clinch and odds rely on it)
+            for rank in range(1, len(points)):
+                if points[rank] > points[rank - 1]:
+                    raise ValueError(
+                        f"points_map must not increase with rank, got {points[rank]} for rank {rank + 1} "
+                        f"after {points[rank - 1]} for rank {rank}"
+                    )
+
+        ace_bonus = settings["ace_bonus_points"]
+        if not isinstance(ace_bonus, int) or isinstance(ace_bonus, bool) or ace_bonus < 0:
+            raise ValueError(f"ace_bonus_points must be a non-negative integer, got {ace_bonus!r}")
+
+        npc_mode = settings["npc_scoring"]
+        if npc_mode not in NPC_MODES:
+            raise ValueError(f"npc_scoring must be one of {NPC_MODES}, got {npc_mode!r}")
+
+        return ScoringRules(points=points, ace_bonus=ace_bonus, npc_mode=npc_mode)
+
+
+async def load_stage_rules(session: AsyncSession, stage: Stage) -> ScoringRules:
+    """Compiled rules for `stage` (its tournament supplies the fallback points_map)."""
+    tournament = await session.get(Tournament, stage.tournament_id) if stage.tournament_id else None
+    return ScoringRules.compile(stage.rules_config, tournament.rules_config if tournament else None)
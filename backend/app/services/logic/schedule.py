@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import combinations
+import math
+import random
+
+Design = Tuple[Tuple[int, ...], ...]
+
+class ScheduleEngine:
+    @staticmethod
+    def generate(num_players: int, players_per_match: int = 3, matches_per_player: Optional[int] = None) -> Design:
+        """
+        Builds a balanced multi-player round-robin for a group.
+
+        Returns a tuple of matches, each a sorted tuple of player indices (0..num_players-1).
+        - Every player appears `matches_per_player` times (when num_players * matches_per_player
+          is not divisible by players_per_match, appearance counts differ by at most 1).
+        - The variance of how often each pair meets is minimized (sum of squared pair counts),
+          so for 6 players / 3 per match / 5 matches each it yields a BIBD: every pair meets exactly twice.
+
+        Defaults to matches_per_player = num_players - 1 (classic round-robin length).
+        Designs only depend on (n, k, matches_per_player), so they are memoized and stage
+        generation never recomputes them.
+        """
+        if players_per_match < 2:
+            raise ValueError("players_per_match must be at least 2")
+        if matches_per_player is None:
+            matches_per_player = num_players - 1 if num_players > players_per_match else 1
+        return _build_design(num_players, players_per_match, matches_per_player)
+
+    @staticmethod
+    def pair_counts(design: Design) -> Dict[Tuple[int, int], int]:
+        counts: Dict[Tuple[int, int], int] = {}
+        for match in design:
+            for pair in combinations(sorted(match), 2):
+                counts[pair] = counts.get(pair, 0) + 1
+        return counts
+
+
+def _pair_index(n: int) -> List[List[int]]:
+    return [[0] * n for _ in range(n)]
+
+
+@lru_cache(maxsize=256)
+def _build_design(n: int, k: int, matches_per_player: int) -> Design:
+    if n < 2 or matches_per_player < 1:
+        return ()
+
+    # Small groups: everyone plays together
+    if n <= k:
+        return tuple(tuple(range(n)) for _ in range(matches_per_player))
+
+    num_matches = math.ceil(n * matches_per_player / k)
+    # Seeded per design so results are reproducible (and identical across workers)
+    rng = random.Random(n * 1_000_003 + k * 1_009 + matches_per_player)
+
+    # Best achievable objective: pair meetings spread as evenly as possible (floor/ceil of the mean)
+    total_pairs = n * (n - 1) // 2
+    slots = num_matches * k * (k - 1) // 2
+    q, r = divmod(slots, total_pairs)
+    lower_bound = (total_pairs - r) * q * q + r * (q + 1) * (q + 1)
+
+    matches, pairs = _greedy(n, k, num_matches, matches_per_player)
+    best = [list(m) for m in matches]
+    best_cost = cost = _cost(pairs)
+
+    # Simulated annealing over player swaps between two matches. A swap never changes
+    # anyone's appearance count, so the balance from the greedy phase is preserved.
+    budget = min(200_000, 400 * num_matches)
+    temperature = 2.0
+    for step in range(budget):
+        if best_cost <= lower_bound:
+            break
+        i, j = rng.randrange(num_matches), rng.randrange(num_matches)
+        if i == j:
+            continue
+        a, b = matches[i], matches[j]
+        p, q_ = rng.choice(a), rng.choice(b)
+        if p in b or q_ in a:
+            continue
+        delta = _swap_delta(pairs, a, b, p, q_)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            _apply_swap(pairs, a, b, p, q_)
+            cost += delta
+            if cost < best_cost:
+                best_cost = cost
+                best = [list(m) for m in matches]
+        temperature = max(0.05, temperature * 0.9995)
+
+    return tuple(sorted(tuple(sorted(m)) for m in best))
+
+
+def _greedy(n: int, k: int, num_matches: int, matches_per_player: int):
+    """Seeds the search: most-needed player first, then partners with the fewest prior meetings."""
+    appearances = [0] * n
+    pairs = _pair_index(n)
+    matches: List[List[int]] = []
+    # Players may exceed matches_per_player by one only when the slot count forces it
+    cap = matches_per_player + (1 if (n * matches_per_player) % k else 0)
+
+    for m in range(num_matches):
+        # Rotate the tie-break start so the same low indices are not always favored
+        order = sorted(range(n), key=lambda p: (appearances[p], (p - m) % n))
+        chosen = [order[0]]
+        while len(chosen) < k:
+            candidates = [p for p in order if p not in chosen and appearances[p] < cap] or \
+                         [p for p in order if p not in chosen]
+            best = min(
+                candidates,
+                key=lambda p: (sum(pairs[p][c] for c in chosen), appearances[p], (p - m) % n),
+            )
+            chosen.append(best)
+        for p in chosen:
+            appearances[p] += 1
+        for a, b in combinations(chosen, 2):
+            pairs[a][b] += 1
+            pairs[b][a] += 1
+        matches.append(chosen)
+
+    return matches, pairs
+
+
+def _cost(pairs: List[List[int]]) -> int:
+    n = len(pairs)
+    return sum(pairs[a][b] ** 2 for a in range(n) for b in range(a + 1, n))
+
+
+def _swap_delta(pairs: List[List[int]], match_a: List[int], match_b: List[int], p: int, q: int) -> int:
+    """Change in sum of squared pair counts if p (in A) and q (in B) trade places."""
+    # Players sitting in both matches keep meeting p and q exactly as often; skip them
+    delta = 0
+    for x in match_a:
+        if x != p and x not in match_b:
+            delta += 2 * (pairs[q][x] - pairs[p][x]) + 2
+    for y in match_b:
+        if y != q and y not in match_a:
+            delta += 2 * (pairs[p][y] - pairs[q][y]) + 2
+    return delta
+
+
+def _apply_swap(pairs: List[List[int]], match_a: List[int], match_b: List[int], p: int, q: int):
+    for x in match_a:
+        if x != p:
+            pairs[p][x] -= 1; pairs[x][p] -= 1
+            pairs[q][x] += 1; pairs[x][q] += 1
+    for y in match_b:
+        if y != q:
+            pairs[q][y] -= 1; pairs[y][q] -= 1
+            pairs[p][y] += 1; pairs[y][p] += 1
+    match_a[match_a.index(p)] = q
+    match_b[match_b.index(q)] = p
@@ -1,37 +1,44 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from app.models import Player, RaceResult
+from app.services.logic.rules import ScoringRules
 
 class ScoringEngine:
     @staticmethod
-    def calculate_race_points(results: List[RaceResult], players_map: Dict[str, Player]) -> List[RaceResult]:
+    def calculate_race_points(results: List[RaceResult], players_map: Dict[str, Player], rules: Optional[ScoringRules] = None) -> List[RaceResult]:
         """
         Assigns Points based on rank.
         results: list of RaceResult objects (with rank set).
         players_map: dict of player_id -> Player object.
+        rules: compiled stage rules (points table, NPC handling); defaults if omitted.
         """
+        rules = rules or ScoringRules.compile()
+        # Only when the stage sets npc_scoring "skip"; by default NPCs score by their rank
+        skip_npcs = rules.npc_mode == "skip"
+
         # 1. Sort by raw rank
         sorted_results = sorted(results, key=lambda r: r.rank)
 
-        # 2. Assign points
+        # 2. Assign points by effective rank (NPCs don't take one in "skip" mode)
         valid_rank = 1
-        points_map = {1: 9, 2: 5, 3: 3, 4: 2, 5: 1} # Default map, can be configurable later
 
         for res in sorted_results:
             player = players_map.get(str(res.player_id))
-            if not player:
+            if not player or (skip_npcs and player.is_npc):
                 res.points_awarded = 0
                 continue
 
             # Assign points based on current valid_rank
-            res.points_awarded = points_map.get(valid_rank, 0)
+            res.points_awarded = rules.points_for(valid_rank)
             valid_rank += 1
 
         return sorted_results
 
     @staticmethod
-    def calculate_match_score(race_results: List[RaceResult], match_config: Dict[str, Any] = {}) -> List[Dict[str, Any]]:
+    def calculate_match_score(race_results: List[RaceResult], match_config: Union[ScoringRules, Dict[str, Any]] = {}) -> List[Dict[str, Any]]:
         """
         Aggregates race results to determine the match outcome.
+        match_config: compiled ScoringRules (preferred: compile once, reuse for every match)
+                      or a raw rules_config dict.
         Returns a list of dicts:
         [
             {
@@ -85,7 +92,9 @@ class ScoringEngine:
                         player_stats[r.player_id]["wins"] += 1
 
         # Apply Ace Bonus
-        ace_bonus = match_config.get("ace_bonus_points", 0)
+        if not isinstance(match_config, ScoringRules):
+            match_config = ScoringRules.compile(match_config)
+        ace_bonus = match_config.ace_bonus
         
         final_scores = []
         for pid, stats in player_stats.items():
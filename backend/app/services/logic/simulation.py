@@ -0,0 +1,455 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
+import os
+from uuid import UUID
+import numpy as np
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.cache import get_cache
+from app.models.tournament import Stage, Group, GroupParticipant, Match, MatchParticipant, Race, RaceResult
+from app.models.user import Player
+from app.services.logic.progression import ProgressionEngine
+from app.services.logic.rules import load_stage_rules
+from app.services.logic.scoring import ScoringEngine
+from app.services.logic.tiebreak import HeadToHead, TieBreakEngine
+
+# Worker processes for big simulations (1 = run in the event loop's thread pool)
+SIM_WORKERS = int(os.getenv("SIM_WORKERS", "1"))
+MAX_ITERATIONS = 100_000
+
+# Random values per chunk of iterations; keeps memory flat for stages with thousands of players
+_CHUNK_ELEMENTS = 2_000_000
+
+_cache = get_cache("qualification_odds", max_entries=128)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class SimulationInput:
+    """
+    A stage flattened into arrays (player i = index i everywhere). Plain data so it
+    can be shipped to worker processes.
+    """
+    player_ids: List[str]
+    group_of: np.ndarray        # (N,) group index per player
+    qualifying: np.ndarray      # (G, max group size + 1) bool: does rank r in group g qualify
+    points: np.ndarray          # (N,) points so far (ace bonus included)
+    wins: np.ndarray            # (N,) 1st places so far
+    matches: np.ndarray         # (N,) matches played + still to play
+    log_strength: np.ndarray    # (N,) Plackett-Luce log weights
+    # Unfinished matches batched by shape: (participants (M, k), races left, races recorded,
+    # points (M, k) and 1st places (M, k) from the recorded races, ace bonus not applied)
+    pending: List[Tuple[np.ndarray, int, int, np.ndarray, np.ndarray]] = field(default_factory=list)
+    points_table: np.ndarray = field(default_factory=lambda: np.zeros(1))
+    ace_bonus: int = 0
+    dominance_points: int = 0   # 0 = no dominance bonus
+    wildcard_count: int = 0
+    wildcard_raw: bool = False
+    group_ids: List[str] = field(default_factory=list)
+    group_names: List[str] = field(default_factory=list)
+    tie_breakers: List[str] = field(default_factory=list)  # the stage's TieBreakEngine chain
+    career: Optional[np.ndarray] = None   # (N,) all-time 1st places, for "career_first_places"
+    # (N, max group size) head-to-head from the recorded races: net[i, j] is player i
+    # against the j-th player of its own group
+    h2h_net: Optional[np.ndarray] = None
+
+
+def _refine(ids: np.ndarray, key: np.ndarray) -> np.ndarray:
+    """
+    Splits the (S, N) tie ids by one more sort key (ascending). Ids stay dense and in
+    sort order, so players share one exactly when they are level on every key so far.
+    """
+    order = np.lexsort((key, ids), axis=-1)
+    ordered_ids = np.take_along_axis(ids, order, axis=-1)
+    ordered_key = np.take_along_axis(key, order, axis=-1)
+    changed = np.zeros(order.shape, dtype=np.int64)
+    changed[:, 1:] = (ordered_ids[:, 1:] != ordered_ids[:, :-1]) | (ordered_key[:, 1:] != ordered_key[:, :-1])
+    refined = np.empty_like(order)
+    np.put_along_axis(refined, order, np.cumsum(changed, axis=-1), axis=-1)
+    return refined
+
+
+def simulate(inp: SimulationInput, iterations: int, seed: int) -> Dict[str, np.ndarray]:
+    """
+    Plays the remaining matches `iterations` times and totals, per player, how often they
+    qualify directly / by wildcard, plus points and group rank (for the means).
+
+    Each race is a Plackett-Luce draw (Gumbel-max: sort log_strength + Gumbel noise), all
+    matches of a shape at once; a match already under way keeps its recorded races and
+    only plays the rest. Final order per group: points, then the stage's tie-breaker
+    chain as TieBreakEngine.sort_standings applies it (head-to-head re-applied to the
+    smaller ties it leaves), then a coin flip.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(inp.player_ids)
+    totals = {
+        "direct": np.zeros(n), "wildcard": np.zeros(n), "points": np.zeros(n), "rank": np.zeros(n),
+    }
+    if n == 0 or iterations <= 0:
+        return totals
+
+    chain = inp.tie_breakers
+    use_h2h = "head_to_head" in chain
+    # Rank of player i within its group = position in the sorted order - group start
+    group_start = np.zeros(inp.qualifying.shape[0], dtype=np.int64)
+    counts = np.bincount(inp.group_of, minlength=inp.qualifying.shape[0])
+    group_start[1:] = np.cumsum(counts)[:-1]
+    half_matches = np.floor(inp.matches / 2)
+    career = inp.career if inp.career is not None else np.zeros(n)
+
+    # Head-to-head is kept per group: column j = the group's j-th player
+    width = max(int(counts.max()), 1)
+    local = np.arange(n) - group_start[inp.group_of]
+    mates = group_start[inp.group_of][:, None] + np.arange(width)[None, :]
+    mate_ok = (np.arange(width)[None, :] < counts[inp.group_of][:, None]) & (mates != np.arange(n)[:, None])
+    mates = np.where(mate_ok, mates, 0)
+    h2h_base = inp.h2h_net if inp.h2h_net is not None else np.zeros((n, width))
+
+    per_iteration = n + sum(p.size * races * (p.shape[1] + 1) for p, races, *_ in inp.pending)
+    if use_h2h:
+        per_iteration += 2 * n * width
+    chunk = max(1, min(iterations, _CHUNK_ELEMENTS // max(per_iteration, 1)))
+
+    done = 0
+    while done < iterations:
+        s = min(chunk, iterations - done)
+        done += s
+        offsets = (np.arange(s) * n)[:, None, None]
+        points = np.tile(inp.points.astype(np.float64), (s, 1))
+        wins = np.tile(inp.wins.astype(np.float64), (s, 1))
+
+        net = np.tile(h2h_base, (s, 1, 1)) if use_h2h else None
+
+        for participants, races, played, played_points, played_wins in inp.pending:
+            m, k = participants.shape
+            table = np.zeros(k)
+            table[:min(k, len(inp.points_table))] = inp.points_table[:k]
+
+            # Gumbel(0, 1) = -log(-log(U)); float32 halves the memory traffic
+            uniform = rng.random(size=(s, m, races, k), dtype=np.float32)
+            noise = -np.log(-np.log(uniform + np.float32(1e-12)))
+            noise += inp.log_strength[participants].astype(np.float32)[None, :, None, :]
+            if k <= 8:
+                # Finishing position = how many rivals drew higher (cheaper than argsort for small k)
+                finish = (noise[..., None, :] > noise[..., :, None]).sum(axis=-1)
+            else:
+                finish = np.argsort(np.argsort(-noise, axis=-1), axis=-1)  # 0 = 1st
+            race_points = table[finish]
+            race_wins = (finish == 0) & (table[0] > 0)
+
+            match_points = played_points[None] + race_points.sum(axis=2)
+            match_wins = played_wins[None] + race_wins.sum(axis=2)
+
+            if use_h2h:
+                # ahead[..., a, b]: races seat a finished ahead of seat b
+                ahead = (finish[..., :, None] < finish[..., None, :]).sum(axis=2)
+                pair = ahead - np.swapaxes(ahead, -1, -2)
+                cell = participants[:, :, None] * width + local[participants][:, None, :]
+                idx = ((np.arange(s) * n * width)[:, None, None, None] + cell[None]).ravel()
+                net += np.bincount(idx, weights=pair.ravel(), minlength=s * n * width).reshape(s, n, width)
+            if inp.ace_bonus:
+                match_points = match_points + inp.ace_bonus * (match_wins > (played + races) / 2)
+
+            idx = (offsets + participants[None, :, :]).ravel()
+            points += np.bincount(idx, weights=match_points.ravel(), minlength=s * n).reshape(s, n)
+            wins += np.bincount(idx, weights=match_wins.ravel(), minlength=s * n).reshape(s, n)
+
+        if inp.dominance_points:
+            extra = np.where(inp.matches > 0, np.maximum(wins - half_matches, 0), 0)
+            points += extra * inp.dominance_points
+
+        # Sort by group, then points desc, then the tie-breaker chain, then a coin flip
+        ids = _refine(np.broadcast_to(inp.group_of, (s, n)), -points)
+        for name in chain:
+            if name == "head_to_head":
+                # Mini-league among the players level so far, again on each smaller tie it leaves
+                for _ in range(width):
+                    level = (ids[:, mates] == ids[:, :, None]) & mate_ok
+                    split = _refine(ids, -(net * level).sum(axis=-1))
+                    if np.array_equal(split, ids):
+                        break
+                    ids = split
+            elif name == "career_first_places":
+                ids = _refine(ids, np.broadcast_to(-career, (s, n)))
+            else:
+                ids = _refine(ids, -wins)
+        order = np.lexsort((rng.random((s, n)), ids), axis=-1)
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.broadcast_to(np.arange(n), (s, n)), axis=-1)
+        ranks = ranks - group_start[inp.group_of] + 1
+
+        direct = inp.qualifying[inp.group_of, ranks]
+        totals["direct"] += direct.sum(axis=0)
+        totals["points"] += points.sum(axis=0)
+        totals["rank"] += ranks.sum(axis=0)
+
+        if inp.wildcard_count:
+            if inp.wildcard_raw:
+                score = points + wins * 1e-6
+            else:
+                per = np.maximum(inp.matches, 1)
+                score = points / per + (wins / per) * 1e-6
+            score = np.where(direct, -np.inf, score)
+            k = min(inp.wildcard_count, n)
+            best = np.argpartition(-score, k - 1, axis=-1)[:, :k]
+            picked = np.zeros((s, n), dtype=bool)
+            np.put_along_axis(picked, best, True, axis=-1)
+            totals["wildcard"] += (picked & ~direct).sum(axis=0)
+
+    return totals
+
+
+def run_simulation(inp: SimulationInput, iterations: int, seed: int, workers: int = 1) -> Dict[str, np.ndarray]:
+    """simulate(), split over `workers` processes when > 1 (independent seed streams)."""
+    global _pool
+    if workers <= 1 or iterations < 2 * workers:
+        return simulate(inp, iterations, seed)
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    seeds = np.random.SeedSequence(seed).generate_state(workers)
+    shares = [iterations // workers + (1 if i < iterations % workers else 0) for i in range(workers)]
+    futures = [_pool.submit(simulate, inp, share, int(sd)) for share, sd in zip(shares, seeds)]
+    totals = None
+    for future in futures:
+        part = future.result()
+        totals = part if totals is None else {key: totals[key] + part[key] for key in totals}
+    return totals
+
+
+class QualificationSimulator:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def qualification_odds(self, stage_id: Any, iterations: int = 10_000, seed: Optional[int] = None,
+                                 model: str = "form") -> Dict[str, Any]:
+        """
+        Qualification probabilities per player for a group stage.
+
+        model: "form" weights each player by points per race so far, "uniform" treats every
+        finishing order as equally likely.
+
+        Cached per result version: a digest of the stage's results, match statuses and
+        rules. The seed defaults to one derived from that digest, so the same version
+        always reports the same numbers.
+        """
+        if not 1 <= iterations <= MAX_ITERATIONS:
+            raise ValueError(f"iterations must be between 1 and {MAX_ITERATIONS}")
+        if model not in ("form", "uniform"):
+            raise ValueError("model must be 'form' or 'uniform'")
+
+        inp, version, names = await self.build_input(stage_id, model)
+        if seed is None:
+            seed = int(version[:8], 16)
+
+        key = f"{stage_id}:{version}:{iterations}:{seed}:{model}"
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        totals = await loop.run_in_executor(None, run_simulation, inp, iterations, seed, SIM_WORKERS)
+
+        players = []
+        for i, pid in enumerate(inp.player_ids):
+            direct = totals["direct"][i] / iterations
+            wildcard = totals["wildcard"][i] / iterations
+            players.append({
+                "player_id": pid,
+                "player_name": names.get(pid, "Unknown"),
+                "qualify_probability": round(float(direct + wildcard), 4),
+                "direct_probability": round(float(direct), 4),
+                "wildcard_probability": round(float(wildcard), 4),
+                "expected_points": round(float(totals["points"][i] / iterations), 2),
+                "expected_rank": round(float(totals["rank"][i] / iterations), 2),
+            })
+        players.sort(key=lambda p: (-p["qualify_probability"], p["expected_rank"]))
+
+        result = {
+            "stage_id": str(stage_id),
+            "version": version,
+            "iterations": iterations,
+            "seed": seed,
+            "model": model,
+            "pending_matches": int(sum(p.shape[0] for p, *_ in inp.pending)),
+            "players": players,
+        }
+        _cache.set(key, result)
+        return result
+
+    async def build_input(self, stage_id: Any, model: str = "form") -> Tuple[SimulationInput, str, Dict[str, str]]:
+        """Loads the stage into a SimulationInput. Returns (input, result version, player names)."""
+        stage = await self.session.get(Stage, stage_id)
+        if not stage:
+            raise ValueError("Stage not found")
+        rules = await load_stage_rules(self.session, stage)
+        config = stage.rules_config or {}
+        digest = hashlib.sha1(repr((sorted(config.items(), key=str), sorted((stage.wildcard_rules or {}).items(), key=str),
+                                    rules)).encode())
+
+        groups = (await self.session.exec(select(Group).where(Group.stage_id == stage.id).order_by(Group.name))).all()
+        group_ids = [g.id for g in groups]
+
+        members = defaultdict(list)
+        # Plain column rows, not ORM objects: audition stages have thousands of players
+        # and tens of thousands of results
+        stmt_members = select(GroupParticipant.group_id, GroupParticipant.player_id).where(GroupParticipant.group_id.in_(group_ids))
+        for gp in (await self.session.exec(stmt_members)).all():
+            members[gp.group_id].append(str(gp.player_id))
+
+        stmt_matches = select(Match.id, Match.status).where(Match.group_id.in_(group_ids)).order_by(Match.id)
+        matches = (await self.session.exec(stmt_matches)).all()
+        match_ids = [m.id for m in matches]
+        participants = defaultdict(list)
+        stmt_seats = select(MatchParticipant.match_id, MatchParticipant.player_id).where(MatchParticipant.match_id.in_(match_ids))
+        for mp in (await self.session.exec(stmt_seats)).all():
+            participants[mp.match_id].append(str(mp.player_id))
+
+        results_by_match = defaultdict(list)
+        stmt = (
+            select(RaceResult.id, RaceResult.race_id, RaceResult.player_id, RaceResult.rank, RaceResult.points_awarded,
+                   Race.match_id)
+            .join(Race, RaceResult.race_id == Race.id)
+            .where(Race.match_id.in_(match_ids))
+            .order_by(RaceResult.id)
+        )
+        for rr in (await self.session.exec(stmt)).all():
+            results_by_match[rr.match_id].append(rr)
+            digest.update(f"{rr.id}:{rr.rank}:{rr.points_awarded};".encode())
+        for m in matches:
+            digest.update(f"{m.id}:{m.status};".encode())
+
+        chain = TieBreakEngine.chain(config)
+        all_ids = sorted({pid for ids in members.values() for pid in ids})
+        players = {}
+        if all_ids:
+            columns = [Player.id, Player.in_game_name, Player.is_npc]
+            if "career_first_places" in chain:
+                columns.append(Player.stats)
+            stmt_players = select(*columns).where(Player.id.in_([UUID(pid) for pid in all_ids]))
+            players = {str(p.id): p for p in (await self.session.exec(stmt_players)).all()}
+
+        # Flatten players group by group
+        player_ids, group_of = [], []
+        for g_idx, group in enumerate(groups):
+            for pid in sorted(members[group.id]):
+                player_ids.append(pid)
+                group_of.append(g_idx)
+                digest.update(f"{group.id}:{pid};".encode())
+                if "career_first_places" in chain and pid in players:
+                    digest.update(f"{(players[pid].stats or {}).get('first_place_count', 0)};".encode())
+        index = {pid: i for i, pid in enumerate(player_ids)}
+        n = len(player_ids)
+
+        points = np.zeros(n)
+        wins = np.zeros(n)
+        matches_count = np.zeros(n)
+        race_points = np.zeros(n)
+        races_run = np.zeros(n)
+        # (seats, races left, races recorded) -> rows of (seats, recorded points, recorded 1st places)
+        pending_by_shape: Dict[Tuple[int, int, int], List[Tuple[List[int], List[int], List[int]]]] = defaultdict(list)
+        races_per_match = config.get("races_per_match", 1)
+        skip_npcs = rules.npc_mode == "skip"
+
+        for m in matches:
+            recorded = results_by_match[m.id]
+            played = len({rr.race_id for rr in recorded})
+            if m.status != "finished" and played < races_per_match:
+                seats = [index[p] for p in participants[m.id]
+                         if p in index and not (skip_npcs and players.get(p) and players[p].is_npc)]
+                so_far = {}
+                for score in ScoringEngine.calculate_match_score(recorded, rules):
+                    # The ace bonus is settled over the whole match, once it is simulated
+                    so_far[str(score["player_id"])] = (score["total_points"] - (rules.ace_bonus if score["is_ace"] else 0),
+                                                       score["wins"])
+                for i in seats:
+                    matches_count[i] += 1
+                if seats:
+                    rows = [so_far.get(player_ids[i], (0, 0)) for i in seats]
+                    pending_by_shape[(len(seats), races_per_match - played, played)].append(
+                        (seats, [r[0] for r in rows], [r[1] for r in rows]))
+            else:
+                for score in ScoringEngine.calculate_match_score(recorded, rules):
+                    i = index.get(str(score["player_id"]))
+                    if i is None:
+                        continue
+                    points[i] += score["total_points"]
+                    wins[i] += score["wins"]
+                    matches_count[i] += 1
+            for rr in recorded:
+                i = index.get(str(rr.player_id))
+                if i is not None:
+                    race_points[i] += rr.points_awarded
+                    races_run[i] += 1
+
+        # Form: points per race, shrunk towards the field average (3 races of prior)
+        if model == "form" and races_run.sum() > 0:
+            prior = race_points.sum() / races_run.sum()
+            strength = (race_points + 3 * prior) / (races_run + 3)
+            log_strength = np.log(strength + 1.0)
+        else:
+            log_strength = np.zeros(n)
+
+        # Qualifying ranks per group size, straight from the advancement rules
+        sizes = np.bincount(np.array(group_of, dtype=np.int64), minlength=len(groups)) if n else np.zeros(len(groups), dtype=np.int64)
+        max_size = int(sizes.max()) if len(sizes) else 0
+        qualifying = np.zeros((len(groups), max_size + 1), dtype=bool)
+        by_size: Dict[int, set] = {}
+        for g_idx, size in enumerate(sizes):
+            size = int(size)
+            if size not in by_size:
+                ranked = [{"player_id": r, "rank": r} for r in range(1, size + 1)]
+                by_size[size] = {q["player_id"] for q in ProgressionEngine.determine_group_qualifiers(stage, ranked)}
+            for r in by_size[size]:
+                qualifying[g_idx, r] = True
+
+        # Head-to-head from every recorded race, as the group standings count it
+        width = max_size or 1
+        h2h_net = np.zeros((n, width))
+        if "head_to_head" in chain:
+            h2h = HeadToHead(rr for rows in results_by_match.values() for rr in rows)
+            for g_idx in range(len(groups)):
+                start = int(np.searchsorted(group_of, g_idx))
+                ids = player_ids[start:start + int(sizes[g_idx])]
+                for a, pid in enumerate(ids):
+                    row = h2h.net.get(pid, {})
+                    for b, other in enumerate(ids):
+                        h2h_net[start + a, b] = row.get(other, 0)
+        career = np.zeros(n)
+        if "career_first_places" in chain:
+            for i, pid in enumerate(player_ids):
+                if pid in players:
+                    career[i] = (players[pid].stats or {}).get("first_place_count", 0)
+
+        bonus_rules = config.get("bonus_rules", [])
+        dominance = next((r for r in bonus_rules if r.get("type") == "dominance_bonus"), None)
+        wildcard_rules = stage.wildcard_rules or {}
+
+        inp = SimulationInput(
+            player_ids=player_ids,
+            group_of=np.array(group_of, dtype=np.int64),
+            qualifying=qualifying,
+            points=points,
+            wins=wins,
+            matches=matches_count,
+            log_strength=log_strength,
+            pending=[(np.array([r[0] for r in rows], dtype=np.int64), races, played,
+                      np.array([r[1] for r in rows], dtype=np.float64), np.array([r[2] for r in rows], dtype=np.float64))
+                     for (k, races, played), rows in sorted(pending_by_shape.items())],
+            points_table=np.array(rules.points, dtype=np.float64),
+            ace_bonus=rules.ace_bonus,
+            dominance_points=dominance.get("points", 2) if dominance else 0,
+            wildcard_count=wildcard_rules.get("wildcard_count", 0),
+            wildcard_raw=wildcard_rules.get("normalize", "per_match") == "raw",
+            group_ids=[str(g.id) for g in groups],
+            group_names=[g.name for g in groups],
+            tie_breakers=chain,
+            career=career,
+            h2h_net=h2h_net,
+        )
+        names = {pid: p.in_game_name for pid, p in players.items()}
+        return inp, digest.hexdigest(), names
@@ -0,0 +1,130 @@
+from typing import List, Dict, Any, Iterable, Optional
+from collections import defaultdict
+from app.models import RaceResult
+
+
+class HeadToHead:
+    """
+    Pairwise head-to-head matrix, built once from a set of race results.
+
+    net[a][b] = races where a finished ahead of b minus races where b finished ahead of a.
+    Stored sparsely (only pairs that actually raced), so a tied cluster's mini-league is
+    O(players * opponents) instead of O(players^2) or a rescan of the results per pair.
+    """
+
+    def __init__(self, race_results: Iterable[RaceResult]):
+        self.net: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        by_race = defaultdict(list)
+        for res in race_results:
+            by_race[res.race_id].append(res)
+
+        for results in by_race.values():
+            # Ahead = more points (NPC-adjusted); raw rank settles equal points
+            ordered = sorted(results, key=lambda r: (-r.points_awarded, r.rank))
+            ids = [str(r.player_id) for r in ordered]
+            for i, a in enumerate(ids):
+                for b in ids[i + 1:]:
+                    self.net[a][b] += 1
+                    self.net[b][a] -= 1
+
+    def score(self, player_id: str, cluster: set) -> int:
+        """Net head-to-head of `player_id` against the other players in `cluster`."""
+        row = self.net.get(player_id)
+        if not row:
+            return 0
+        if len(row) < len(cluster):
+            return sum(v for b, v in row.items() if b in cluster)
+        return sum(row.get(b, 0) for b in cluster if b != player_id)
+
+
+class TieBreakEngine:
+    # ARCHITECTURE.md 3.4: points, then head-to-head, then count of 1st places
+    DEFAULT_CHAIN = ["head_to_head", "first_places"]
+    KNOWN = ("head_to_head", "first_places", "wins", "career_first_places")
+
+    @staticmethod
+    def chain(rules: Optional[Dict[str, Any]] = None) -> List[str]:
+        """The stage's tie-breaker chain. Raises ValueError when it is not a list of known names."""
+        chain = (rules or {}).get("tie_breakers", TieBreakEngine.DEFAULT_CHAIN)
+        if not isinstance(chain, (list, tuple)):
+            raise ValueError(f"tie_breakers must be a list, got {chain!r}")
+        for name in chain:
+            if name not in TieBreakEngine.KNOWN:
+                raise ValueError(f"Unknown tie-breaker: {name}")
+        return list(chain)
+
+    @staticmethod
+    def sort_standings(
+        standings: List[Dict[str, Any]],
+        race_results: Iterable[RaceResult],
+        rules: Optional[Dict[str, Any]] = None,
+        points_key: str = "points",
+    ) -> List[Dict[str, Any]]:
+        """
+        Sorts standings by points, then the stage's tie-breaker chain, and sets "rank".
+
+        Args:
+            standings: dicts with "player_id", `points_key` and "wins".
+            race_results: the races behind these standings (for head-to-head).
+            rules: Stage.rules_config; "tie_breakers" overrides DEFAULT_CHAIN.
+                   Known tie-breakers: head_to_head, first_places (alias: wins),
+                   career_first_places (all-time, from Player.stats; standings
+                   entries carry it as "career_first_places").
+
+        Each tie-breaker only orders players still level after the previous ones.
+        Head-to-head is a mini-league among the tied players and is re-applied to any
+        smaller tie it leaves. Players level on everything keep their input order.
+        """
+        chain = TieBreakEngine.chain(rules)
+        h2h = None
+        if "head_to_head" in chain:
+            h2h = HeadToHead(race_results)
+
+        ordered = sorted(standings, key=lambda e: -e[points_key])
+
+        # Walk runs of equal points; only those need the chain
+        result = []
+        i = 0
+        while i < len(ordered):
+            j = i + 1
+            while j < len(ordered) and ordered[j][points_key] == ordered[i][points_key]:
+                j += 1
+            run = ordered[i:j]
+            result.extend(TieBreakEngine._break(run, chain, h2h) if len(run) > 1 else run)
+            i = j
+
+        for rank, entry in enumerate(result, start=1):
+            entry["rank"] = rank
+        return result
+
+    @staticmethod
+    def _break(cluster: List[Dict[str, Any]], chain: List[str], h2h: Optional[HeadToHead]) -> List[Dict[str, Any]]:
+        if not chain or len(cluster) < 2:
+            return cluster
+
+        name = chain[0]
+        if name == "head_to_head":
+            ids = {str(e["player_id"]) for e in cluster}
+            values = {id(e): h2h.score(str(e["player_id"]), ids) for e in cluster}
+        elif name == "career_first_places":
+            values = {id(e): e.get("career_first_places", 0) for e in cluster}
+        else:
+            values = {id(e): e["wins"] for e in cluster}
+
+        ordered = sorted(cluster, key=lambda e: -values[id(e)])
+        result = []
+        i = 0
+        while i < len(ordered):
+            j = i + 1
+            while j < len(ordered) and values[id(ordered[j])] == values[id(ordered[i])]:
+                j += 1
+            sub = ordered[i:j]
+            if len(sub) == 1:
+                result.extend(sub)
+            elif name == "head_to_head" and len(sub) < len(cluster):
+                # Smaller tie: its own mini-league first, then the rest of the chain
+                result.extend(TieBreakEngine._break(sub, chain, h2h))
+            else:
+                result.extend(TieBreakEngine._break(sub, chain[1:], h2h))
+            i = j
+        return result
@@ -0,0 +1,357 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Set
+from collections import defaultdict
+import math
+import random
+
+class TimeSlotEngine:
+    @staticmethod
+    def assign(
+        matches: Sequence[Sequence[Hashable]],
+        hosts: Optional[Sequence[Optional[Hashable]]] = None,
+        host_rest: int = 1,
+        max_parallel: Optional[int] = None,
+        search_steps: int = 2_000,
+    ) -> List[int]:
+        """
+        Puts every match in a time slot (0, 1, 2, ...), using as few slots as it can.
+
+        Args:
+            matches: participant ids per match.
+            hosts: host id per match (None = no host rules).
+            host_rest: free slots a host gets on each side of a match they host
+                       (room setup and result reporting).
+            max_parallel: rooms available at once (None = unlimited).
+            search_steps: local search moves per attempt at a shorter timetable.
+
+        Returns:
+            slot index per match, same order as `matches`.
+
+        Matches sharing a player conflict, so this is graph coloring with ordered colors.
+        Groups never share players, so each connected set of matches (a group) is solved
+        on its own (once per distinct shape) and they all run side by side:
+        1. greedy: most-constrained match first, into its earliest free slot, then compact
+           the last slot away while matches can move (directly or by pushing one blocker);
+        2. tabu search (min-conflicts) for a timetable one slot shorter, repeated until it
+           fails or reaches the lower bound.
+        With a room limit the groups compete for slots: their timetables give the order
+        in which matches are packed into rooms, followed by another compaction.
+        """
+        n = len(matches)
+        if n == 0:
+            return []
+        hosts = list(hosts) if hosts is not None else [None] * n
+
+        slots = [0] * n
+        # Groups built from the same design come out identical once players are relabeled
+        # in order of appearance: solve each shape once
+        solved: Dict[tuple, List[int]] = {}
+        for component in _components(matches):
+            label: Dict[Hashable, int] = {}
+            for i in component:
+                for p in matches[i]:
+                    label.setdefault(p, len(label))
+            sub_matches = [tuple(label[p] for p in matches[i]) for i in component]
+            sub_hosts = [label.get(hosts[i]) if hosts[i] is not None else None for i in component]
+            shape = (tuple(sub_matches), tuple(sub_hosts))
+            if shape not in solved:
+                solved[shape] = _solve_component(sub_matches, sub_hosts, host_rest, search_steps)
+            for i, t in zip(component, solved[shape]):
+                slots[i] = t
+        if max_parallel is None:
+            return slots
+
+        # Rooms: pack in the order of the per-group timetables
+        lower = TimeSlotEngine.lower_bound(matches, hosts, host_rest, max_parallel)
+        table = _Timetable(matches, hosts, host_rest, max_parallel)
+        for i in sorted(range(n), key=lambda i: (slots[i], i)):
+            t = 0
+            while not table.fits(i, t):
+                t += 1
+            table.place(i, t)
+        table.compact(lower)
+        return list(table.slot_of)
+
+    @staticmethod
+    def lower_bound(
+        matches: Sequence[Sequence[Hashable]],
+        hosts: Optional[Sequence[Optional[Hashable]]] = None,
+        host_rest: int = 1,
+        max_parallel: Optional[int] = None,
+    ) -> int:
+        """
+        Slots any valid timetable needs, the largest of:
+        - the busiest player's matches plus the rest gaps they can't avoid
+          (hosted matches grouped at one end)
+        - a set of matches that all share players pairwise (greedy clique); in the
+          6-player group design every two matches overlap, so that is all 10
+        - matches / rooms
+        """
+        if not matches:
+            return 0
+        played: Dict[Hashable, int] = defaultdict(int)
+        hosted: Dict[Hashable, int] = defaultdict(int)
+        by_player: Dict[Hashable, List[int]] = defaultdict(list)
+        for i, members in enumerate(matches):
+            for p in members:
+                played[p] += 1
+                by_player[p].append(i)
+            if hosts is not None and hosts[i] is not None:
+                hosted[hosts[i]] += 1
+        bound = max(played[p] + host_rest * min(hosted[p], played[p] - 1) for p in played)
+        if max_parallel:
+            bound = max(bound, math.ceil(len(matches) / max_parallel))
+
+        neighbors = [set() for _ in matches]
+        for ids in by_player.values():
+            for i in ids:
+                neighbors[i].update(ids)
+        for i, near in enumerate(neighbors):
+            near.discard(i)
+        for i in sorted(range(len(matches)), key=lambda i: -len(neighbors[i])):
+            if len(neighbors[i]) < bound:
+                break
+            clique = [i]
+            for j in sorted(neighbors[i], key=lambda j: -len(neighbors[j])):
+                if all(j in neighbors[c] for c in clique):
+                    clique.append(j)
+            bound = max(bound, len(clique))
+        return bound
+
+
+class _Timetable:
+    """Slot occupancy per player / host / room, with moves for the compaction phase."""
+
+    def __init__(self, matches, hosts, host_rest: int, max_parallel: Optional[int]):
+        self.matches = matches
+        self.hosts = hosts
+        self.rest = host_rest
+        self.max_parallel = max_parallel
+        self.slot_of: List[int] = [-1] * len(matches)
+        self.busy: Dict[Hashable, Dict[int, int]] = defaultdict(dict)   # player -> slot -> match
+        self.hosting: Dict[Hashable, Dict[int, int]] = defaultdict(dict)  # host -> slot -> match
+        self.in_slot: Dict[int, Set[int]] = defaultdict(set)
+
+    def length(self) -> int:
+        return max(self.slot_of) + 1
+
+    def blockers(self, i: int, t: int) -> Set[int]:
+        """Matches that keep match i out of slot t."""
+        found = set()
+        host = self.hosts[i]
+        for p in self.matches[i]:
+            other = self.busy[p].get(t)
+            if other is not None:
+                found.add(other)
+            if self.rest:
+                if p == host:
+                    # Nothing else for the host right around a match they host
+                    for d in range(1, self.rest + 1):
+                        for s in (t - d, t + d):
+                            other = self.busy[p].get(s)
+                            if other is not None:
+                                found.add(other)
+                else:
+                    for d in range(1, self.rest + 1):
+                        for s in (t - d, t + d):
+                            other = self.hosting[p].get(s)
+                            if other is not None:
+                                found.add(other)
+        found.discard(i)
+        return found
+
+    def room_full(self, t: int, leaving: int = 0) -> bool:
+        return self.max_parallel is not None and len(self.in_slot[t]) - leaving >= self.max_parallel
+
+    def fits(self, i: int, t: int) -> bool:
+        return not self.room_full(t) and not self.blockers(i, t)
+
+    def place(self, i: int, t: int) -> None:
+        self.slot_of[i] = t
+        self.in_slot[t].add(i)
+        for p in self.matches[i]:
+            self.busy[p][t] = i
+        if self.hosts[i] is not None:
+            self.hosting[self.hosts[i]][t] = i
+
+    def remove(self, i: int) -> None:
+        t = self.slot_of[i]
+        self.in_slot[t].discard(i)
+        for p in self.matches[i]:
+            del self.busy[p][t]
+        if self.hosts[i] is not None:
+            del self.hosting[self.hosts[i]][t]
+        self.slot_of[i] = -1
+
+    def relocate(self, i: int, last: int) -> bool:
+        """Moves match i to a slot before `last`, pushing one blocking match if needed."""
+        origin = self.slot_of[i]
+        self.remove(i)
+        for t in range(last):
+            if self.fits(i, t):
+                self.place(i, t)
+                return True
+
+        for t in range(last):
+            blocking = self.blockers(i, t)
+            if len(blocking) > 1 or (not blocking and self.room_full(t)):
+                continue
+            if blocking:
+                b = next(iter(blocking))
+            else:
+                # Room limit only: any match of the slot may make way
+                b = next(iter(self.in_slot[t]))
+            b_slot = self.slot_of[b]
+            self.remove(b)
+            if self.fits(i, t):
+                self.place(i, t)
+                for t2 in range(last):
+                    if t2 != b_slot and self.fits(b, t2):
+                        self.place(b, t2)
+                        return True
+                self.remove(i)
+            self.place(b, b_slot)
+
+        self.place(i, origin)
+        return False
+
+    def compact(self, lower: int) -> None:
+        while self.length() > lower:
+            last = self.length() - 1
+            stuck = False
+            for i in sorted(self.in_slot[last]):
+                if not self.relocate(i, last):
+                    stuck = True
+                    break
+            if stuck:
+                return
+
+
+def _components(matches: Sequence[Sequence[Hashable]]) -> List[List[int]]:
+    """Match indices grouped by shared players (union-find)."""
+    parent = list(range(len(matches)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    first_match: Dict[Hashable, int] = {}
+    for i, members in enumerate(matches):
+        for p in members:
+            if p in first_match:
+                parent[find(i)] = find(first_match[p])
+            else:
+                first_match[p] = i
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(matches)):
+        groups[find(i)].append(i)
+    return list(groups.values())
+
+
+def _solve_component(matches, hosts, host_rest: int, search_steps: int) -> List[int]:
+    n = len(matches)
+    lower = TimeSlotEngine.lower_bound(matches, hosts, host_rest)
+
+    load: Dict[Hashable, int] = defaultdict(int)
+    for members in matches:
+        for p in members:
+            load[p] += 1
+    key = [-(sum(load[p] for p in members) + (host_rest * load[hosts[i]] if hosts[i] is not None else 0))
+           for i, members in enumerate(matches)]
+
+    table = _Timetable(matches, hosts, host_rest, None)
+    for i in sorted(range(n), key=lambda i: (key[i], i)):
+        t = 0
+        while not table.fits(i, t):
+            t += 1
+        table.place(i, t)
+    table.compact(lower)
+    best = list(table.slot_of)
+
+    # Pairs that can't share a slot, with how close they may not be (host rest)
+    window: List[Dict[int, int]] = [dict() for _ in range(n)]
+    by_player: Dict[Hashable, List[int]] = defaultdict(list)
+    for i, members in enumerate(matches):
+        for p in members:
+            by_player[p].append(i)
+    for ids in by_player.values():
+        for i in ids:
+            for j in ids:
+                if i != j:
+                    w = host_rest if host_rest and (hosts[i] in matches[j] or hosts[j] in matches[i]) else 0
+                    window[i][j] = max(window[i].get(j, 0), w)
+
+    rng = random.Random(n)
+    length = max(best) + 1
+    while length > lower:
+        # From the current timetable squeezed by a slot, then from random starts
+        found = _tabu(window, [min(t, length - 2) for t in best], length - 1, search_steps, rng)
+        for _ in range(2):
+            if found is not None:
+                break
+            found = _tabu(window, [rng.randrange(length - 1) for _ in range(n)], length - 1, search_steps, rng)
+        if found is None:
+            break
+        best = found
+        length = max(best) + 1
+    return best
+
+
+def _tabu(window: List[Dict[int, int]], start: List[int], k: int, steps: int, rng: random.Random) -> Optional[List[int]]:
+    """
+    Min-conflicts tabu search for a timetable with `k` slots.
+
+    gamma[i][t] = how many of i's neighbours clash with i placed in slot t; a move puts a
+    clashing match in its least-clashing slot that isn't tabu (recently left). Gives up
+    after a tenth of the steps without progress.
+    """
+    n = len(start)
+    slot = list(start)
+    gamma = [[0] * k for _ in range(n)]
+    for i in range(n):
+        for j, w in window[i].items():
+            for t in range(max(0, slot[j] - w), min(k, slot[j] + w + 1)):
+                gamma[i][t] += 1
+    clashes = sum(gamma[i][slot[i]] for i in range(n)) // 2
+    tabu: Dict[tuple, int] = {}
+    fewest, since = clashes, 0
+
+    for step in range(steps):
+        if clashes == 0:
+            return slot
+        if clashes < fewest:
+            fewest, since = clashes, step
+        elif step - since > steps // 10:
+            # Stalled: this length is probably out of reach
+            break
+        best_delta, moves, clashing = None, [], 0
+        for i in range(n):
+            here = gamma[i][slot[i]]
+            if here == 0:
+                continue
+            clashing += 1
+            for t in range(k):
+                if t == slot[i]:
+                    continue
+                delta = gamma[i][t] - here
+                if tabu.get((i, t), -1) > step and clashes + delta > 0:
+                    continue
+                if best_delta is None or delta < best_delta:
+                    best_delta, moves = delta, [(i, t)]
+                elif delta == best_delta:
+                    moves.append((i, t))
+        if not moves:
+            continue
+        i, t = rng.choice(moves)
+        old = slot[i]
+        for j, w in window[i].items():
+            for s in range(max(0, old - w), min(k, old + w + 1)):
+                gamma[j][s] -= 1
+            for s in range(max(0, t - w), min(k, t + w + 1)):
+                gamma[j][s] += 1
+        slot[i] = t
+        clashes += best_delta
+        # TabuCol tenure: a little randomness plus 0.6 x the clashing matches
+        tabu[(i, old)] = step + 1 + rng.randint(0, min(9, n // 2)) + int(0.6 * clashing)
+    return slot if clashes == 0 else None
@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import String, cast, delete, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import Player, Race, RaceResult, PlayerRating, RatingHistory
+from app.services.logic.rating import DEFAULT_RATING, EloEngine
+
+# Rows per INSERT batch in recompute
+CHUNK_ROWS = 5000
+
+
+class RatingService:
+    """
+    Cross-tournament player ratings: updated race by race as results come in
+    (apply_race, called by record_race_result) and rebuilt from scratch over the
+    whole result history by recompute().
+
+    A corrected race is undone from the current ratings before it is rated again.
+    Races rated in between keep the deltas they got from the old result; recompute
+    removes that drift.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def apply_race(self, race_id: Any, results: List[RaceResult], players_map: Dict[str, Player]):
+        """Rates one race (NPCs excluded) in the caller's transaction; the caller commits."""
+        old = (await self.session.exec(select(RatingHistory).where(RatingHistory.race_id == race_id))).all()
+        order = [
+            UUID(str(r.player_id)) for r in sorted(results, key=lambda r: r.rank)
+            if str(r.player_id) in players_map and not players_map[str(r.player_id)].is_npc
+        ]
+        player_ids = set(order) | {h.player_id for h in old}
+        if not player_ids:
+            return
+        ratings = {
+            r.player_id: r for r in
+            (await self.session.exec(select(PlayerRating).where(PlayerRating.player_id.in_(player_ids)))).all()
+        }
+
+        now = datetime.utcnow()
+        for h in old:
+            current = ratings.get(h.player_id)
+            if current is not None:
+                current.rating -= h.rating_after - h.rating_before
+                current.races = max(current.races - 1, 0)
+                current.updated_at = now
+        if old:
+            await self.session.exec(delete(RatingHistory).where(RatingHistory.race_id == race_id))
+
+        for pid in order:
+            if pid not in ratings:
+                ratings[pid] = PlayerRating(player_id=pid, rating=DEFAULT_RATING, races=0)
+        before = [ratings[pid].rating for pid in order]
+        for pid, rating_before, delta in zip(order, before, EloEngine.race_deltas(before)):
+            current = ratings[pid]
+            current.rating = rating_before + delta
+            current.races += 1
+            current.updated_at = now
+            self.session.add(RatingHistory(player_id=pid, race_id=race_id, rating_before=rating_before,
+                                           rating_after=current.rating, created_at=now))
+        for current in ratings.values():
+            self.session.add(current)
+
+    async def recompute(self) -> Dict[str, int]:
+        """
+        Replays every race in submission order (first result's created_at, then match and
+        race number) and replaces all ratings and history in one transaction.
+        """
+        # Ids as text: building a uuid.UUID per value would cost more than the replay itself
+        stmt = (
+            select(
+                cast(RaceResult.race_id, String), cast(RaceResult.player_id, String), RaceResult.rank,
+                RaceResult.created_at, cast(Race.match_id, String), Race.race_number,
+            )
+            .join(Race, Race.id == RaceResult.race_id)
+            .join(Player, Player.id == RaceResult.player_id)
+            .where(Player.is_npc == False)  # noqa: E712
+        )
+        races: Dict[str, List[Any]] = {}
+        for race_id, player_id, rank, created_at, match_id, race_number in (await self.session.exec(stmt)).all():
+            race = races.get(race_id)
+            if race is None:
+                race = races[race_id] = [created_at, match_id, race_number, []]
+            elif created_at is not None and (race[0] is None or created_at < race[0]):
+                race[0] = created_at
+            race[3].append((rank, player_id))
+
+        ordered = sorted(races.items(), key=lambda item: (item[1][0] or datetime.min, item[1][1], item[1][2]))
+        ratings, counts, history = EloEngine.replay(
+            (race_id, [pid for _, pid in sorted(race[3])]) for race_id, race in ordered
+        )
+
+        # One uuid.UUID per distinct id: the column type would parse every string it binds
+        uuids: Dict[str, UUID] = {}
+
+        def as_uuid(value: str) -> UUID:
+            found = uuids.get(value)
+            if found is None:
+                found = uuids[value] = UUID(value)
+            return found
+
+        now = datetime.utcnow()
+        await self.session.exec(delete(RatingHistory))
+        await self.session.exec(delete(PlayerRating))
+        rating_rows = [{"player_id": as_uuid(pid), "rating": rating, "races": counts[pid], "updated_at": now}
+                       for pid, rating in ratings.items()]
+        # History is dated by the race, so a player's timeline reads in play order
+        history_rows = [{"race_id": as_uuid(race_id), "player_id": as_uuid(pid), "rating_before": before,
+                         "rating_after": after, "created_at": races[race_id][0] or now}
+                        for pid, race_id, before, after in history]
+        for model, rows in ((PlayerRating, rating_rows), (RatingHistory, history_rows)):
+            for i in range(0, len(rows), CHUNK_ROWS):
+                await self.session.execute(insert(model.__table__), rows[i:i + CHUNK_ROWS])
+        await self.session.commit()
+        return {"races": len(ordered), "players": len(rating_rows), "history_rows": len(history_rows)}
+
+    async def leaderboard(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        stmt = (
+            select(PlayerRating, Player.in_game_name)
+            .join(Player, Player.id == PlayerRating.player_id)
+            .order_by(PlayerRating.rating.desc(), Player.in_game_name)
+            .offset(offset).limit(limit)
+        )
+        return [
+            {"rank": offset + i, "player_id": r.player_id, "player_name": name,
+             "rating": round(r.rating, 1), "races": r.races}
+            for i, (r, name) in enumerate((await self.session.exec(stmt)).all(), start=1)
+        ]
+
+    async def player_rating(self, player_id: Any, history: int = 50) -> Optional[Dict[str, Any]]:
+        """Current rating and the latest `history` changes, newest first; None if never rated."""
+        current = await self.session.get(PlayerRating, player_id)
+        if current is None:
+            return None
+        stmt = (
+            select(RatingHistory)
+            .where(RatingHistory.player_id == player_id)
+            .order_by(RatingHistory.created_at.desc())
+            .limit(history)
+        )
+        return {
+            "player_id": current.player_id,
+            "rating": round(current.rating, 1),
+            "races": current.races,
+            "history": [
+                {"race_id": h.race_id, "rating_before": round(h.rating_before, 1),
+                 "rating_after": round(h.rating_after, 1), "at": h.created_at}
+                for h in (await self.session.exec(stmt)).all()
+            ],
+        }
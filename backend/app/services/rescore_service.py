@@ -0,0 +1,175 @@
+"""
+Re-scoring a stage after its scoring rules change.
+
+Points are stored per race result when the result comes in, so a new points
+table (or NPC mode) only reaches races entered afterwards. RescoreService
+recomputes points_awarded for every result of the stage with the stage's rules
+(optionally patched first), writes the changed rows with one executemany UPDATE
+in a single transaction, logs the changed races as "rescored" events, refreshes
+the affected players' counters and drops the caches derived from the results.
+
+With dry_run nothing is written; both modes report the ranking diff.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import String, bindparam, cast, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.cache import invalidate
+from app.models import Group, Match, Player, Race, RaceResult, Stage, ResultEvent
+from app.services.event_service import CHUNK_ROWS, DERIVED_CACHES, ResultLog
+from app.services.logic.rules import load_stage_rules
+from app.services.logic.scoring import ScoringEngine
+from app.services.logic.tiebreak import TieBreakEngine
+from app.services.stats_service import PlayerStatsService
+
+
+@dataclass
+class _Scored:
+    id: str
+    race_id: UUID
+    player_id: UUID
+    rank: int
+    points_awarded: int
+    old_points: int
+
+
+class RescoreService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def rescore(self, stage_id: Any, rules_patch: Optional[Dict[str, Any]] = None,
+                      dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Recomputes the stage's race points with its rules_config updated by `rules_patch`
+        (saved unless dry_run). Raises ValueError for an unknown stage, invalid scoring
+        rules or tie-breakers.
+        """
+        from app.services.tournament_service import TournamentService
+
+        stage = await self.session.get(Stage, stage_id)
+        if not stage:
+            raise ValueError("Stage not found")
+        rules_config = {**(stage.rules_config or {}), **(rules_patch or {})}
+        # Scored under the new rules without touching the stage itself until it is saved
+        target = Stage(id=stage.id, tournament_id=stage.tournament_id, name=stage.name,
+                       stage_type=stage.stage_type, sequence_order=stage.sequence_order,
+                       rules_config=rules_config, wildcard_rules=stage.wildcard_rules)
+        # Both validated before anything is read or written, also for stages without results
+        rules = await load_stage_rules(self.session, target)
+        TieBreakEngine.chain(rules_config)
+
+        # Ids as text, turned into one uuid.UUID per distinct value (result ids stay text:
+        # only the changed ones are ever bound again)
+        stmt = (
+            select(cast(RaceResult.id, String), cast(RaceResult.race_id, String), cast(RaceResult.player_id, String),
+                   RaceResult.rank, RaceResult.points_awarded, cast(Race.match_id, String), Race.race_number)
+            .join(Race, Race.id == RaceResult.race_id)
+            .join(Match, Match.id == Race.match_id)
+            .join(Group, Group.id == Match.group_id)
+            .where(Group.stage_id == stage_id)
+        )
+        races: Dict[UUID, List[_Scored]] = defaultdict(list)
+        race_keys: Dict[UUID, tuple] = {}
+        player_ids = set()
+        uuids: Dict[str, UUID] = {}
+
+        def as_uuid(value: str) -> UUID:
+            found = uuids.get(value)
+            if found is None:
+                found = uuids[value] = UUID(value)
+            return found
+
+        for rid, race_id, player_id, rank, points, match_id, race_number in (await self.session.exec(stmt)).all():
+            race_id, player_id = as_uuid(race_id), as_uuid(player_id)
+            if race_id not in race_keys:
+                race_keys[race_id] = (as_uuid(match_id), race_number)
+            races[race_id].append(_Scored(rid, race_id, player_id, rank, points, points))
+            player_ids.add(player_id)
+        players_map = {
+            str(p.id): p for p in
+            (await self.session.exec(select(Player).where(Player.id.in_(player_ids)))).all()
+        } if player_ids else {}
+
+        changed_races = []
+        for race_id, results in races.items():
+            ScoringEngine.calculate_race_points(results, players_map, rules)
+            if any(r.points_awarded != r.old_points for r in results):
+                changed_races.append(race_id)
+        changes = [r for race_id in changed_races for r in races[race_id]
+                   if r.points_awarded != r.old_points]
+
+        diff = await self._ranking_diff(TournamentService(self.session), stage, target, races, race_keys)
+        summary = {
+            "stage_id": stage.id,
+            "dry_run": dry_run,
+            "rules_config": rules_config,
+            "races": len(races),
+            "races_changed": len(changed_races),
+            "results_changed": len(changes),
+            "ranking_diff": diff,
+        }
+        if dry_run:
+            return summary
+
+        log = ResultLog(self.session)
+        # Import results from before the event log while they still hold the old points
+        await log.ensure_backfilled(stage.id)
+
+        table = RaceResult.__table__
+        rows = [{"rid": r.id, "points": r.points_awarded} for r in changes]
+        for i in range(0, len(rows), CHUNK_ROWS):
+            await self.session.execute(
+                update(table).where(table.c.id == bindparam("rid")).values(points_awarded=bindparam("points")),
+                rows[i:i + CHUNK_ROWS],
+            )
+
+        now = datetime.utcnow()
+        events = [
+            {"stage_id": stage.id, "match_id": race_keys[race_id][0], "race_id": race_id,
+             "race_number": race_keys[race_id][1], "kind": "rescored", "created_at": now,
+             "results": [[str(r.player_id), r.rank, r.points_awarded] for r in races[race_id]]}
+            for race_id in changed_races
+        ]
+        for i in range(0, len(events), CHUNK_ROWS):
+            await self.session.execute(insert(ResultEvent.__table__), events[i:i + CHUNK_ROWS])
+
+        # First places can move with the points
+        await PlayerStatsService(self.session).refresh(list({r.player_id for r in changes}))
+
+        stage.rules_config = rules_config
+        self.session.add(stage)
+        await self.session.commit()
+
+        for namespace in DERIVED_CACHES:
+            await invalidate(namespace)
+        return summary
+
+    async def _ranking_diff(self, service, stage: Stage, target: Stage,
+                            races: Dict[UUID, List[_Scored]], race_keys: Dict[UUID, tuple]) -> List[Dict[str, Any]]:
+        """Players whose rank or points move, ordered by their new rank."""
+        if not races:
+            return []
+        scored = [(r, race_keys[race_id][0]) for race_id, results in races.items() for r in results]
+        after = await service.standings_from_results(target, scored)
+        old_points = [_Scored(r.id, r.race_id, r.player_id, r.rank, r.old_points, r.old_points) for r, _ in scored]
+        before = {
+            s["player_id"]: s for s in
+            await service.standings_from_results(stage, list(zip(old_points, (m for _, m in scored))))
+        }
+        diff = []
+        for s in after:
+            old = before.get(s["player_id"], {})
+            if old.get("rank") != s["rank"] or old.get("total_points") != s["total_points"]:
+                diff.append({
+                    "player_id": s["player_id"],
+                    "player_name": s["player_name"],
+                    "old_rank": old.get("rank"),
+                    "new_rank": s["rank"],
+                    "old_points": old.get("total_points"),
+                    "new_points": s["total_points"],
+                })
+        return diff
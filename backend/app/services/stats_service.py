@@ -0,0 +1,230 @@
+"""
+Background maintenance of the Player.stats aggregate cache.
+
+Counters per player (all-time, every tournament):
+    first_place_count  races won (most points in the race, as in ScoringEngine)
+    race_count         races played
+    match_count        matches played
+    ace_count          matches won outright (more than half of the races)
+    tournament_count   tournaments played
+
+The job follows RaceResult.created_at with a high-water mark stored in
+JobCheckpoint. Every cycle takes the players with results newer than the mark
+and recomputes their counters with one aggregate query, so a re-submitted race
+(old results deleted, new ones inserted) corrects itself instead of double
+counting. Players a correction drops from a race have no new result to find;
+record_race_result refreshes them in its own transaction.
+
+With several web workers only one runs a cycle at a time: on Postgres each
+cycle first takes a session-level advisory lock (STATS_JOB_LOCK_ID) on a
+connection of its own, and the workers that don't get it skip the cycle.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import and_, bindparam, case, distinct, func, text, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core import metrics
+from app.models import Player, Race, RaceResult, Match, Group, Stage, JobCheckpoint
+
+JOB_NAME = "player_stats"
+
+# Advisory lock held by the worker running a cycle ("stat" in ASCII; bootstrap uses "meow")
+STATS_JOB_LOCK_ID = 0x73746174
+
+# Seconds between cycles once caught up; 0 disables the job
+STATS_JOB_INTERVAL = float(os.getenv("STATS_JOB_INTERVAL", "30"))
+
+# Results younger than this are left for the next cycle: created_at is set before
+# the commit, so a slow transaction may still land behind the mark
+SETTLE_SECONDS = 5.0
+
+# Results per cycle, and players per aggregate query
+BATCH_RESULTS = 5000
+BATCH_PLAYERS = 500
+
+STAT_KEYS = ("first_place_count", "race_count", "match_count", "ace_count", "tournament_count")
+
+
+class PlayerStatsService:
+    def __init__(self, session: AsyncSession, settle_seconds: float = SETTLE_SECONDS):
+        self.session = session
+        self.settle_seconds = settle_seconds
+
+    async def checkpoint(self) -> Optional[JobCheckpoint]:
+        return await self.session.get(JobCheckpoint, JOB_NAME)
+
+    async def backlog(self) -> int:
+        """Race results not yet folded into Player.stats."""
+        state = await self.checkpoint()
+        stmt = select(func.count()).select_from(RaceResult)
+        if state and state.high_water:
+            stmt = stmt.where(RaceResult.created_at > state.high_water)
+        return (await self.session.exec(stmt)).one()
+
+    async def run_once(self, batch: int = BATCH_RESULTS) -> Dict[str, Any]:
+        """
+        Folds up to about `batch` new results into Player.stats (all results sharing
+        the last timestamp are included) and moves the mark past them. Without a
+        checkpoint every player is rebuilt first.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        state = await self.checkpoint()
+        if state is None or state.high_water is None:
+            player_ids = (await self.session.exec(select(distinct(RaceResult.player_id)))).all()
+            upper = cutoff
+        else:
+            window = and_(RaceResult.created_at > state.high_water, RaceResult.created_at <= cutoff)
+            upper = (await self.session.exec(
+                select(RaceResult.created_at).where(window)
+                .order_by(RaceResult.created_at).offset(batch - 1).limit(1)
+            )).first() or cutoff
+            window = and_(RaceResult.created_at > state.high_water, RaceResult.created_at <= upper)
+            player_ids = (await self.session.exec(select(distinct(RaceResult.player_id)).where(window))).all()
+
+        await self.refresh(player_ids)
+        await self._save(upper)
+        return {"players": len(player_ids), "high_water": upper, "caught_up": upper == cutoff}
+
+    async def rebuild(self) -> int:
+        """Recomputes every player with results, e.g. after results were deleted outright."""
+        player_ids = (await self.session.exec(select(distinct(RaceResult.player_id)))).all()
+        await self.refresh(player_ids)
+        await self.session.commit()
+        return len(player_ids)
+
+    async def refresh(self, player_ids: List[UUID]):
+        """Recomputes the counters of `player_ids` in the caller's transaction."""
+        for i in range(0, len(player_ids), BATCH_PLAYERS):
+            chunk = player_ids[i:i + BATCH_PLAYERS]
+            counters = await self.aggregate(chunk)
+            rows = [{"pid": pid, "stats": counters.get(pid, dict.fromkeys(STAT_KEYS, 0))} for pid in chunk]
+            table = Player.__table__
+            await self.session.execute(
+                update(table).where(table.c.id == bindparam("pid")).values(stats=bindparam("stats")), rows
+            )
+
+    async def aggregate(self, player_ids: List[UUID]) -> Dict[UUID, Dict[str, int]]:
+        """Counters of `player_ids`, straight from the race results."""
+        if not player_ids:
+            return {}
+        # Best score of every race these players were in (a win = the race's top score, if > 0)
+        their_races = select(RaceResult.race_id).where(RaceResult.player_id.in_(player_ids))
+        top = (
+            select(RaceResult.race_id, func.max(RaceResult.points_awarded).label("top"))
+            .where(RaceResult.race_id.in_(their_races))
+            .group_by(RaceResult.race_id)
+            .subquery()
+        )
+        won = case((and_(top.c.top > 0, RaceResult.points_awarded == top.c.top), 1), else_=0)
+        per_match = (
+            select(
+                RaceResult.player_id, Race.match_id, Stage.tournament_id,
+                func.count().label("races"), func.sum(won).label("wins"),
+            )
+            .join(top, top.c.race_id == RaceResult.race_id)
+            .join(Race, Race.id == RaceResult.race_id)
+            .join(Match, Match.id == Race.match_id)
+            .join(Group, Group.id == Match.group_id)
+            .join(Stage, Stage.id == Group.stage_id)
+            .where(RaceResult.player_id.in_(player_ids))
+            .group_by(RaceResult.player_id, Race.match_id, Stage.tournament_id)
+            .subquery()
+        )
+        stmt = select(
+            per_match.c.player_id,
+            func.sum(per_match.c.wins),
+            func.sum(per_match.c.races),
+            func.count(),
+            func.sum(case((per_match.c.wins * 2 > per_match.c.races, 1), else_=0)),
+            func.count(distinct(per_match.c.tournament_id)),
+        ).group_by(per_match.c.player_id)
+
+        return {
+            row[0]: dict(zip(STAT_KEYS, (int(v or 0) for v in row[1:])))
+            for row in (await self.session.exec(stmt)).all()
+        }
+
+    async def _save(self, high_water: datetime):
+        state = await self.checkpoint()
+        if state is None:
+            state = JobCheckpoint(name=JOB_NAME)
+        state.high_water = high_water
+        state.updated_at = datetime.utcnow()
+        self.session.add(state)
+        await self.session.commit()
+
+
+class PlayerStatsJob:
+    """Runs PlayerStatsService.run_once in the background of a web worker."""
+
+    def __init__(self, bind: Any, interval: float = STATS_JOB_INTERVAL):
+        self.bind = bind
+        self.interval = interval
+        # Last sampled backlog, read by the background_queue_depth gauge
+        self.depth = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.interval <= 0 or self._task:
+            return
+        metrics.register_queue(JOB_NAME, lambda: self.depth)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_until_idle(self) -> int:
+        """
+        Cycles until the mark reaches the settle cutoff; returns players updated.
+        Returns 0 right away when another worker holds the job's lock.
+        """
+        updated = 0
+        async with self._leader() as leader, AsyncSession(self.bind, expire_on_commit=False) as session:
+            service = PlayerStatsService(session)
+            if not leader:
+                self.depth = await service.backlog()
+                return 0
+            while True:
+                cycle = await service.run_once()
+                updated += cycle["players"]
+                self.depth = await service.backlog()
+                if cycle["caught_up"]:
+                    return updated
+
+    @asynccontextmanager
+    async def _leader(self) -> AsyncIterator[bool]:
+        """Whether this worker may run the cycle (always, without Postgres advisory locks)."""
+        if self.bind.dialect.name != "postgresql":
+            yield True
+            return
+        async with self.bind.connect() as conn:
+            taken = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": STATS_JOB_LOCK_ID})).scalar()
+            await conn.commit()
+            try:
+                yield bool(taken)
+            finally:
+                if taken:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": STATS_JOB_LOCK_ID})
+                    await conn.commit()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_until_idle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Retried next cycle; the checkpoint only moves after a commit
+                print(f"Warning: player stats job failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -1,8 +1,21 @@
-from sqlmodel import select
+from sqlmodel import select, func
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models import Tournament, Stage, Group, Match, MatchParticipant, Player, Race, RaceResult, GroupParticipant
 from app.services.logic.scoring import ScoringEngine
-from typing import List, Dict, Any
+from app.services.logic.rules import load_stage_rules
+from app.services.logic.schedule import ScheduleEngine
+from app.services.logic.host_assignment import HostAssignmentEngine
+from app.services.logic.bracket import BracketEngine
+from app.services.logic.tiebreak import TieBreakEngine
+from app.services.logic.progression import ProgressionEngine
+from app.services.logic.timeslots import TimeSlotEngine
+from app.services.rating_service import RatingService
+from app.services.event_service import ResultLog
+from app.services.stats_service import PlayerStatsService
+from app.models.tournament import MatchStatus
+from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from datetime import datetime, timedelta
 import random
 from uuid import UUID
 
@@ -76,7 +89,9 @@ class TournamentService:
     async def generate_matches_for_stage(self, stage_id: str) -> List[Match]:
         """
         Generates matches for all groups in the stage.
-        Specific logic for "6-player group audition" (6人组海选).
+        Match-ups come from ScheduleEngine per group; hosts are then assigned for the
+        whole stage at once (HostAssignmentEngine), balanced against hosts already
+        done in the tournament's other stages and capped by `max_hosts_per_player`.
         """
         stage = await self.session.get(Stage, stage_id)
         if not stage:
@@ -86,75 +101,24 @@ class TournamentService:
         stmt = select(Group).where(Group.stage_id == stage_id)
         groups = (await self.session.exec(stmt)).all()
 
-        created_matches = []
+        # 1. Plan match-ups for every group: [(group, match number, [player ids])]
+        planned = []
         for group in groups:
-             matches = await self._generate_matches_for_group(group)
-             created_matches.extend(matches)
-
-        return created_matches
-
-    async def _generate_matches_for_group(self, group: Group) -> List[Match]:
-        """
-        Logic for 6-player group:
-        - 10 matches total
-        - 3 players per match
-        - Each player plays exactly 5 matches
-        - Balanced pairs (BIBD)
-        - Host assignment balanced
-        """
-        # Fetch participants
-        stmt = select(GroupParticipant).where(GroupParticipant.group_id == group.id)
-        participants = (await self.session.exec(stmt)).all()
-        player_ids = [p.player_id for p in participants]
+            for idx, player_ids in enumerate(await self._plan_group_matches(group, stage)):
+                planned.append((group, idx, player_ids))
+
+        # 2. Hosts for the whole stage
+        prior_counts = await self._host_counts_in_other_stages(stage)
+        rules = stage.rules_config or {}
+        hosts = HostAssignmentEngine.assign(
+            [player_ids for _, _, player_ids in planned],
+            max_per_player=rules.get("max_hosts_per_player"),
+            prior_counts=prior_counts,
+        )
 
-        # We expect 6 players. If not 6, we log warning/error or proceed best effort?
-        # For this specific task, we implement the 6-player logic.
-        if len(player_ids) != 6:
-            # If not 6, we skip match generation for this group to avoid errors, or raise.
-            # Assuming strictly 6 as per requirement.
-            # But let's raise for visibility if this logic is strictly for 6.
-            # Check context: might be dev data. Log warning.
-            # raise ValueError(f"Group {group.id} has {len(player_ids)} players, expected 6 for audition logic.")
-            pass # Relaxed for dev
-
-        # Hardcoded matrix (0-5 indices)
-        # 10 Matches, 3 Participants each.
-        matches_indices = [
-           (0, 1, 2), (0, 1, 3), (0, 2, 4), (0, 3, 5), (0, 4, 5),
-           (1, 2, 5), (1, 3, 4), (1, 4, 5), (2, 3, 4), (2, 3, 5)
-        ]
-
-        # If less than 6 players, adjust indices or skip (basic fallback for dev)
-        if len(player_ids) < 6:
-             matches_indices = [(0, 1, 2)] if len(player_ids) >= 3 else []
-
-
-        matches = []
-
-        # Host tracking: player_id -> count
-        host_counts = {pid: 0 for pid in player_ids}
-
-        for idx, indices in enumerate(matches_indices):
-            # Resolve players for this match
-            # Ensure indices are within bounds
-            match_player_ids = []
-            for i in indices:
-                if i < len(player_ids):
-                    match_player_ids.append(player_ids[i])
-
-            if len(match_player_ids) < 3:
-                continue
-
-            # Determine Host
-            # Sort match_players by host_count ascending, then random tie-break
-            candidates = list(match_player_ids)
-            random.shuffle(candidates)
-            candidates.sort(key=lambda p: host_counts[p])
-
-            host_id = candidates[0]
-            host_counts[host_id] += 1
-
-            # Create Match
+        # 3. Persist in one transaction
+        created_matches = []
+        for (group, idx, player_ids), host_id in zip(planned, hosts):
             match = Match(
                 group_id=group.id,
                 name=f"{group.name} - Match {idx + 1}",
@@ -162,18 +126,137 @@ class TournamentService:
                 status="pending"
             )
             self.session.add(match)
-            await self.session.commit()
-            await self.session.refresh(match)
+            created_matches.append((match, player_ids))
+
+        # Flush to get match IDs
+        await self.session.flush()
+        for match, player_ids in created_matches:
+            for pid in player_ids:
+                self.session.add(MatchParticipant(match_id=match.id, player_id=pid))
+
+        # 4. Start times, when the tournament has a start time to count from
+        start_time = await self._schedule_start(stage)
+        if start_time is not None:
+            self._apply_schedule(stage, created_matches, start_time)
+
+        await self.session.commit()
+        return [match for match, _ in created_matches]
 
-            # Create Participants
-            for pid in match_player_ids:
-                mp = MatchParticipant(match_id=match.id, player_id=pid)
-                self.session.add(mp)
+    async def schedule_stage(self, stage_id: str, start_time: Optional[datetime] = None,
+                             slot_minutes: Optional[int] = None, host_rest: Optional[int] = None,
+                             max_parallel: Optional[int] = None) -> Dict[str, Any]:
+        """
+        (Re)assigns start times to the stage's unfinished matches (TimeSlotEngine): nobody
+        plays two matches at once, hosts get rest slots, and the stage is as short as possible.
 
-            matches.append(match)
+        Unset arguments come from Stage.rules_config (slot_minutes, host_rest_slots,
+        max_parallel_matches). The start defaults to one slot after the tournament's last
+        scheduled match in other stages, else the tournament start time.
+        """
+        stage = await self.session.get(Stage, stage_id)
+        if not stage:
+            raise ValueError("Stage not found")
+        if start_time is None:
+            start_time = await self._schedule_start(stage)
+            if start_time is None:
+                raise ValueError("No start time: set the tournament start time or pass one")
 
+        stmt = (
+            select(Match)
+            .join(Group, Match.group_id == Group.id)
+            .where(Group.stage_id == stage.id)
+            .where(Match.status != MatchStatus.FINISHED)
+            .order_by(Match.name, Match.id)
+        )
+        matches = (await self.session.exec(stmt)).all()
+        participants = defaultdict(list)
+        if matches:
+            stmt_seats = select(MatchParticipant.match_id, MatchParticipant.player_id).where(
+                MatchParticipant.match_id.in_([m.id for m in matches])
+            )
+            for match_id, player_id in (await self.session.exec(stmt_seats)).all():
+                participants[match_id].append(player_id)
+
+        summary = self._apply_schedule(
+            stage, [(m, participants[m.id]) for m in matches], start_time, slot_minutes, host_rest, max_parallel
+        )
         await self.session.commit()
-        return matches
+        return summary
+
+    def _apply_schedule(self, stage: Stage, entries: List[Any], start_time: datetime,
+                        slot_minutes: Optional[int] = None, host_rest: Optional[int] = None,
+                        max_parallel: Optional[int] = None) -> Dict[str, Any]:
+        """Sets Match.start_time for [(match, player ids)]; returns a summary of the timetable."""
+        rules = stage.rules_config or {}
+        slot_minutes = slot_minutes if slot_minutes is not None else rules.get("slot_minutes", 30)
+        host_rest = host_rest if host_rest is not None else rules.get("host_rest_slots", 1)
+        max_parallel = max_parallel if max_parallel is not None else rules.get("max_parallel_matches")
+        if slot_minutes <= 0 or host_rest < 0 or (max_parallel is not None and max_parallel <= 0):
+            raise ValueError("slot_minutes and max_parallel must be positive, host_rest not negative")
+
+        seats = [player_ids for _, player_ids in entries]
+        hosts = [match.host_player_id for match, _ in entries]
+        slots = TimeSlotEngine.assign(seats, hosts, host_rest, max_parallel)
+        for (match, _), slot in zip(entries, slots):
+            match.start_time = start_time + timedelta(minutes=slot * slot_minutes)
+            self.session.add(match)
+
+        length = max(slots) + 1 if slots else 0
+        return {
+            "matches": len(entries),
+            "slots": length,
+            "lower_bound": TimeSlotEngine.lower_bound(seats, hosts, host_rest, max_parallel),
+            "slot_minutes": slot_minutes,
+            "start_time": start_time,
+            "end_time": start_time + timedelta(minutes=length * slot_minutes),
+        }
+
+    async def _schedule_start(self, stage: Stage) -> Optional[datetime]:
+        """One slot after the last scheduled match of the tournament's other stages, else its start time."""
+        stmt = (
+            select(func.max(Match.start_time))
+            .join(Group, Match.group_id == Group.id)
+            .join(Stage, Group.stage_id == Stage.id)
+            .where(Stage.tournament_id == stage.tournament_id)
+            .where(Stage.id != stage.id)
+        )
+        latest = (await self.session.exec(stmt)).first()
+        if latest is not None:
+            return latest + timedelta(minutes=(stage.rules_config or {}).get("slot_minutes", 30))
+        tourney = await self.session.get(Tournament, stage.tournament_id)
+        return tourney.start_time if tourney else None
+
+    async def _plan_group_matches(self, group: Group, stage: Stage) -> List[List[UUID]]:
+        """
+        Builds the group's round-robin from ScheduleEngine:
+        - `players_per_match` players per match (Stage.rules_config, default 3)
+        - each player plays `matches_per_player` matches (default: group size - 1)
+        - pair meetings as even as possible (6 players -> the 10-match BIBD, every pair meets twice)
+        """
+        # Fetch participants
+        stmt = select(GroupParticipant).where(GroupParticipant.group_id == group.id)
+        participants = (await self.session.exec(stmt)).all()
+        player_ids = [p.player_id for p in participants]
+
+        rules = stage.rules_config or {}
+        players_per_match = rules.get("players_per_match", 3)
+        matches_indices = ScheduleEngine.generate(
+            len(player_ids), players_per_match, rules.get("matches_per_player")
+        )
+        return [[player_ids[i] for i in indices] for indices in matches_indices]
+
+    async def _host_counts_in_other_stages(self, stage: Stage) -> Dict[UUID, int]:
+        """Hosts per player across the tournament's other stages (for cross-stage balance)."""
+        stmt = (
+            select(Match.host_player_id, func.count())
+            .join(Group, Match.group_id == Group.id)
+            .join(Stage, Group.stage_id == Stage.id)
+            .where(Stage.tournament_id == stage.tournament_id)
+            .where(Stage.id != stage.id)
+            .where(Match.host_player_id != None)
+            .group_by(Match.host_player_id)
+        )
+        return {host_id: count for host_id, count in (await self.session.exec(stmt)).all()}
 
     async def record_race_result(self, match_id: str, race_number: int, rankings: List[Any]):
         """
@@ -204,10 +287,18 @@ class TournamentService:
             await self.session.commit()
             await self.session.refresh(race)
 
+        stage = (await self.session.exec(
+            select(Stage).join(Group, Group.stage_id == Stage.id).where(Group.id == match.group_id)
+        )).first()
+        log = ResultLog(self.session)
+        if stage:
+            # Results from before the event log go in first, so a correction has its original
+            await log.ensure_backfilled(stage.id)
+
         # Clear existing results for this race if re-submitting?
         # For simplicity, let's delete existing results for this race
-        existing_results = await self.session.exec(select(RaceResult).where(RaceResult.race_id == race.id))
-        for old_res in existing_results.all():
+        existing_results = (await self.session.exec(select(RaceResult).where(RaceResult.race_id == race.id))).all()
+        for old_res in existing_results:
             await self.session.delete(old_res)
 
         # 3. Create RaceResults
@@ -221,26 +312,59 @@ class TournamentService:
             )
             results.append(res)
 
-        # 4. Calculate Points (Engine)
-        calculated_results = ScoringEngine.calculate_race_points(results, players_map)
+        # 4. Calculate Points (Engine), with the stage's compiled rules
+        rules = await load_stage_rules(self.session, stage) if stage else None
+        calculated_results = ScoringEngine.calculate_race_points(results, players_map, rules)
 
         # 5. Save to DB
         for res in calculated_results:
             self.session.add(res)
+        if stage:
+            log.append(stage.id, match.id, race.id, race_number, calculated_results, corrected=bool(existing_results))
+
+        # Cross-tournament ratings move with the result, in the same transaction
+        await RatingService(self.session).apply_race(race.id, calculated_results, players_map)
+
+        # Players a correction drops from the race leave no new result behind for the
+        # stats job to pick up, so their counters are recomputed here
+        dropped = {UUID(str(r.player_id)) for r in existing_results} - {UUID(str(r.player_id)) for r in calculated_results}
+        if dropped:
+            await PlayerStatsService(self.session).refresh(list(dropped))
 
         # Update match status to finished
-        match.status = "finished"
+        # (bracket matches only once `races_per_match` races are in)
+        bracket = BracketEngine(self.session)
+        node = await bracket.node_for_match(match.id)
+        finished = node is None or await bracket.races_complete(node)
+        match.status = "finished" if finished else "pending"
         self.session.add(match)
 
+        # Knockout stages: move the finishers on to their next matches, in the same
+        # transaction as the results
+        if node is not None and finished:
+            try:
+                await bracket.advance(node, commit=False)
+            except ValueError:
+                # The result and the bracket go in together or not at all
+                await self.session.rollback()
+                raise
+
         await self.session.commit()
         return calculated_results
 
     async def get_stage_standings(self, stage_id: str) -> List[Dict[str, Any]]:
         from collections import defaultdict
         
-        stage = await self.session.get(Stage, stage_id)
-        if not stage:
+        # Stage and its tournament in one query (the tournament's points_map is the
+        # scoring fallback, load_stage_rules then finds it in the session)
+        row = (await self.session.exec(
+            select(Stage, Tournament)
+            .outerjoin(Tournament, Stage.tournament_id == Tournament.id)
+            .where(Stage.id == stage_id)
+        )).first()
+        if not row:
             raise ValueError("Stage not found")
+        stage = row[0]
             
         # 1. Fetch all RaceResults for this stage
         # Join: RaceResult -> Race -> Match -> Group -> Stage
@@ -256,17 +380,25 @@ class TournamentService:
         
         if not all_data:
             return []
+        return await self.standings_from_results(stage, [(rr, match.id) for rr, match in all_data])
 
+    async def standings_from_results(self, stage: Stage, all_data: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Standings from (race result, match id) pairs. Anything shaped like a RaceResult
+        (race_id, player_id, rank, points_awarded) will do, e.g. results replayed from
+        the event log.
+        """
         # 2. Group by Match
         results_by_match = defaultdict(list)
-        for rr, match in all_data:
-            results_by_match[match.id].append(rr)
+        for rr, match_id in all_data:
+            results_by_match[match_id].append(rr)
             
         # 3. Calculate Scores & Aggregate
+        rules = await load_stage_rules(self.session, stage)
         global_stats = defaultdict(lambda: {"points": 0, "wins": 0, "matches": 0, "player_id": None})
         
         for match_id, race_results in results_by_match.items():
-            match_scores = ScoringEngine.calculate_match_score(race_results, stage.rules_config)
+            match_scores = ScoringEngine.calculate_match_score(race_results, rules)
             for score in match_scores:
                 pid = score["player_id"]
                 global_stats[pid]["player_id"] = pid
@@ -274,27 +406,40 @@ class TournamentService:
                 global_stats[pid]["wins"] += score["wins"]
                 global_stats[pid]["matches"] += 1
 
-        # 4. Fetch Player Names
+        # Dominance Bonus (bonus_rules), one pass for the whole stage
+        bonuses = ProgressionEngine.calculate_dominance_bonuses(
+            stage,
+            [rr for rr, _ in all_data],
+            {str(pid): stats["matches"] for pid, stats in global_stats.items()},
+        )
+
+        # 4. Fetch Player Names (and the cached all-time counters, if a tie-breaker wants them)
         player_ids = list(global_stats.keys())
-        players = await self.session.exec(select(Player).where(Player.id.in_(player_ids)))
-        player_map = {p.id: p.in_game_name for p in players.all()}
+        players = (await self.session.exec(select(Player).where(Player.id.in_(player_ids)))).all()
+        player_map = {p.id: p.in_game_name for p in players}
+        chain = TieBreakEngine.chain(stage.rules_config)
+        career = None
+        if "career_first_places" in chain:
+            career = {p.id: (p.stats or {}).get("first_place_count", 0) for p in players}
         
         # 5. Format & Sort
         standings = []
         for pid, stats in global_stats.items():
+            bonus = bonuses.get(str(pid), 0)
             standings.append({
                 "player_id": pid,
                 "player_name": player_map.get(pid, "Unknown"),
-                "total_points": stats["points"],
+                "total_points": stats["points"] + bonus,
+                "bonus_points": bonus,
                 "wins": stats["wins"],
                 "matches_played": stats["matches"]
             })
+            if career is not None:
+                standings[-1]["career_first_places"] = career.get(pid, 0)
             
-        # Sort by Points desc, then Wins desc
-        standings.sort(key=lambda x: (x["total_points"], x["wins"]), reverse=True)
-        
-        # Add Rank
-        for i, entry in enumerate(standings):
-            entry["rank"] = i + 1
-            
+        # Sort by Points desc, then the stage's tie-breakers (adds Rank)
+        standings = TieBreakEngine.sort_standings(
+            standings, (rr for rr, _ in all_data), stage.rules_config, points_key="total_points"
+        )
+
         return standings
@@ -0,0 +1,61 @@
+"""
+Tournament archives: one compressed file per tournament.
+
+    python archive.py export <tournament_id> season-3.jsonl.gz
+    python archive.py restore season-3.jsonl.gz
+
+Uses DATABASE_URL like the app. A restore runs in a single transaction and
+refuses to overwrite a tournament that already exists.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SQL_ECHO", "false")
+
+
+async def run(args: argparse.Namespace) -> int:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.db import engine
+    from app.services.archive_service import TournamentArchive
+
+    start = time.perf_counter()
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            archive = TournamentArchive(session)
+            if args.command == "export":
+                counts = await archive.export(args.tournament_id, args.file)
+            else:
+                restored = await archive.restore(args.file)
+                counts = restored["counts"]
+                print(f"Restored tournament {restored['tournament_id']}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        await engine.dispose()
+
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        print(f"  {table:<24}{count:>10}")
+    total = sum(counts.values())
+    print(f"{total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export or restore a tournament archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write a tournament to an archive file")
+    export.add_argument("tournament_id")
+    export.add_argument("file")
+    restore = commands.add_parser("restore", help="Load an archive file into the database")
+    restore.add_argument("file")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
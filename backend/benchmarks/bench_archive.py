@@ -0,0 +1,103 @@
+"""
+Tournament archive throughput.
+
+Generates one synthetic tournament, exports it with TournamentArchive, then
+restores the file into an empty database, reporting rows/second for both
+directions and the archive size as JSON.
+
+    python -m benchmarks.bench_archive --players 10000 --groups 1667
+
+Use Postgres URLs for representative numbers; SQLite runs give the shape.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+DEFAULT_SOURCE_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'meow_bench_archive_src.sqlite3')}"
+DEFAULT_TARGET_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'meow_bench_archive_dst.sqlite3')}"
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tournament archive export/restore benchmark")
+    parser.add_argument("--source-url", default=DEFAULT_SOURCE_URL)
+    parser.add_argument("--target-url", default=DEFAULT_TARGET_URL)
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--groups", type=int, default=1667)
+    parser.add_argument("--matches-per-group", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+async def _fresh(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+
+    engine = create_async_engine(url, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    return engine
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.services.archive_service import TournamentArchive
+    from benchmarks.generator import TournamentSpec, generate_tournament
+
+    source = await _fresh(args.source_url)
+    async with AsyncSession(source, expire_on_commit=False) as session:
+        generated = await generate_tournament(session, TournamentSpec(
+            players=args.players, groups=args.groups, matches_per_group=args.matches_per_group, seed=args.seed))
+
+    path = os.path.join(tempfile.gettempdir(), "meow_bench_archive.jsonl.gz")
+    export_ms, restore_ms = [], []
+    counts = {}
+    for _ in range(args.repeats):
+        async with AsyncSession(source, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            counts = await TournamentArchive(session).export(generated.tournament_id, path)
+            export_ms.append((time.perf_counter() - start) * 1000)
+
+        target = await _fresh(args.target_url)
+        async with AsyncSession(target, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            await TournamentArchive(session).restore(path)
+            restore_ms.append((time.perf_counter() - start) * 1000)
+        await target.dispose()
+    await source.dispose()
+
+    rows = sum(counts.values())
+    export, restore = _summarize(export_ms), _summarize(restore_ms)
+    return {
+        "rows": rows,
+        "counts": counts,
+        "archive_bytes": os.path.getsize(path),
+        "export": export,
+        "restore": restore,
+        "export_rows_per_s": round(rows / (export["median_ms"] / 1000)),
+        "restore_rows_per_s": round(rows / (restore["median_ms"] / 1000)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    result = asyncio.run(run(args))
+    print(json.dumps({
+        "meta": {"git_revision": _git_revision(), "players": args.players, "groups": args.groups,
+                 "matches_per_group": args.matches_per_group, "repeats": args.repeats,
+                 "source_url": args.source_url, "target_url": args.target_url},
+        "result": result,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Payload size and throughput: JSON (orjson) vs MessagePack (UUIDs as bytes).
+
+Uses the same synthetic 1000-match matches_view payload as
+bench_serialization and reports raw/gzip sizes plus encode/decode times.
+
+    python -m benchmarks.bench_msgpack --matches 1000
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import msgpack
+import orjson
+
+from app.core.responses import packb
+from benchmarks.bench_serialization import build_view
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="JSON vs MessagePack payload comparison")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--matches-per-group", type=int, default=10)
+    parser.add_argument("--players-per-match", type=int, default=3)
+    parser.add_argument("--races-per-match", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def _time(fn: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summarize(samples)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    view = build_view(args)
+
+    formats = {
+        "json": (lambda: orjson.dumps(view), orjson.loads),
+        "msgpack": (lambda: packb(view), lambda b: msgpack.unpackb(b, raw=False)),
+    }
+    results = []
+    for name, (encode, decode) in formats.items():
+        payload = encode()
+        encode_stats = _time(encode, args.repeats)
+        decode_stats = _time(lambda: decode(payload), args.repeats)
+        results.append({
+            "format": name,
+            "bytes": len(payload),
+            "gzip_bytes": len(gzip.compress(payload)),
+            "encode_median_ms": encode_stats["median_ms"],
+            "decode_median_ms": decode_stats["median_ms"],
+            "encode_mb_per_s": round(len(payload) / 1e6 / (encode_stats["median_ms"] / 1000), 1),
+        })
+        print(f"{name}: {len(payload)} bytes, encode {encode_stats['median_ms']:.2f} ms", file=sys.stderr)
+
+    json_size = results[0]["bytes"]
+    for r in results:
+        r["size_vs_json"] = round(r["bytes"] / json_size, 3)
+
+    print(json.dumps({
+        "meta": {"git_revision": _git_revision(), "matches": args.matches, "repeats": args.repeats},
+        "results": results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Batch rating recompute over a large result history.
+
+Generates one synthetic tournament, then times RatingService.recompute (load every
+race result, replay pairwise Elo in submission order, rewrite ratings and history)
+and reports the phases' total plus results/second as JSON.
+
+    python -m benchmarks.bench_rating --players 10000 --groups 1667 --matches-per-group 20
+
+Use a Postgres --database-url for representative numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+DEFAULT_SQLITE_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'meow_bench_rating.sqlite3')}"
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rating recompute benchmark")
+    parser.add_argument("--database-url", default=DEFAULT_SQLITE_URL)
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--groups", type=int, default=1667)
+    parser.add_argument("--matches-per-group", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.services.rating_service import RatingService
+    from benchmarks.generator import TournamentSpec, generate_tournament
+
+    engine = create_async_engine(args.database_url, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        generated = await generate_tournament(session, TournamentSpec(
+            players=args.players, groups=args.groups, matches_per_group=args.matches_per_group, seed=args.seed))
+
+    samples = []
+    summary = {}
+    for _ in range(args.repeats):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            summary = await RatingService(session).recompute()
+            samples.append((time.perf_counter() - start) * 1000)
+    await engine.dispose()
+
+    timing = _summarize(samples)
+    return {
+        "race_results": generated.row_counts.get("race_results"),
+        **summary,
+        "recompute": timing,
+        "results_per_s": round(summary["history_rows"] / (timing["median_ms"] / 1000)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    result = asyncio.run(run(args))
+    print(json.dumps({
+        "meta": {"git_revision": _git_revision(), "players": args.players, "groups": args.groups,
+                 "matches_per_group": args.matches_per_group, "repeats": args.repeats,
+                 "database_url": args.database_url},
+        "result": result,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
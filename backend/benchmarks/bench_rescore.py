@@ -0,0 +1,91 @@
+"""
+Stage re-score after a points table change.
+
+Generates one synthetic tournament, then times RescoreService.rescore on its
+first stage: a dry run (recompute + ranking diff only) and the real run (batched
+UPDATE, rescored events, counters), alternating between two points tables so
+every repeat rewrites every result. Reports both timings as JSON.
+
+    python -m benchmarks.bench_rescore --players 10000 --groups 1667 --matches-per-group 20
+
+Use a Postgres --database-url for representative numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+DEFAULT_SQLITE_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'meow_bench_rescore.sqlite3')}"
+
+POINTS_TABLES = ([10, 6, 4, 3, 2, 1], [9, 5, 3, 2, 1])
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stage re-score benchmark")
+    parser.add_argument("--database-url", default=DEFAULT_SQLITE_URL)
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--groups", type=int, default=1667)
+    parser.add_argument("--matches-per-group", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.services.rescore_service import RescoreService
+    from benchmarks.generator import TournamentSpec, generate_tournament
+
+    engine = create_async_engine(args.database_url, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        generated = await generate_tournament(session, TournamentSpec(
+            players=args.players, groups=args.groups, matches_per_group=args.matches_per_group, seed=args.seed))
+
+    timings = {"dry_run": [], "rescore": []}
+    summary = {}
+    for i in range(args.repeats):
+        patch = {"points_map": POINTS_TABLES[i % 2]}
+        for mode in ("dry_run", "rescore"):
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                start = time.perf_counter()
+                summary = await RescoreService(session).rescore(generated.stage_id, patch, dry_run=mode == "dry_run")
+                timings[mode].append((time.perf_counter() - start) * 1000)
+    await engine.dispose()
+
+    rescore = _summarize(timings["rescore"])
+    return {
+        "race_results": generated.row_counts.get("race_results"),
+        "races": summary["races"],
+        "results_changed": summary["results_changed"],
+        "ranking_changes": len(summary["ranking_diff"]),
+        "dry_run": _summarize(timings["dry_run"]),
+        "rescore": rescore,
+        "results_per_s": round(summary["results_changed"] / (rescore["median_ms"] / 1000)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    result = asyncio.run(run(args))
+    print(json.dumps({
+        "meta": {"git_revision": _git_revision(), "players": args.players, "groups": args.groups,
+                 "matches_per_group": args.matches_per_group, "repeats": args.repeats,
+                 "database_url": args.database_url},
+        "result": result,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Serialization cost of a large matches_view payload.
+
+Compares the previous path (nested Pydantic models -> response_model
+validation -> jsonable_encoder -> json.dumps) with the current one (plain
+dicts -> orjson) for a synthetic stage, 1000 matches by default.
+
+    python -m benchmarks.bench_serialization --matches 1000
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.stages import GroupView, MatchView, ParticipantView, PlayerView
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="matches_view serialization benchmark")
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--matches-per-group", type=int, default=10)
+    parser.add_argument("--players-per-match", type=int, default=3)
+    parser.add_argument("--races-per-match", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def build_view(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """A matches_view payload in its plain-dict form."""
+    groups = []
+    n_groups = max(1, args.matches // args.matches_per_group)
+    for g in range(n_groups):
+        players = [{"id": uuid4(), "name": f"Player_{g}_{i}"} for i in range(6)]
+        matches = []
+        for m in range(args.matches_per_group):
+            members = [players[(m + i) % len(players)] for i in range(args.players_per_match)]
+            results = [
+                {"player_id": str(p["id"]), "rank": rank, "points": max(0, 10 - 2 * rank)}
+                for _ in range(args.races_per_match)
+                for rank, p in enumerate(members, start=1)
+            ]
+            matches.append({
+                "id": uuid4(),
+                "name": f"Group {g} - Match {m + 1}",
+                "status": "finished",
+                "host_player_id": members[0]["id"],
+                "participants": [{"player": p} for p in members],
+                "results": results,
+            })
+        standings = [
+            {"player_id": p["id"], "player_name": p["name"], "total_points": 40 - i, "wins": 3,
+             "matches_played": 5, "rank": i + 1}
+            for i, p in enumerate(players)
+        ]
+        groups.append({"id": uuid4(), "name": f"Group {g}", "matches": matches, "standings": standings})
+    return groups
+
+
+def pydantic_path(view: List[Dict[str, Any]], adapter: TypeAdapter) -> bytes:
+    # What the route used to do: build models, then FastAPI validates against
+    # response_model, runs jsonable_encoder and the stdlib encoder.
+    models = [
+        GroupView(
+            id=g["id"],
+            name=g["name"],
+            matches=[
+                MatchView(
+                    id=m["id"], name=m["name"], status=m["status"], host_player_id=m["host_player_id"],
+                    participants=[ParticipantView(player=PlayerView(**p["player"])) for p in m["participants"]],
+                    results=m["results"],
+                )
+                for m in g["matches"]
+            ],
+            standings=g["standings"],
+        )
+        for g in view
+    ]
+    validated = adapter.validate_python(models, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_path(view: List[Dict[str, Any]]) -> bytes:
+    return orjson.dumps(view)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    view = build_view(args)
+    adapter = TypeAdapter(List[GroupView])
+
+    results = []
+    for name, fn in (("pydantic_jsonable_encoder", lambda: pydantic_path(view, adapter)),
+                     ("orjson_dicts", lambda: orjson_path(view))):
+        fn()  # warm-up
+        samples = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            payload = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        results.append({"path": name, "bytes": len(payload), **_summarize(samples)})
+        print(f"{name}: median {results[-1]['median_ms']:.2f} ms", file=sys.stderr)
+
+    results[1]["speedup"] = round(results[0]["median_ms"] / results[1]["median_ms"], 1)
+    print(json.dumps({
+        "meta": {"git_revision": _git_revision(), "matches": args.matches, "repeats": args.repeats},
+        "results": results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
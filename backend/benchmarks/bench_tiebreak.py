@@ -0,0 +1,122 @@
+"""
+Tie-breaking cost on large, fully tied groups.
+
+Every player ends on the same points, so the whole group goes through the
+tie-breaker chain. Compares TieBreakEngine (head-to-head matrix built once)
+with a rescan baseline that recomputes each tied cluster's mini-league from
+the raw race results, which is what a straightforward implementation does.
+
+    python -m benchmarks.bench_tiebreak --players 500 1000 2000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.models.tournament import RaceResult
+from app.services.logic.tiebreak import TieBreakEngine
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tie-breaker benchmark on fully tied groups")
+    parser.add_argument("--players", type=int, nargs="+", default=[200, 1000, 2000])
+    parser.add_argument("--races-per-player", type=int, default=6)
+    parser.add_argument("--players-per-race", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def build_group(num_players: int, args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    ids = [str(uuid4()) for _ in range(num_players)]
+    results = []
+    num_races = num_players * args.races_per_player // args.players_per_race
+    for _ in range(num_races):
+        race_id = str(uuid4())
+        for rank, pid in enumerate(rng.sample(ids, args.players_per_race), start=1):
+            results.append(RaceResult(race_id=race_id, player_id=pid, rank=rank, points_awarded=0))
+    # Same points for everybody; a handful of win counts so first_places still matters
+    standings = [{"player_id": pid, "points": 100, "wins": rng.randint(0, 3)} for pid in ids]
+    return standings, results
+
+
+def rescan_sort(standings: List[Dict[str, Any]], results: List[RaceResult]) -> List[Dict[str, Any]]:
+    """Baseline: mini-league recomputed from every race result for each tied cluster."""
+    def mini_league(cluster):
+        ids = {e["player_id"] for e in cluster}
+        score = defaultdict(int)
+        by_race = defaultdict(list)
+        for r in results:
+            if r.player_id in ids:
+                by_race[r.race_id].append(r)
+        for rs in by_race.values():
+            rs.sort(key=lambda r: r.rank)
+            for i, r in enumerate(rs):
+                score[r.player_id] += len(rs) - 1 - 2 * i
+        return score
+
+    def split(cluster, key):
+        cluster = sorted(cluster, key=lambda e: -key(e))
+        groups, current = [], [cluster[0]]
+        for e in cluster[1:]:
+            if key(e) == key(current[0]):
+                current.append(e)
+            else:
+                groups.append(current)
+                current = [e]
+        groups.append(current)
+        return groups
+
+    def resolve(cluster, use_h2h=True):
+        if len(cluster) < 2:
+            return cluster
+        if not use_h2h:
+            return [e for g in split(cluster, lambda e: e["wins"]) for e in g]
+        score = mini_league(cluster)
+        out = []
+        for g in split(cluster, lambda e: score[e["player_id"]]):
+            out.extend(resolve(g, len(g) < len(cluster)))
+        return out
+
+    ranked = resolve(list(standings))
+    for rank, e in enumerate(ranked, start=1):
+        e["rank"] = rank
+    return ranked
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    results = []
+    for n in args.players:
+        standings, race_results = build_group(n, args)
+        row = {"players": n, "race_results": len(race_results)}
+        for name, fn in (("rescan", rescan_sort),
+                         ("matrix", lambda s, r: TieBreakEngine.sort_standings(s, r))):
+            samples = []
+            for _ in range(args.repeats):
+                copy = [dict(e) for e in standings]
+                start = time.perf_counter()
+                fn(copy, race_results)
+                samples.append((time.perf_counter() - start) * 1000)
+            row[name] = _summarize(samples)
+        row["speedup"] = round(row["rescan"]["median_ms"] / row["matrix"]["median_ms"], 1)
+        results.append(row)
+        print(f"{n} players: rescan {row['rescan']['median_ms']:.1f} ms, "
+              f"matrix {row['matrix']['median_ms']:.1f} ms", file=sys.stderr)
+
+    print(json.dumps({
+        "meta": {"git_revision": _git_revision(), "repeats": args.repeats,
+                 "races_per_player": args.races_per_player, "players_per_race": args.players_per_race},
+        "results": results,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Throughput scaling with worker count.
+
+Generates one synthetic tournament, then for each worker count starts the
+real server through start.py (WEB_CONCURRENCY=N) and drives it with a fixed
+number of concurrent clients, reporting requests/second per route as JSON.
+
+    python -m benchmarks.bench_workers --workers 1 --workers 2 --workers 4 --duration 10
+
+Use a Postgres --database-url for representative numbers; SQLite serializes
+writers and adds file-lock contention between processes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.run_benchmarks import _git_revision, _summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SQLITE_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'meow_bench_workers.sqlite3')}"
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Worker-count throughput benchmark")
+    parser.add_argument("--database-url", default=DEFAULT_SQLITE_URL)
+    parser.add_argument("--workers", type=int, action="append", help="Worker counts to test (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per route and worker count")
+    parser.add_argument("--players", type=int, default=840)
+    parser.add_argument("--groups", type=int, default=140)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+async def _prepare(database_url: str, args: argparse.Namespace):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from benchmarks.generator import TournamentSpec, generate_tournament
+
+    engine = create_async_engine(database_url, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        generated = await generate_tournament(session, TournamentSpec(players=args.players, groups=args.groups))
+    await engine.dispose()
+    return generated
+
+
+async def _wait_ready(base_url: str, timeout: float = 60.0):
+    import httpx
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError("Server did not become ready")
+
+
+async def _load(url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    import httpx
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    resp = await client.get(url)
+                    if resp.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        **(_summarize(latencies) if latencies else {}),
+    }
+
+
+def _start_server(database_url: str, workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "SQL_ECHO": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "start.py"], cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
+
+def _stop_server(proc: subprocess.Popen):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    worker_counts = args.workers or [1, 2, 4]
+    generated = await _prepare(args.database_url, args)
+
+    routes = {
+        "standings": f"/api/v1/stages/{generated.stage_id}/standings",
+        "matches_view": f"/api/v1/stages/{generated.stage_id}/matches_view",
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for workers in worker_counts:
+        proc = _start_server(args.database_url, workers, args.port)
+        try:
+            await _wait_ready(base_url)
+            for name, path in routes.items():
+                stats = await _load(base_url + path, args.concurrency, args.duration)
+                results.append({"workers": workers, "route": name, **stats})
+                print(f"workers={workers} {name}: {stats['requests_per_second']} req/s", file=sys.stderr)
+        finally:
+            _stop_server(proc)
+
+    # Speed-up relative to the single-worker run of the same route
+    base = {r["route"]: r["requests_per_second"] for r in results if r["workers"] == min(worker_counts)}
+    for r in results:
+        if base.get(r["route"]):
+            r["scaling"] = round(r["requests_per_second"] / base[r["route"]], 2)
+
+    report = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "cpu_count": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "rows": generated.row_counts,
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
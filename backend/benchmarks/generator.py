@@ -0,0 +1,188 @@
+"""
+Synthetic tournament generator for the benchmark suite.
+
+Builds a tournament of configurable size directly through bulk INSERTs so that
+large fixtures (thousands of players, tens of thousands of races) can be
+created in seconds on both SQLite and Postgres.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+from uuid import UUID, uuid4
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models import (
+    Tournament, Stage, Group, GroupParticipant, Match, MatchParticipant, Race, RaceResult, Player,
+    TournamentParticipant,
+)
+from app.models.tournament import StageType, MatchStatus
+from app.services.logic.scoring import ScoringEngine
+
+# Insert in chunks to stay well below driver parameter limits (SQLite: 32766)
+CHUNK_SIZE = 500
+
+
+@dataclass
+class TournamentSpec:
+    players: int = 84
+    groups: int = 14
+    matches_per_group: int = 10
+    players_per_match: int = 3
+    races_per_match: int = 3
+    # Fraction of matches that get results; the rest stay PENDING
+    finished_ratio: float = 1.0
+    seed: int = 42
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+@dataclass
+class GeneratedTournament:
+    tournament_id: UUID
+    stage_id: UUID
+    next_stage_id: UUID
+    player_ids: List[UUID] = field(default_factory=list)
+    group_ids: List[UUID] = field(default_factory=list)
+    match_ids: List[UUID] = field(default_factory=list)
+    pending_match_ids: List[UUID] = field(default_factory=list)
+    row_counts: Dict[str, int] = field(default_factory=dict)
+
+
+async def _bulk_insert(session: AsyncSession, model, rows: List[Dict[str, Any]]):
+    for i in range(0, len(rows), CHUNK_SIZE):
+        await session.execute(insert(model), rows[i:i + CHUNK_SIZE])
+
+
+async def generate_tournament(session: AsyncSession, spec: TournamentSpec) -> GeneratedTournament:
+    """
+    Creates Tournament -> Stage (with results) -> next Stage (empty, ready for a draw).
+    Players are spread round-robin over the groups; the first `groups` players are seeds.
+    """
+    rng = random.Random(spec.seed)
+
+    tournament_id = uuid4()
+    stage_id = uuid4()
+    next_stage_id = uuid4()
+
+    await _bulk_insert(session, Tournament, [{"id": tournament_id, "name": f"Bench Cup ({spec.players}p)", "rules_config": {}, "prize_pool_config": {}}])
+    await _bulk_insert(session, Stage, [
+        {
+            "id": stage_id,
+            "tournament_id": tournament_id,
+            "name": "Audition",
+            "stage_type": StageType.ROUND_ROBIN,
+            "sequence_order": 1,
+            "rules_config": {
+                "group_count": spec.groups,
+                "ace_bonus_points": 2,
+                "advancement": {"type": "top_n", "value": 4},
+            },
+            "wildcard_rules": {},
+        },
+        {
+            "id": next_stage_id,
+            "tournament_id": tournament_id,
+            "name": "Group Stage",
+            "stage_type": StageType.ROUND_ROBIN,
+            "sequence_order": 2,
+            "rules_config": {"group_count": max(1, spec.groups // 2)},
+            "wildcard_rules": {},
+        },
+    ])
+
+    # Players
+    player_rows = []
+    for i in range(spec.players):
+        player_rows.append({
+            "id": uuid4(),
+            "in_game_name": f"BenchPlayer_{i + 1}",
+            "qq_id": f"bench_{spec.seed}_{i + 1}",
+            "is_npc": False,
+            "seed_level": 1 if i < spec.groups else 0,
+            "stats": {},
+        })
+    await _bulk_insert(session, Player, player_rows)
+    player_ids = [r["id"] for r in player_rows]
+    players_map = {str(r["id"]): Player(**r) for r in player_rows}
+
+    await _bulk_insert(session, TournamentParticipant, [
+        {"tournament_id": tournament_id, "player_id": pid, "checked_in": True, "seed_level": 0}
+        for pid in player_ids
+    ])
+
+    # Groups
+    group_ids = [uuid4() for _ in range(spec.groups)]
+    await _bulk_insert(session, Group, [
+        {"id": gid, "stage_id": stage_id, "name": f"Group {i + 1:03d}"}
+        for i, gid in enumerate(group_ids)
+    ])
+    members: Dict[UUID, List[UUID]] = {gid: [] for gid in group_ids}
+    for i, pid in enumerate(player_ids):
+        members[group_ids[i % spec.groups]].append(pid)
+    await _bulk_insert(session, GroupParticipant, [
+        {"group_id": gid, "player_id": pid} for gid, pids in members.items() for pid in pids
+    ])
+
+    # Matches, races and results
+    match_rows, mp_rows, race_rows, result_rows = [], [], [], []
+    pending_match_ids = []
+    for g_idx, gid in enumerate(group_ids):
+        roster = members[gid]
+        if len(roster) < 2:
+            continue
+        size = min(spec.players_per_match, len(roster))
+        for m_idx in range(spec.matches_per_group):
+            mid = uuid4()
+            match_players = rng.sample(roster, size)
+            finished = rng.random() < spec.finished_ratio
+            match_rows.append({
+                "id": mid,
+                "group_id": gid,
+                "name": f"Group {g_idx + 1:03d} - Match {m_idx + 1}",
+                "status": MatchStatus.FINISHED if finished else MatchStatus.PENDING,
+                "host_player_id": match_players[0],
+            })
+            mp_rows.extend({"match_id": mid, "player_id": pid} for pid in match_players)
+
+            if not finished:
+                pending_match_ids.append(mid)
+                continue
+
+            for race_number in range(1, spec.races_per_match + 1):
+                rid = uuid4()
+                race_rows.append({"id": rid, "match_id": mid, "race_number": race_number})
+                order = list(match_players)
+                rng.shuffle(order)
+                results = [RaceResult(id=uuid4(), race_id=rid, player_id=pid, rank=rank) for rank, pid in enumerate(order, start=1)]
+                for res in ScoringEngine.calculate_race_points(results, players_map):
+                    result_rows.append({
+                        "id": res.id,
+                        "race_id": rid,
+                        "player_id": res.player_id,
+                        "rank": res.rank,
+                        "points_awarded": res.points_awarded,
+                    })
+
+    await _bulk_insert(session, Match, match_rows)
+    await _bulk_insert(session, MatchParticipant, mp_rows)
+    await _bulk_insert(session, Race, race_rows)
+    await _bulk_insert(session, RaceResult, result_rows)
+    await session.commit()
+
+    return GeneratedTournament(
+        tournament_id=tournament_id,
+        stage_id=stage_id,
+        next_stage_id=next_stage_id,
+        player_ids=player_ids,
+        group_ids=group_ids,
+        match_ids=[r["id"] for r in match_rows],
+        pending_match_ids=pending_match_ids,
+        row_counts={
+            "players": len(player_rows),
+            "groups": len(group_ids),
+            "matches": len(match_rows),
+            "races": len(race_rows),
+            "race_results": len(result_rows),
+        },
+    )
@@ -0,0 +1,284 @@
+"""
+Benchmark suite for the tournament hot paths.
+
+Generates a synthetic tournament (see benchmarks/generator.py) in every target
+database and times:
+    - get_stage_standings   (service)
+    - matches_view          (GET  /api/v1/stages/{id}/matches_view)
+    - draw_preview          (POST /api/v1/stages/{id}/draw_preview)
+    - save_groups           (POST /api/v1/stages/{id}/groups)
+    - record_race_result    (POST /api/v1/matches/{id}/result)
+    - csv_import            (POST /api/v1/players/import)
+
+Results are written as JSON so runs can be diffed between releases:
+
+    python -m benchmarks.run_benchmarks --players 840 --groups 140 --output bench.json
+    python -m benchmarks.run_benchmarks --database-url postgresql+asyncpg://u:p@localhost/bench_db
+    python -m benchmarks.run_benchmarks --baseline bench.json   # exit 1 on regressions
+
+WARNING: every target database is DROPPED and re-created. Never point this at a real event.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_SQLITE_URL = f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'meow_bench.sqlite3')}"
+
+# The app builds its engine at import time, so configure it before any `app` import.
+os.environ.setdefault("SQL_ECHO", "false")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Meow Meow Cup backend benchmarks")
+    parser.add_argument("--database-url", action="append", dest="database_urls",
+                        help="Async SQLAlchemy URL to benchmark (repeatable). Defaults to a temp SQLite file.")
+    parser.add_argument("--players", type=int, default=84)
+    parser.add_argument("--groups", type=int, default=14)
+    parser.add_argument("--matches-per-group", type=int, default=10)
+    parser.add_argument("--players-per-match", type=int, default=3)
+    parser.add_argument("--races-per-match", type=int, default=3)
+    parser.add_argument("--csv-rows", type=int, default=200, help="Rows per CSV import")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", action="append", help="Run only the named benchmark(s)")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative median slowdown that counts as a regression (default 0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95_idx = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(ordered[p95_idx], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def _time(fn: Callable[[int], Awaitable[Any]], repeats: int) -> List[float]:
+    # One untimed warm-up run (connection pool, statement caches)
+    await fn(-1)
+    samples = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        await fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run_target(database_url: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    import httpx
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlmodel import SQLModel, select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.db import get_session
+    from app.main import app
+    from app.models import Stage, MatchParticipant
+    from app.models.tournament import StageType
+    from app.services.tournament_service import TournamentService
+    from benchmarks.generator import TournamentSpec, generate_tournament
+
+    engine = create_async_engine(database_url, echo=False, future=True)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async def override_session():
+        async with async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+
+    spec = TournamentSpec(
+        players=args.players,
+        groups=args.groups,
+        matches_per_group=args.matches_per_group,
+        players_per_match=args.players_per_match,
+        races_per_match=args.races_per_match,
+        seed=args.seed,
+    )
+    gen_start = time.perf_counter()
+    async with async_session() as session:
+        generated = await generate_tournament(session, spec)
+    generate_ms = (time.perf_counter() - gen_start) * 1000
+
+    async with async_session() as session:
+        rows = (await session.exec(select(MatchParticipant))).all()
+    participants: Dict[Any, List[str]] = {}
+    for mp in rows:
+        participants.setdefault(mp.match_id, []).append(str(mp.player_id))
+    match_ids = generated.match_ids
+
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+    async def bench_standings(_: int):
+        async with async_session() as session:
+            await TournamentService(session).get_stage_standings(str(generated.stage_id))
+
+    async def bench_matches_view(_: int):
+        resp = await client.get(f"/api/v1/stages/{generated.stage_id}/matches_view")
+        resp.raise_for_status()
+
+    async def bench_draw_preview(_: int):
+        resp = await client.post(f"/api/v1/stages/{generated.next_stage_id}/draw_preview")
+        resp.raise_for_status()
+
+    draw_payload = (await client.post(f"/api/v1/stages/{generated.next_stage_id}/draw_preview")).json()
+
+    async def bench_save_groups(i: int):
+        # Each run saves into a fresh stage so runs do not accumulate groups
+        async with async_session() as session:
+            stage = Stage(
+                tournament_id=generated.tournament_id,
+                name=f"Bench Save {i}",
+                stage_type=StageType.ROUND_ROBIN,
+                sequence_order=100 + i + 1,
+            )
+            session.add(stage)
+            await session.commit()
+            stage_id = stage.id
+        resp = await client.post(f"/api/v1/stages/{stage_id}/groups", json=draw_payload)
+        resp.raise_for_status()
+
+    async def bench_record_result(i: int):
+        match_id = match_ids[i % len(match_ids)]
+        pids = participants.get(match_id, [])
+        body = {
+            "race_number": 1,
+            "rankings": [{"player_id": pid, "rank": rank} for rank, pid in enumerate(pids, start=1)],
+        }
+        resp = await client.post(f"/api/v1/matches/{match_id}/result", json=body)
+        resp.raise_for_status()
+
+    async def bench_csv_import(i: int):
+        lines = ["in_game_name,qq_id"]
+        lines.extend(f"Imported_{i}_{n},csv_{args.seed}_{i}_{n}" for n in range(args.csv_rows))
+        files = {"file": ("roster.csv", "\n".join(lines).encode("utf-8"), "text/csv")}
+        resp = await client.post(
+            "/api/v1/players/import", files=files, params={"tournament_id": str(generated.tournament_id)}
+        )
+        resp.raise_for_status()
+
+    benchmarks = {
+        "get_stage_standings": bench_standings,
+        "matches_view": bench_matches_view,
+        "draw_preview": bench_draw_preview,
+        "save_groups": bench_save_groups,
+        "record_race_result": bench_record_result,
+        "csv_import": bench_csv_import,
+    }
+
+    dialect = engine.dialect.name
+    results = [{
+        "database": dialect,
+        "benchmark": "generate_tournament",
+        "repeats": 1,
+        **_summarize([generate_ms]),
+        "rows": generated.row_counts,
+    }]
+    try:
+        for name, fn in benchmarks.items():
+            if args.only and name not in args.only:
+                continue
+            samples = await _time(fn, args.repeats)
+            results.append({"database": dialect, "benchmark": name, "repeats": args.repeats, **_summarize(samples)})
+            print(f"[{dialect}] {name}: median {results[-1]['median_ms']:.1f} ms", file=sys.stderr)
+    finally:
+        await client.aclose()
+        app.dependency_overrides.pop(get_session, None)
+        await engine.dispose()
+
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Returns human-readable regression lines (median slower than baseline by > threshold)."""
+    base_index = {(r["database"], r["benchmark"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in current["results"]:
+        base = base_index.get((r["database"], r["benchmark"]))
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = r["median_ms"] / base["median_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{r['database']}/{r['benchmark']}: {base['median_ms']:.1f} ms -> {r['median_ms']:.1f} ms (x{ratio:.2f})"
+            )
+    return regressions
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    urls = args.database_urls or [DEFAULT_SQLITE_URL]
+    os.environ.setdefault("DATABASE_URL", urls[0])
+
+    from app.main import app
+
+    report = {
+        "meta": {
+            "app_version": app.version,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "spec": {
+                "players": args.players,
+                "groups": args.groups,
+                "matches_per_group": args.matches_per_group,
+                "players_per_match": args.players_per_match,
+                "races_per_match": args.races_per_match,
+                "csv_rows": args.csv_rows,
+                "seed": args.seed,
+            },
+        },
+        "results": [],
+    }
+    for url in urls:
+        report["results"].extend(await run_target(url, args))
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
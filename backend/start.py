@@ -1,40 +1,44 @@
-import subprocess
-import sys
 import os
+import sys
+import time
 
 def main():
+    started = time.perf_counter()
     print("Initializing application...")
-    
-    print("Running database migrations...")
-    
-    # Check if we need to generate initial migration
-    versions_dir = os.path.join(os.getcwd(), "alembic", "versions")
-    if not os.path.exists(versions_dir):
-        os.makedirs(versions_dir)
-        
-    # Check if there are any python migration files (ignoring __pycache__)
-    migration_files = [f for f in os.listdir(versions_dir) if f.endswith('.py')]
-    
-    if not migration_files:
-        print("No migrations found. Generating initial migration...")
-        try:
-             subprocess.run([sys.executable, "-m", "alembic", "revision", "--autogenerate", "-m", "Initial migration"], check=True)
-        except subprocess.CalledProcessError as e:
-             print(f"Failed to generate migration: {e}")
-             
+
+    # Migrations and the default admin run in-process (no alembic subprocesses);
+    # see app/core/bootstrap.py. Concurrent replicas serialize on an advisory lock.
     try:
-        # Using python -m alembic to avoid path issues
-        result = subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], check=True)
-        print("Migrations completed successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error during migrations: {e}")
+        from app.core.bootstrap import run
+        run()
+    except Exception as e:
+        print(f"Error during startup: {e}")
         # We exit with error so Docker can restart/log it
         sys.exit(1)
-        
+
+    port = os.getenv("PORT", "8080")
+    # WEB_CONCURRENCY > 1 switches to multi-process mode. In-process caches stay
+    # coherent through the Redis invalidation channel (REDIS_URL), see app/core/cache.py.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if workers > 1:
+        # Gunicorn supervises the uvicorn workers: SIGHUP gracefully reloads them
+        # (new workers start before old ones finish in-flight requests), TTIN/TTOU add/remove one.
+        print(f"Starting Gunicorn with {workers} uvicorn workers... (bootstrap took {elapsed:.0f} ms)")
+        os.execvp("gunicorn", [
+            "gunicorn", "app.main:app",
+            "--worker-class", "uvicorn.workers.UvicornWorker",
+            "--workers", str(workers),
+            "--bind", f"0.0.0.0:{port}",
+            "--graceful-timeout", os.getenv("GRACEFUL_TIMEOUT", "30"),
+            "--timeout", os.getenv("WORKER_TIMEOUT", "60"),
+        ])
+
     # Start Uvicorn
-    print("Starting Uvicorn server...")
+    print(f"Starting Uvicorn server... (bootstrap took {elapsed:.0f} ms)")
     # Using execvp to replace the process
-    os.execvp("uvicorn", ["uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", "8080"])
+    os.execvp("uvicorn", ["uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", port])
 
 if __name__ == "__main__":
     main()
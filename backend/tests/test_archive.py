@@ -0,0 +1,145 @@
+import gzip
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.tournament import (
+    Tournament, TournamentParticipant, Stage, StageType, Group, GroupParticipant, Match, MatchParticipant,
+    MatchStatus, Race, RaceResult,
+)
+from app.models.user import Player, User
+from app.services.archive_service import TournamentArchive, TABLES
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+async def _open():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    return engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture(name="source")
+async def source_fixture():
+    engine, async_session = await _open()
+    async with async_session() as session:
+        user = User(username="owner", email="owner@example.com", hashed_password="x")
+        session.add(user)
+        await session.commit()
+        tourney = Tournament(name="Archive Cup", start_time=datetime(2024, 5, 1, 18, 0))
+        other = Tournament(name="Other Cup")
+        players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}", user_id=user.id if i == 0 else None,
+                          stats={"races": i}) for i in range(3)]
+        outsider = Player(in_game_name="Outsider", qq_id="q9")
+        session.add_all([tourney, other, outsider, *players])
+        await session.commit()
+        session.add_all([TournamentParticipant(tournament_id=tourney.id, player_id=p.id) for p in players])
+        session.add(TournamentParticipant(tournament_id=other.id, player_id=outsider.id))
+        stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=1)
+        session.add(stage)
+        await session.commit()
+        group = Group(stage_id=stage.id, name="Group A")
+        session.add(group)
+        await session.commit()
+        session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+        match = Match(group_id=group.id, name="Match 1", status=MatchStatus.FINISHED,
+                      host_player_id=players[0].id, start_time=datetime(2024, 5, 1, 18, 30))
+        session.add(match)
+        await session.commit()
+        session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+        for number in (1, 2):
+            race = Race(match_id=match.id, race_number=number)
+            session.add(race)
+            await session.commit()
+            session.add_all([RaceResult(race_id=race.id, player_id=p.id, rank=rank, points_awarded=4 - rank)
+                             for rank, p in enumerate(players, start=1)])
+        await session.commit()
+        yield session, tourney.id
+    await engine.dispose()
+
+
+async def _counts(session):
+    return {str(m.__table__.name): (await session.exec(select(func.count()).select_from(m.__table__))).one()
+            for m in TABLES}
+
+
+@pytest.mark.asyncio
+async def test_round_trip_restores_the_whole_tournament(source, tmp_path):
+    session, tournament_id = source
+    path = str(tmp_path / "cup.jsonl.gz")
+    counts = await TournamentArchive(session).export(tournament_id, path)
+    # The other tournament and its player stay out
+    assert counts["tournament"] == 1 and counts["player"] == 3
+    assert counts["raceresult"] == 6 and counts["tournamentparticipant"] == 3
+
+    engine, async_session = await _open()
+    try:
+        async with async_session() as target:
+            restored = await TournamentArchive(target).restore(path)
+            assert restored["tournament_id"] == str(tournament_id)
+            assert restored["counts"] == counts
+            assert {k: v for k, v in (await _counts(target)).items() if k != "user"} == counts
+
+            tourney = await target.get(Tournament, tournament_id)
+            assert tourney.name == "Archive Cup" and tourney.start_time == datetime(2024, 5, 1, 18, 0)
+            match = (await target.exec(select(Match))).one()
+            assert match.status == MatchStatus.FINISHED and match.start_time == datetime(2024, 5, 1, 18, 30)
+            p0 = (await target.exec(select(Player).where(Player.in_game_name == "P0"))).one()
+            # The account doesn't exist in the target database
+            assert p0.user_id is None and p0.stats == {"races": 0}
+            assert match.host_player_id == p0.id
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_restore_refuses_existing_tournament_and_keeps_players(source, tmp_path):
+    session, tournament_id = source
+    path = str(tmp_path / "cup.jsonl.gz")
+    await TournamentArchive(session).export(tournament_id, path)
+    with pytest.raises(ValueError, match="already exists"):
+        await TournamentArchive(session).restore(path)
+
+    # Same players, tournament gone: players are reused, not duplicated
+    engine, async_session = await _open()
+    try:
+        async with async_session() as target:
+            known = (await session.exec(select(Player).where(Player.in_game_name == "P1"))).one()
+            target.add(Player(id=known.id, in_game_name="P1 renamed", qq_id="q1"))
+            await target.commit()
+            restored = await TournamentArchive(target).restore(path)
+            assert restored["counts"]["player"] == 2
+            assert (await target.get(Player, known.id)).in_game_name == "P1 renamed"
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_truncated_or_foreign_archive_restores_nothing(source, tmp_path):
+    session, tournament_id = source
+    path = tmp_path / "cup.jsonl.gz"
+    await TournamentArchive(session).export(tournament_id, str(path))
+    lines = gzip.open(path).read().splitlines(keepends=True)
+    truncated = tmp_path / "truncated.jsonl.gz"
+    truncated.write_bytes(gzip.compress(b"".join(lines[:-1])))
+    foreign = tmp_path / "foreign.jsonl.gz"
+    foreign.write_bytes(gzip.compress(b'{"format": "something-else"}\n'))
+
+    engine, async_session = await _open()
+    try:
+        async with async_session() as target:
+            with pytest.raises(ValueError, match="truncated"):
+                await TournamentArchive(target).restore(str(truncated))
+            assert all(v == 0 for v in (await _counts(target)).values())
+            with pytest.raises(ValueError, match="Not a tournament archive"):
+                await TournamentArchive(target).restore(str(foreign))
+        with pytest.raises(ValueError, match="Tournament not found"):
+            await TournamentArchive(session).export("00000000-0000-0000-0000-000000000000", str(path))
+    finally:
+        await engine.dispose()
@@ -0,0 +1,114 @@
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+import app.models  # noqa: F401
+from app.core.bootstrap import (
+    BASELINE_REVISION, PhaseTimer, SchemaMismatchError, _alembic_config, run_migrations,
+)
+
+async def upgrade_to(url, revision):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: command.upgrade(_alembic_config(c), revision))
+    await engine.dispose()
+
+async def inspect_db(url, fn):
+    engine = create_async_engine(url)
+    async with engine.connect() as conn:
+        found = await conn.run_sync(lambda c: fn(inspect(c)))
+    await engine.dispose()
+    return found
+
+async def version(url):
+    engine = create_async_engine(url)
+    async with engine.connect() as conn:
+        found = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all()
+    await engine.dispose()
+    return found
+
+@pytest.mark.asyncio
+async def test_run_migrations_is_idempotent(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'boot.db'}"
+    timer = PhaseTimer()
+
+    first = await run_migrations(url, timer)
+    second = await run_migrations(url, timer)
+
+    assert first.startswith("upgraded base ->")
+    assert second.startswith("up-to-date at")
+    assert [p[0] for p in timer.phases] == ["migrations", "schema check"] * 2
+    assert timer.phases[1][2] == "matches models"
+
+    tables = await inspect_db(url, lambda i: i.get_table_names())
+    assert {"tournament", "stage", "match", "raceresult", "player", "user", "resultevent"} <= set(tables)
+
+@pytest.mark.asyncio
+async def test_upgrade_from_the_baseline_backfills_created_at(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}"
+    await upgrade_to(url, BASELINE_REVISION)
+    assert "created_at" not in {c["name"] for c in await inspect_db(url, lambda i: i.get_columns("raceresult"))}
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO raceresult (id, race_id, player_id, rank, points_awarded) "
+            "VALUES ('a1', 'r1', 'p1', 1, 9), ('a2', 'r1', 'p2', 2, 5)"
+        ))
+    await engine.dispose()
+
+    outcome = await run_migrations(url, PhaseTimer())
+    assert outcome.startswith(f"upgraded {BASELINE_REVISION} ->")
+
+    engine = create_async_engine(url)
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text("SELECT id, created_at FROM raceresult ORDER BY id"))).all()
+    await engine.dispose()
+    assert [r[0] for r in rows] == ["a1", "a2"] and all(r[1] is not None for r in rows)
+
+    columns = {c["name"]: c for c in await inspect_db(url, lambda i: i.get_columns("raceresult"))}
+    assert columns["created_at"]["nullable"] is False
+    indexes = {i["name"] for i in await inspect_db(url, lambda i: i.get_indexes("raceresult"))}
+    assert {"ix_raceresult_created_at", "ix_raceresult_player_id"} <= indexes
+
+@pytest.mark.asyncio
+async def test_run_migrations_adopts_a_schema_built_by_create_all(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'create_all.db'}"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    await engine.dispose()
+
+    outcome = await run_migrations(url, PhaseTimer())
+    assert "adopted unversioned schema" in outcome
+    assert await version(url) == [ScriptDirectory.from_config(_alembic_config()).get_current_head()]
+
+@pytest.mark.asyncio
+async def test_run_migrations_adopts_a_revision_autogenerated_at_boot(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'autogen.db'}"
+    await upgrade_to(url, BASELINE_REVISION)
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        # Older releases autogenerated an "Initial migration" with a random id at boot
+        await conn.execute(text("UPDATE alembic_version SET version_num = '9f1c2ab3d4e5'"))
+    await engine.dispose()
+
+    outcome = await run_migrations(url, PhaseTimer())
+    assert "adopted 9f1c2ab3d4e5" in outcome
+    assert "9f1c2ab3d4e5" not in await version(url)
+
+@pytest.mark.asyncio
+async def test_run_migrations_refuses_a_schema_behind_the_models(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'old.db'}"
+    await run_migrations(url, PhaseTimer())
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        # A model change shipped without a revision looks like this to the check
+        await conn.execute(text("DROP INDEX ix_raceresult_player_id"))
+    await engine.dispose()
+
+    with pytest.raises(SchemaMismatchError) as exc:
+        await run_migrations(url, PhaseTimer())
+    assert "index ix_raceresult_player_id" in str(exc.value)
@@ -0,0 +1,250 @@
+import random
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages as stages_api
+from app.api.auth import get_current_user
+from app.db import get_session
+from app.models.tournament import Tournament, Stage, StageType, Match, MatchParticipant, BracketNode, Race, RaceResult
+from app.models.user import Player, User
+from app.services.logic.bracket import BracketEngine, plan_double_elimination, plan_single_elimination, seed_order
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+class Rank:
+    def __init__(self, player_id, rank):
+        self.player_id = player_id
+        self.rank = rank
+
+async def make_stage(session, num_players, rules, stage_type=StageType.DOUBLE_ELIMINATION):
+    tourney = Tournament(name="Knockout Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Bracket Stage", stage_type=stage_type,
+                  sequence_order=1, rules_config=rules)
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(num_players)]
+    session.add(stage)
+    session.add_all(players)
+    await session.commit()
+    return stage, players
+
+async def participants(session, match):
+    stmt = select(MatchParticipant).where(MatchParticipant.match_id == match.id)
+    return [mp.player_id for mp in (await session.exec(stmt)).all()]
+
+async def play_out(session, races_per_match=1, seed=0):
+    """Plays every open match with random results until the bracket is done."""
+    rng = random.Random(seed)
+    service = TournamentService(session)
+    played = []
+    while True:
+        match = (await session.exec(select(Match).where(Match.status == "pending"))).first()
+        if match is None:
+            return played
+        players = await participants(session, match)
+        for race_number in range(1, races_per_match + 1):
+            rng.shuffle(players)
+            await service.record_race_result(
+                str(match.id), race_number, [Rank(p, i + 1) for i, p in enumerate(players)]
+            )
+        played.append(match.name)
+
+def test_seed_order_keeps_top_seeds_apart():
+    assert seed_order(4) == [1, 4, 2, 3]
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+
+def test_double_elimination_plan_routes():
+    specs = {s["key"]: s for s in plan_double_elimination(8)}
+
+    # 4 + 2 + 1 upper, 2 + 2 + 1 + 1 lower, grand final
+    assert len(specs) == 14
+    assert specs["U1-1"]["seeds"] == [0, 7]
+    assert specs["U1-1"]["routes"] == [("U2-1", 0), ("L1-1", 0)]
+    assert specs["U3-1"]["routes"] == [("GF", 0), ("L4-1", 1)]
+    assert specs["L4-1"]["routes"] == [("GF", 1), None]
+    assert specs["GF"]["routes"] == [None, None]
+
+def test_single_elimination_plan_with_three_player_matches():
+    specs = {s["key"]: s for s in plan_single_elimination(9, players_per_match=3, advance=1)}
+
+    assert list(specs) == ["R1-1", "R1-2", "R1-3", "R2-1"]
+    assert specs["R1-1"]["seeds"] == [0, 5, 6]
+    assert specs["R1-3"]["routes"] == [("R2-1", 2), None, None]
+    assert specs["R2-1"]["name"] == "Final"
+
+    with pytest.raises(ValueError):
+        plan_single_elimination(9, players_per_match=3, advance=2)
+
+@pytest.mark.asyncio
+async def test_double_elimination_plays_through_with_byes(session: AsyncSession):
+    stage, players = await make_stage(session, 6, {})
+    nodes = await BracketEngine(session).generate(stage.id, [p.id for p in players])
+
+    # 6 players in an 8 bracket: seeds 1 and 2 get byes straight into round 2
+    assert len(nodes) == 14
+    first_matches = (await session.exec(select(Match))).all()
+    assert sorted(m.name for m in first_matches) == ["Upper Bracket R1 M2", "Upper Bracket R1 M4"]
+
+    played = await play_out(session)
+
+    # 1v1 double elimination without a bracket reset: 2n - 2 matches
+    assert len(played) == 10
+    assert played[-1] == "Grand Final"
+    open_nodes = (await session.exec(select(BracketNode).where(BracketNode.resolved == False))).all()
+    assert open_nodes == []
+
+@pytest.mark.asyncio
+async def test_multi_player_matches_wait_for_all_races(session: AsyncSession):
+    stage, players = await make_stage(session, 16, {"advance_per_match": 2, "races_per_match": 3})
+    await BracketEngine(session).generate(stage.id, [p.id for p in players])
+
+    match = (await session.exec(select(Match))).first()
+    assert len(await participants(session, match)) == 4
+
+    service = TournamentService(session)
+    ids = await participants(session, match)
+    await service.record_race_result(str(match.id), 1, [Rank(p, i + 1) for i, p in enumerate(ids)])
+    assert match.status == "pending"
+    assert len((await session.exec(select(Match))).all()) == 4
+
+    played = await play_out(session, races_per_match=3)
+    assert len(played) == 14
+
+@pytest.mark.asyncio
+async def test_corrected_result_moves_players_again(session: AsyncSession):
+    stage, players = await make_stage(session, 4, {})
+    engine = BracketEngine(session)
+    await engine.generate(stage.id, [p.id for p in players])
+
+    service = TournamentService(session)
+    match = (await session.exec(select(Match).where(Match.name == "Upper Bracket R1 M1"))).one()
+    a, b = await participants(session, match)
+    await service.record_race_result(str(match.id), 1, [Rank(a, 1), Rank(b, 2)])
+
+    upper = (await session.exec(select(BracketNode).where(BracketNode.key == "U2-1"))).one()
+    lower = (await session.exec(select(BracketNode).where(BracketNode.key == "L1-1"))).one()
+    assert upper.entrants[0] == str(a) and lower.entrants[0] == str(b)
+
+    # Re-submitting the race with the order swapped swaps them downstream
+    await service.record_race_result(str(match.id), 1, [Rank(b, 1), Rank(a, 2)])
+    assert upper.entrants[0] == str(b) and lower.entrants[0] == str(a)
+    assert lower.feeds_remaining == 1
+
+@pytest.mark.asyncio
+async def test_single_elimination_byes_and_top_n(session: AsyncSession):
+    # 10 players, 4-player matches, top 2 advance: 4 first-round matches
+    stage, players = await make_stage(
+        session, 10, {"players_per_match": 4, "advance_per_match": 2}, StageType.ELIMINATION
+    )
+    await BracketEngine(session).generate(stage.id, [p.id for p in players])
+
+    first_round = (await session.exec(select(Match))).all()
+    sizes = sorted([len(await participants(session, m)) for m in first_round])
+    assert sizes == [3, 3]  # the two 2-player matches are byes: both players go straight through
+
+    played = await play_out(session)
+    assert played[-2:] == ["Round 2 M1", "Final"] or played[-2:] == ["Round 2 M2", "Final"]
+    final = (await session.exec(select(Match).where(Match.name == "Final"))).one()
+    assert len(await participants(session, final)) == 4
+
+@pytest.mark.asyncio
+async def test_correction_swapping_finishers_who_advance_together(session: AsyncSession):
+    # 8 players in two 4-player matches, top 2 of each meet in the final
+    stage, players = await make_stage(
+        session, 8, {"players_per_match": 4, "advance_per_match": 2}, StageType.ELIMINATION
+    )
+    await BracketEngine(session).generate(stage.id, [p.id for p in players])
+    service = TournamentService(session)
+    first_round = (await session.exec(select(Match))).all()
+    orders = {}
+    for match in first_round:
+        orders[match.id] = await participants(session, match)
+        await service.record_race_result(str(match.id), 1, [Rank(p, i + 1) for i, p in enumerate(orders[match.id])])
+
+    final = (await session.exec(select(Match).where(Match.name == "Final"))).one()
+    node = (await session.exec(select(BracketNode).where(BracketNode.match_id == final.id))).one()
+    before = list(node.entrants)
+
+    # Same two players still go through, only their seats swap
+    match = first_round[0]
+    a, b, c, d = orders[match.id]
+    await service.record_race_result(str(match.id), 1, [Rank(b, 1), Rank(a, 2), Rank(c, 3), Rank(d, 4)])
+
+    await session.refresh(node)
+    assert sorted(node.entrants) == sorted(before) and node.entrants != before
+    expected = {str(p) for order in orders.values() for p in order[:2]}
+    assert {str(p) for p in await participants(session, final)} == expected
+
+    # A correction that lets a different player through swaps them in the final
+    await service.record_race_result(str(match.id), 1, [Rank(c, 1), Rank(b, 2), Rank(a, 3), Rank(d, 4)])
+    await session.refresh(node)
+    assert {str(p) for p in await participants(session, final)} == expected - {str(a)} | {str(c)}
+    assert set(node.entrants) == expected - {str(a)} | {str(c)}
+
+@pytest.mark.asyncio
+async def test_correction_after_the_next_match_started_is_refused(session: AsyncSession):
+    stage, players = await make_stage(
+        session, 8, {"players_per_match": 4, "advance_per_match": 2}, StageType.ELIMINATION
+    )
+    await BracketEngine(session).generate(stage.id, [p.id for p in players])
+    service = TournamentService(session)
+    first_round = (await session.exec(select(Match))).all()
+    orders = {}
+    for match in first_round:
+        orders[match.id] = await participants(session, match)
+        await service.record_race_result(str(match.id), 1, [Rank(p, i + 1) for i, p in enumerate(orders[match.id])])
+
+    final = (await session.exec(select(Match).where(Match.name == "Final"))).one()
+    final_id, final_players = final.id, await participants(session, final)
+    await service.record_race_result(str(final_id), 1, [Rank(p, i + 1) for i, p in enumerate(final_players)])
+
+    # Letting someone else through now would change a line-up that has already raced
+    match_id = first_round[0].id
+    a, b, c, d = orders[match_id]
+    with pytest.raises(ValueError, match="already started"):
+        await service.record_race_result(str(match_id), 1, [Rank(c, 1), Rank(d, 2), Rank(a, 3), Rank(b, 4)])
+
+    # Nothing of the correction was kept: results and bracket still agree
+    stmt = (select(RaceResult.player_id, RaceResult.rank).join(Race, Race.id == RaceResult.race_id)
+            .where(Race.match_id == match_id).order_by(RaceResult.rank))
+    assert [pid for pid, _ in (await session.exec(stmt)).all()] == [a, b, c, d]
+    node = (await session.exec(select(BracketNode).where(BracketNode.match_id == final_id))).one()
+    assert {str(p) for p in final_players} == {pid for pid in node.entrants if pid}
+    seated = await session.exec(select(MatchParticipant.player_id).where(MatchParticipant.match_id == final_id))
+    assert set(seated.all()) == set(final_players)
+
+@pytest.mark.asyncio
+async def test_bracket_endpoint_requires_an_admin(session: AsyncSession):
+    stage, players = await make_stage(session, 4, {})
+    user = User(username="user", hashed_password="x", is_admin=False)
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    body = {"player_ids": [str(p.id) for p in players]}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        refused = await client.post(f"/api/v1/stages/{stage.id}/bracket", json=body)
+        user.is_admin = True
+        generated = await client.post(f"/api/v1/stages/{stage.id}/bracket", json=body)
+
+    assert refused.status_code == 403
+    assert generated.status_code == 200 and generated.json()["matches"] == 2
@@ -0,0 +1,54 @@
+import pytest
+from app.core import cache
+from app.core.cache import InvalidationBus, LocalCache, WORKER_ID, get_cache, invalidate
+
+def test_local_cache_is_bounded_lru_with_stats():
+    c = LocalCache("lru-test", max_entries=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "a" becomes most recent
+    c.set("c", 3)           # evicts "b"
+
+    assert "b" not in c
+    assert c.get("b") is None
+    assert c.get("c") == 3
+    assert (c.hits, c.misses) == (2, 1)
+
+@pytest.mark.asyncio
+async def test_invalidate_clears_local_entries():
+    c = get_cache("invalidate-test")
+    c.set("stage-1", "x")
+    c.set("stage-2", "y")
+
+    await invalidate("invalidate-test", "stage-1")
+    assert "stage-1" not in c
+    assert "stage-2" in c
+
+    await invalidate("invalidate-test")
+    assert len(c) == 0
+
+@pytest.mark.asyncio
+async def test_bus_applies_messages_from_other_workers_only():
+    c = get_cache("bus-test")
+    bus = InvalidationBus(redis_url=None)
+    seen = []
+
+    async def listener(message):
+        seen.append(message["kind"])
+
+    bus.add_listener(listener)
+
+    c.set("k", 1)
+    await bus._dispatch({"kind": "invalidate", "namespace": "bus-test", "key": "k", "origin": WORKER_ID})
+    assert "k" in c  # own broadcast is ignored
+
+    await bus._dispatch({"kind": "invalidate", "namespace": "bus-test", "key": "k", "origin": "other-worker"})
+    assert "k" not in c
+
+    await bus._dispatch({"kind": "live_update", "origin": "other-worker"})
+    assert seen == ["invalidate", "live_update"]
+
+def test_caches_are_exported_to_metrics():
+    get_cache("metrics-test").get("missing")
+    body = cache.metrics.registry.render()
+    assert 'cache_misses_total{cache="metrics-test"} 1' in body
@@ -0,0 +1,218 @@
+import itertools
+import random
+import pytest
+import pytest_asyncio
+from uuid import uuid4
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.tournament import (
+    Tournament, Stage, StageType, Group, GroupParticipant, Match, MatchParticipant, MatchStatus, Race, RaceResult,
+)
+from app.models.user import Player
+from app.services.logic.clinch import ClinchCalculator, GroupSearch, match_outcomes, seeded_outcomes
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+POINTS = {1: 9, 2: 5, 3: 3}
+
+async def make_group(session):
+    """One group of 4, top 2 advance; match m seats players m, m+1, m+2 (mod 4)."""
+    tourney = Tournament(name="Clinch Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Audition", stage_type=StageType.ROUND_ROBIN, sequence_order=1,
+                  rules_config={"advancement": {"type": "top_n", "value": 2}})
+    group = Group(stage_id=stage.id, name="Group A")
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(4)]
+    session.add_all([stage, group] + players)
+    await session.commit()
+    session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+
+    matches = []
+    for m in range(4):
+        seats = [players[(m + j) % 4] for j in range(3)]
+        match = Match(group_id=group.id, name=f"Match {m + 1}")
+        session.add(match)
+        await session.commit()
+        session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in seats])
+        matches.append((match, seats))
+    await session.commit()
+    return stage, group, players, matches
+
+async def finish(session, match, order):
+    race = Race(match_id=match.id, race_number=1)
+    session.add(race)
+    await session.commit()
+    session.add_all([RaceResult(race_id=race.id, player_id=p.id, rank=r, points_awarded=POINTS[r])
+                     for r, p in enumerate(order, start=1)])
+    match.status = MatchStatus.FINISHED
+    session.add(match)
+    await session.commit()
+
+def brute_force(search, player):
+    """Best / worst rank over every combination of match outcomes."""
+    best, worst = None, None
+    for combo in itertools.product(*[outcomes for _, outcomes in search.pending]):
+        pts, wins = list(search.points), list(search.wins)
+        for (seats, _), (o_pts, o_wins) in zip(search.pending, combo):
+            for s, i in enumerate(seats):
+                pts[i] += o_pts[s]
+                wins[i] += o_wins[s]
+        scores = [search.score(i, pts[i], wins[i]) for i in range(search.n)]
+        others = [scores[i] for i in range(search.n) if i != player]
+        b = 1 + sum(1 for x in others if x > scores[player])
+        w = 1 + sum(1 for x in others if x >= scores[player])
+        best = b if best is None else min(best, b)
+        worst = w if worst is None else max(worst, w)
+    return best, worst
+
+def test_match_outcomes_merge_duplicates():
+    one_race = match_outcomes(3, 1, (9, 5, 3), 0)
+    assert len(one_race) == 6
+    assert ((9, 5, 3), (1, 0, 0)) in one_race
+
+    # Two races: the same totals from different orders count once
+    two_races = match_outcomes(3, 2, (9, 5, 3), 0)
+    assert len(two_races) == len(set(two_races)) < 36
+
+    # Ace bonus for winning more than half the races
+    with_ace = match_outcomes(3, 2, (9, 5, 3), 4)
+    assert ((22, 10, 6), (2, 0, 0)) in with_ace
+
+def test_seeded_outcomes_keep_the_recorded_races():
+    # Seat 0 won the first of two races: it is an ace only if it wins the second too
+    outcomes = seeded_outcomes(1, (9, 5, 3), 4, ((9, 5, 3), (1, 0, 0), 1))
+    assert len(outcomes) == 6
+    assert ((22, 10, 6), (2, 0, 0)) in outcomes
+    assert ((12, 14, 8), (1, 1, 0)) in outcomes
+    assert all(pts[0] >= 12 for pts, _ in outcomes)
+
+def test_search_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(60):
+        n = rng.randint(3, 6)
+        pending = [(rng.sample(range(n), 3), rng.choice([1, 2])) for _ in range(rng.randint(1, 3))]
+        matches = [2 + sum(i in seats for seats, _ in pending) for i in range(n)]
+        search = GroupSearch(
+            points=[rng.randint(0, 30) for _ in range(n)],
+            wins=[rng.randint(0, 3) for _ in range(n)],
+            matches=matches,
+            dominance_points=rng.choice([0, 2]),
+            pending=pending,
+            table=(9, 5, 3),
+            ace_bonus=rng.choice([0, 3]),
+        )
+        for player in range(n):
+            best, _, best_exact = search.rank(player, best=True)
+            worst, _, worst_exact = search.rank(player, best=False)
+            assert best_exact and worst_exact
+            assert (best, worst) == brute_force(search, player)
+
+def test_budget_falls_back_to_safe_bounds():
+    pending = [([0, 1, 2], 1), ([1, 2, 3], 1), ([2, 3, 0], 1), ([3, 0, 1], 1)]
+    search = GroupSearch([10, 10, 10, 10], [0] * 4, [4] * 4, 0, pending, (9, 5, 3), 0)
+    exact_best, _, _ = search.rank(0, best=True)
+
+    found, bound, exact = search.rank(0, best=True, budget=1)
+    assert not exact
+    assert bound <= exact_best
+
+@pytest.mark.asyncio
+async def test_clinched_and_eliminated(session: AsyncSession):
+    stage, group, players, matches = await make_group(session)
+    # Lower index always wins; only the last match is left
+    for match, seats in matches[:3]:
+        await finish(session, match, sorted(seats, key=players.index))
+
+    status = await ClinchCalculator(session).stage_status(stage.id)
+
+    assert len(status["groups"]) == 1
+    group_status = status["groups"][0]
+    assert group_status["pending_matches"] == 1
+    by_name = {p["player_name"]: p for p in group_status["players"]}
+    assert by_name["P0"]["status"] == "clinched"
+    assert by_name["P0"]["destination"] == "next_stage_main"
+    assert by_name["P0"]["points_needed"] == 0
+    assert by_name["P1"]["status"] == "clinched"
+    assert by_name["P2"]["status"] == "eliminated"
+    assert by_name["P3"]["status"] == "eliminated"
+    assert by_name["P3"]["best_rank"] == 3
+    assert all(p["exact"] for p in group_status["players"])
+
+@pytest.mark.asyncio
+async def test_match_under_way_counts_its_recorded_races(session: AsyncSession):
+    stage, group, players, matches = await make_group(session)
+    stage.rules_config = {"advancement": {"type": "top_n", "value": 2}, "races_per_match": 2}
+    session.add(stage)
+    for match, seats in matches[:3]:
+        await finish(session, match, sorted(seats, key=players.index))
+    # Last match (P3, P0, P1): P3 came last in its first race
+    match, seats = matches[3]
+    race = Race(match_id=match.id, race_number=1)
+    session.add(race)
+    await session.commit()
+    session.add_all([RaceResult(race_id=race.id, player_id=p.id, rank=r, points_awarded=POINTS[r])
+                     for r, p in enumerate(sorted(seats, key=players.index), start=1)])
+    await session.commit()
+
+    status = await ClinchCalculator(session).stage_status(stage.id)
+
+    by_name = {p["player_name"]: p for p in status["groups"][0]["players"]}
+    assert status["groups"][0]["pending_matches"] == 1
+    # 3 recorded, at most 9 from the race left
+    assert by_name["P3"]["max_points"] == by_name["P3"]["points"] + 3 + 9
+
+@pytest.mark.asyncio
+async def test_open_group_and_group_filter(session: AsyncSession):
+    stage, group, players, matches = await make_group(session)
+    calculator = ClinchCalculator(session)
+
+    status = await calculator.stage_status(stage.id, group_id=group.id)
+    players_status = status["groups"][0]["players"]
+    assert all(p["status"] == "alive" for p in players_status)
+    assert all(p["best_rank"] == 1 and p["worst_rank"] == 4 for p in players_status)
+    # Every rival can still reach 27 on their own, so no total is a guarantee yet
+    assert all(p["points_needed"] is None for p in players_status)
+
+    await finish(session, matches[0][0], players[0:3])
+    await finish(session, matches[1][0], players[1:4])
+    status = await calculator.stage_status(stage.id, group_id=group.id)
+    by_name = {p["player_name"]: p for p in status["groups"][0]["players"]}
+    # P1 has 14 and can reach 23; rivals can reach 27, 21 and 17: 22 guarantees 2nd
+    assert by_name["P1"]["points_needed"] == 8
+    assert by_name["P2"]["points_needed"] is None
+
+    with pytest.raises(ValueError, match="Group not found"):
+        await calculator.stage_status(stage.id, group_id=uuid4())
+
+def test_points_table_that_rewards_a_worse_finish():
+    # 2nd place scores more than 1st: the most points and the most wins never come together
+    search = GroupSearch([0, 0], [0, 0], [1, 1], 0, [([0, 1], 1)], (1, 5), 0)
+    assert search.rank(0, best=True)[0] == 1
+    assert search.rank(0, best=False)[0] == 2
+
+    rng = random.Random(11)
+    for _ in range(30):
+        n = rng.randint(3, 5)
+        pending = [(rng.sample(range(n), 3), rng.choice([1, 2])) for _ in range(rng.randint(1, 3))]
+        search = GroupSearch([rng.randint(0, 20) for _ in range(n)], [0] * n, [2] * n, 0,
+                             pending, (3, 9, 5), 0)
+        for player in range(n):
+            best, _, _ = search.rank(player, best=True)
+            worst, _, _ = search.rank(player, best=False)
+            assert (best, worst) == brute_force(search, player)
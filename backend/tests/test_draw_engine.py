@@ -93,3 +93,91 @@ async def test_draw_engine_logic(session: AsyncSession):
     all_drawn_ids = [p['id'] for g in groups_preview.values() for p in g]
     assert len(all_drawn_ids) == 34
     assert len(set(all_drawn_ids)) == 34 # No duplicates
+
+def _conflicts(groups_preview, previous_groups):
+    repeats = 0
+    for g_players in groups_preview.values():
+        seen = {}
+        for p in g_players:
+            key = previous_groups.get(p["id"])
+            if key is not None:
+                repeats += seen.get(key, 0)
+                seen[key] = seen.get(key, 0) + 1
+    return repeats
+
+def test_perform_draw_is_reproducible_and_splits_previous_groups():
+    from uuid import uuid4
+    players = [Player(id=uuid4(), in_game_name=f"P{i}", qq_id=f"q{i}", seed_level=1 if i < 10 else 0)
+               for i in range(200)]
+    # 20 previous groups of 10 -> 10 new groups of 20 can hold at most one of each
+    previous_groups = {str(p.id): f"old{i % 20}" for i, p in enumerate(players)}
+
+    engine = DrawEngine(session=None)
+    first = engine.perform_draw(players, num_groups=10, seed=7, previous_groups=previous_groups)
+    again = engine.perform_draw(list(reversed(players)), num_groups=10, seed=7, previous_groups=previous_groups)
+    other = engine.perform_draw(players, num_groups=10, seed=8, previous_groups=previous_groups)
+
+    assert first == again
+    assert first != other
+    assert _conflicts(first, previous_groups) == 0
+    assert {len(g) for g in first.values()} == {20}
+    assert all(g[0]["seed_level"] == 1 for g in first.values())
+
+def test_perform_draw_balances_sizes_and_seeds_with_many_groups():
+    from uuid import uuid4
+    players = [Player(id=uuid4(), in_game_name=f"P{i}", qq_id=f"q{i}", seed_level=1 if i < 40 else 0)
+               for i in range(1000)]
+    previous_groups = {str(p.id): f"old{i // 7}" for i, p in enumerate(players)}
+
+    groups_preview = DrawEngine(session=None).perform_draw(
+        players, num_groups=30, seed=1, previous_groups=previous_groups
+    )
+
+    assert len(groups_preview) == 30
+    assert "Group AD" in groups_preview
+    sizes = [len(g) for g in groups_preview.values()]
+    assert max(sizes) - min(sizes) <= 1
+    seeds = [sum(1 for p in g if p["seed_level"] == 1) for g in groups_preview.values()]
+    assert max(seeds) - min(seeds) <= 1
+    assert _conflicts(groups_preview, previous_groups) == 0
+
+@pytest.mark.asyncio
+async def test_eligible_players_include_wildcards(session: AsyncSession):
+    from app.models.tournament import Group, Match, Race, RaceResult
+
+    tournament = Tournament(name="Wildcard Cup")
+    session.add(tournament)
+    await session.commit()
+
+    audition = Stage(
+        tournament_id=tournament.id, name="Audition", stage_type=StageType.ROUND_ROBIN, sequence_order=1,
+        rules_config={"advancement": {"type": "top_n", "value": 1}},
+        wildcard_rules={"wildcard_count": 1, "strategy": "global_best_losers"}
+    )
+    groups_stage = Stage(
+        tournament_id=tournament.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=2
+    )
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(6)]
+    session.add_all([audition, groups_stage, *players])
+    await session.commit()
+
+    # Two groups of three, one race each. Group B's runner-up ties its winner on points
+    # (head-to-head decides), so it is the strongest non-qualifier.
+    for g, members, points in (("A", players[:3], (9, 5, 3)), ("B", players[3:], (9, 9, 3))):
+        group = Group(stage_id=audition.id, name=f"Group {g}")
+        session.add(group)
+        await session.commit()
+        match = Match(group_id=group.id, name=f"Group {g} - Match 1")
+        session.add(match)
+        await session.commit()
+        race = Race(match_id=match.id, race_number=1)
+        session.add(race)
+        await session.commit()
+        for rank, (p, pts) in enumerate(zip(members, points), start=1):
+            session.add(RaceResult(race_id=race.id, player_id=p.id, rank=rank, points_awarded=pts))
+        await session.commit()
+
+    eligible = await DrawEngine(session).get_eligible_players_for_stage(groups_stage.id)
+
+    # Group winners (P0, P3) plus the best runner-up across groups (P4)
+    assert sorted(p.in_game_name for p in eligible) == ["P0", "P3", "P4"]
@@ -0,0 +1,130 @@
+import csv
+import io
+import pytest
+import pytest_asyncio
+import httpx
+from uuid import uuid4
+from fastapi import FastAPI
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages, tournaments
+from app.db import get_session
+from app.models.tournament import (
+    Tournament, Stage, StageType, Group, GroupParticipant, Match, MatchParticipant, MatchStatus, Race, RaceResult,
+)
+from app.models.user import Player
+from app.services import export_service
+from app.services.export_service import csv_chunks
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+POINTS = {1: 9, 2: 5, 3: 3}
+
+@pytest_asyncio.fixture(name="client")
+async def client_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    ids = {}
+    async with async_session() as session:
+        tourney = Tournament(name="Export Cup")
+        players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(3)]
+        session.add(tourney)
+        session.add_all(players)
+        await session.commit()
+        ids["tournament"] = tourney.id
+        for order in (1, 2):
+            stage = Stage(tournament_id=tourney.id, name=f"Stage {order}", stage_type=StageType.ROUND_ROBIN,
+                          sequence_order=order, rules_config={"ace_bonus_points": 1})
+            session.add(stage)
+            await session.commit()
+            ids[f"stage{order}"] = stage.id
+            group = Group(stage_id=stage.id, name="Group A")
+            session.add(group)
+            await session.commit()
+            session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+            for m in range(2):
+                match = Match(group_id=group.id, name=f"Match {m + 1}", status=MatchStatus.FINISHED)
+                session.add(match)
+                await session.commit()
+                session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+                # P0 wins every race, then P1, then P2
+                for number in (1, 2, 3):
+                    race = Race(match_id=match.id, race_number=number)
+                    session.add(race)
+                    await session.commit()
+                    session.add_all([RaceResult(race_id=race.id, player_id=p.id, rank=r, points_awarded=POINTS[r])
+                                     for r, p in enumerate(players, start=1)])
+            await session.commit()
+
+    async def override_session():
+        async with async_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(stages.router, prefix="/api/v1/stages")
+    app.include_router(tournaments.router, prefix="/api/v1/tournaments")
+    app.dependency_overrides[get_session] = override_session
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        client.ids = ids
+        yield client
+    await engine.dispose()
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+@pytest.mark.asyncio
+async def test_stage_race_results_and_match_scores(client):
+    stage_id = client.ids["stage1"]
+
+    response = await client.get(f"/api/v1/stages/{stage_id}/export/race_results")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = read_csv(response)
+    assert len(rows) == 2 * 3 * 3
+    assert rows[0]["stage"] == "Stage 1"
+    assert (rows[0]["match"], rows[0]["race_number"], rows[0]["rank"], rows[0]["player_name"]) == ("Match 1", "1", "1", "P0")
+
+    scores = read_csv(await client.get(f"/api/v1/stages/{stage_id}/export/match_scores"))
+    assert len(scores) == 2 * 3
+    p0 = [r for r in scores if r["player_name"] == "P0"]
+    # 3 wins of 9 plus the ace bonus
+    assert [r["points"] for r in p0] == ["28", "28"]
+    assert all(r["is_ace"] == "True" for r in p0)
+
+@pytest.mark.asyncio
+async def test_tournament_standings_cover_every_stage(client):
+    response = await client.get(f"/api/v1/tournaments/{client.ids['tournament']}/export/standings")
+    rows = read_csv(response)
+
+    assert [r["stage"] for r in rows] == ["Stage 1"] * 3 + ["Stage 2"] * 3
+    assert [r["player_name"] for r in rows[:3]] == ["P0", "P1", "P2"]
+    assert rows[0]["rank"] == "1" and rows[0]["total_points"] == "56"
+
+@pytest.mark.asyncio
+async def test_unknown_scope_or_kind(client):
+    assert (await client.get(f"/api/v1/stages/{uuid4()}/export/race_results")).status_code == 404
+    assert (await client.get(f"/api/v1/tournaments/{uuid4()}/export/standings")).status_code == 404
+    assert (await client.get(f"/api/v1/stages/{client.ids['stage1']}/export/players")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_rows_are_written_in_chunks(monkeypatch):
+    monkeypatch.setattr(export_service, "CHUNK_ROWS", 10)
+
+    async def rows():
+        for i in range(25):
+            yield (i, f"row {i}")
+
+    chunks = [chunk async for chunk in csv_chunks(["n", "label"], rows())]
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO("".join(chunks))))
+    assert parsed[0] == ["n", "label"]
+    assert len(parsed) == 26
@@ -0,0 +1,130 @@
+import random
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from collections import Counter
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.tournament import Tournament, Stage, StageType, Group, GroupParticipant, Match, MatchParticipant
+from app.models.user import Player
+from app.api import stages as stages_api
+from app.db import get_session
+from app.services.logic.host_assignment import HostAssignmentEngine
+from app.services.logic.schedule import ScheduleEngine
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+def test_hosts_are_participants_and_balanced_stage_wide():
+    design = ScheduleEngine.generate(6, 3, 5)
+    matches = [tuple(f"g{g}p{i}" for i in m) for g in range(50) for m in design]
+
+    hosts = HostAssignmentEngine.assign(matches)
+
+    assert all(h in m for h, m in zip(hosts, matches))
+    report = HostAssignmentEngine.summarize(hosts)
+    # 10 matches over 6 players per group: nobody hosts more than 2, nobody less than 1
+    assert report["matches"] == 500
+    assert (report["min"], report["max"]) == (1, 2)
+
+def test_prior_counts_and_cap_are_respected():
+    matches = [("a", "b"), ("a", "b"), ("a", "c"), ("b", "c")]
+
+    # "a" hosted a lot in earlier stages, so b and c take over
+    hosts = HostAssignmentEngine.assign(matches, prior_counts={"a": 3})
+    assert "a" not in hosts
+
+    # The cap beats the priors: with one host each, "a" has to take one of the a/b matches
+    hosts = HostAssignmentEngine.assign(matches[:3], max_per_player=1, prior_counts={"a": 3})
+    assert Counter(hosts) == {"a": 1, "b": 1, "c": 1}
+
+    with pytest.raises(ValueError):
+        HostAssignmentEngine.assign([("a", "b")] * 3, max_per_player=1)
+
+def test_balance_matches_a_brute_force_optimum():
+    import itertools
+    for trial in range(50):
+        rng = random.Random(trial)
+        matches = [tuple(rng.sample(range(5), rng.randint(1, 3))) for _ in range(6)]
+        hosts = HostAssignmentEngine.assign(matches)
+
+        def cost(assignment):
+            return sum(v * v for v in Counter(assignment).values())
+
+        assert cost(hosts) == min(cost(a) for a in itertools.product(*matches))
+
+@pytest.mark.asyncio
+async def test_generate_matches_balances_hosts_across_stages(session: AsyncSession):
+    tourney = Tournament(name="Host Cup")
+    session.add(tourney)
+    await session.commit()
+
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(6)]
+    session.add_all(players)
+    await session.commit()
+
+    stages = []
+    for order in (1, 2):
+        stage = Stage(tournament_id=tourney.id, name=f"S{order}", stage_type=StageType.ROUND_ROBIN,
+                      sequence_order=order, rules_config={"max_hosts_per_player": 2})
+        session.add(stage)
+        await session.commit()
+        group = Group(stage_id=stage.id, name="Group A")
+        session.add(group)
+        await session.commit()
+        session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+        await session.commit()
+        stages.append(stage)
+
+    service = TournamentService(session)
+    first = await service.generate_matches_for_stage(str(stages[0].id))
+    second = await service.generate_matches_for_stage(str(stages[1].id))
+
+    assert len(first) == len(second) == 10
+    participants = (await session.exec(select(MatchParticipant))).all()
+    members = Counter(mp.match_id for mp in participants)
+    assert set(members.values()) == {3}
+
+    # 20 matches over 6 players across both stages: totals of 3 or 4, cap of 2 per stage
+    per_stage = [Counter(m.host_player_id for m in ms) for ms in (first, second)]
+    assert all(max(c.values()) <= 2 for c in per_stage)
+    totals = per_stage[0] + per_stage[1]
+    assert sorted(set(totals.values())) == [3, 4]
+
+@pytest.mark.asyncio
+async def test_saved_groups_report_every_seated_player(session: AsyncSession):
+    players = [Player(in_game_name=f"P{i}", qq_id=f"save{i}") for i in range(6)]
+    tourney = Tournament(name="Manual Cup")
+    session.add_all(players + [tourney])
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=1)
+    session.add(stage)
+    await session.commit()
+
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    groups = {"Group A": [{"id": str(p.id)} for p in players[:3]], "Group B": [{"id": str(p.id)} for p in players[3:]]}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        report = (await client.post(f"/api/v1/stages/{stage.id}/groups", json=groups)).json()["hosts"]
+
+    seated = {str(p.player_id) for p in (await session.exec(select(MatchParticipant))).all()}
+    assert set(report["per_player"]) == seated == {str(p.id) for p in players}
+    assert report["matches"] == sum(report["per_player"].values())
+    assert report["min"] == 0
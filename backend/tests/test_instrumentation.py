@@ -0,0 +1,134 @@
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI, Depends
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.instrumentation import (
+    SQLInstrumentationMiddleware, RouteSummary, assert_max_statements, capture_statements, install
+)
+from app.models.tournament import Tournament, Stage, Group, Match, Race, RaceResult
+from app.models.user import Player
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="engine")
+async def engine_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    install(engine)
+    yield engine
+    await engine.dispose()
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture(engine):
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+@pytest.mark.asyncio
+async def test_stage_standings_statement_budget(session: AsyncSession, engine):
+    tourney = Tournament(name="Budget Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type="round_robin", sequence_order=1)
+    session.add(stage)
+    await session.commit()
+
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(3)]
+    session.add_all(players)
+    await session.commit()
+
+    # Several groups and matches: the statement count must not grow with them (no N+1)
+    for g in range(3):
+        group = Group(stage_id=stage.id, name=f"Group {g}")
+        session.add(group)
+        await session.commit()
+        for m in range(3):
+            match = Match(group_id=group.id, name=f"M{m}")
+            session.add(match)
+            await session.commit()
+            race = Race(match_id=match.id, race_number=1)
+            session.add(race)
+            await session.commit()
+            for rank, p in enumerate(players, start=1):
+                session.add(RaceResult(race_id=race.id, player_id=p.id, rank=rank, points_awarded=10 - rank))
+            await session.commit()
+
+    session.expunge_all()
+    service = TournamentService(session)
+    with assert_max_statements(3, engine) as stats:
+        standings = await service.get_stage_standings(str(stage.id))
+
+    assert len(standings) == 3
+    assert stats.count <= 3
+
+@pytest.mark.asyncio
+async def test_assert_max_statements_fails_when_exceeded(session: AsyncSession, engine):
+    with pytest.raises(AssertionError, match="at most 1 SQL statements, got 2"):
+        with assert_max_statements(1, engine):
+            await session.exec(select(Player))
+            await session.exec(select(Stage))
+
+@pytest.mark.asyncio
+async def test_middleware_reports_server_timing(engine):
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_session():
+        async with async_session() as session:
+            yield session
+
+    summary = RouteSummary(window=10)
+    app = FastAPI()
+    app.add_middleware(SQLInstrumentationMiddleware, summary=summary)
+
+    @app.get("/players/{name}")
+    async def two_queries(name: str, session: AsyncSession = Depends(get_session)):
+        await session.exec(select(Player))
+        await session.exec(select(Player).where(Player.in_game_name == name))
+        return {"ok": True}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Outer capture must still see the statements made inside the request
+        with capture_statements() as outer:
+            resp = await client.get("/players/alice")
+        await client.get("/players/bob")
+
+    assert resp.status_code == 200
+    assert 'desc="2 queries"' in resp.headers["server-timing"]
+    assert outer.count == 2
+
+    routes = summary.snapshot()
+    assert routes[0]["route"] == "GET /players/{name}"
+    assert routes[0]["requests"] == 2
+    assert routes[0]["max_statements"] == 2
+
+@pytest.mark.asyncio
+async def test_debug_sql_requires_an_admin():
+    from app.api import debug
+    from app.api.auth import get_current_user
+    from app.models.user import User
+
+    user = User(username="user", hashed_password="x", is_admin=False)
+    app = FastAPI()
+    app.include_router(debug.router, prefix="/api/v1/debug")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        anonymous = await client.get("/api/v1/debug/sql")
+        app.dependency_overrides[get_current_user] = lambda: user
+        refused = [await client.get("/api/v1/debug/sql"), await client.delete("/api/v1/debug/sql")]
+        user.is_admin = True
+        allowed = await client.get("/api/v1/debug/sql")
+        reset = await client.delete("/api/v1/debug/sql")
+
+    assert anonymous.status_code == 401
+    assert [r.status_code for r in refused] == [403, 403]
+    assert allowed.status_code == 200 and "routes" in allowed.json()
+    assert reset.status_code == 204
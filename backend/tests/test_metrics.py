@@ -0,0 +1,78 @@
+import pytest
+import httpx
+from fastapi import FastAPI, HTTPException, Response
+from app.core.metrics import MetricsRegistry, MetricsMiddleware, scrape_allowed
+
+@pytest.mark.asyncio
+async def test_middleware_records_routes_and_status():
+    registry = MetricsRegistry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/stages/{stage_id}")
+    async def get_stage(stage_id: str):
+        if stage_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": stage_id}
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(registry.render(), media_type="text/plain")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/stages/a")
+        await client.get("/stages/b")
+        await client.get("/stages/missing")
+        await client.get("/nowhere")
+        body = (await client.get("/metrics")).text
+
+    # Route labels use the template, not the concrete path
+    assert registry.requests_total.value("GET", "/stages/{stage_id}", "200") == 2
+    assert registry.requests_total.value("GET", "/stages/{stage_id}", "404") == 1
+    assert registry.requests_total.value("GET", "unmatched", "404") == 1
+    assert registry.request_duration.count("GET", "/stages/{stage_id}") == 3
+
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/stages/{stage_id}",le="+Inf"} 3' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/stages/{stage_id}"} 3' in body
+
+def test_registered_collectors_are_sampled_at_render():
+    registry = MetricsRegistry()
+    hits = {"hits": 3, "misses": 1}
+    registry.register_cache("rules", lambda: (hits["hits"], hits["misses"]))
+    registry.register_queue("stats", lambda: 7)
+
+    class FakePool:
+        def size(self): return 5
+        def checkedout(self): return 2
+        def checkedin(self): return 3
+        def overflow(self): return -3
+
+    class FakeEngine:
+        pool = FakePool()
+
+    registry.register_engine("default", FakeEngine())
+    body = registry.render()
+
+    assert 'cache_hit_ratio{cache="rules"} 0.75' in body
+    assert 'cache_hits_total{cache="rules"} 3' in body
+    assert 'background_queue_depth{queue="stats"} 7' in body
+    assert 'db_pool_checked_out{engine="default"} 2' in body
+    assert 'db_pool_overflow{engine="default"} -3' in body
+
+    hits["hits"] = 9
+    assert 'cache_hits_total{cache="rules"} 9' in registry.render()
+
+def test_cache_totals_are_counters_and_scrapes_can_require_a_token():
+    registry = MetricsRegistry()
+    registry.register_cache("rules", lambda: (1, 1))
+    body = registry.render()
+    assert "# TYPE cache_hits_total counter" in body
+    assert "# TYPE cache_misses_total counter" in body
+    assert "# TYPE cache_hit_ratio gauge" in body
+
+    assert scrape_allowed(None, token="")
+    assert scrape_allowed("Bearer s3cret", token="s3cret")
+    assert not scrape_allowed(None, token="s3cret")
+    assert not scrape_allowed("Bearer wrong", token="s3cret")
@@ -0,0 +1,233 @@
+import asyncio
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import players as players_api
+from app.core.metrics import MetricsRegistry
+from app.db import get_session
+from app.models.tournament import Tournament, Stage, StageType, Group, Match, MatchParticipant
+from app.models.user import Player
+from app.services import stats_service
+from app.services.logic.tiebreak import TieBreakEngine
+from app.services.stats_service import PlayerStatsJob, PlayerStatsService
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+class Rank:
+    def __init__(self, player_id, rank):
+        self.player_id = player_id
+        self.rank = rank
+
+async def make_match(session, name, players, rules=None):
+    tourney = Tournament(name=name)
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN,
+                  sequence_order=1, rules_config=rules or {})
+    session.add(stage)
+    await session.commit()
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+    match = Match(group_id=group.id, name="Match 1")
+    session.add(match)
+    await session.commit()
+    session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+    await session.commit()
+    return stage, match
+
+async def race(session, match, race_number, order):
+    await TournamentService(session).record_race_result(
+        str(match.id), race_number, [Rank(p.id, i + 1) for i, p in enumerate(order)]
+    )
+
+async def stats_of(session, player):
+    await session.refresh(player)
+    return player.stats
+
+async def make_players(session, n=3, prefix="P"):
+    players = [Player(in_game_name=f"{prefix}{i}", qq_id=f"{prefix}q{i}") for i in range(n)]
+    session.add_all(players)
+    await session.commit()
+    return players
+
+@pytest.mark.asyncio
+async def test_first_run_builds_every_counter(session):
+    p0, p1, p2 = await make_players(session)
+    _, a = await make_match(session, "Cup A", [p0, p1, p2])
+    _, b = await make_match(session, "Cup B", [p1, p2])
+    await race(session, a, 1, [p0, p1, p2])
+    await race(session, a, 2, [p1, p0, p2])
+    await race(session, a, 3, [p0, p2, p1])
+    await race(session, b, 1, [p1, p2])
+
+    service = PlayerStatsService(session, settle_seconds=0)
+    cycle = await service.run_once()
+    assert cycle["players"] == 3 and cycle["caught_up"]
+
+    assert await stats_of(session, p0) == {"first_place_count": 2, "race_count": 3, "match_count": 1,
+                                           "ace_count": 1, "tournament_count": 1}
+    assert await stats_of(session, p1) == {"first_place_count": 2, "race_count": 4, "match_count": 2,
+                                           "ace_count": 1, "tournament_count": 2}
+    assert await stats_of(session, p2) == {"first_place_count": 0, "race_count": 4, "match_count": 2,
+                                           "ace_count": 0, "tournament_count": 2}
+    assert await service.backlog() == 0
+
+@pytest.mark.asyncio
+async def test_new_and_resubmitted_results_are_folded_in_incrementally(session):
+    p0, p1, p2 = await make_players(session)
+    outsider, = await make_players(session, 1, prefix="X")
+    _, a = await make_match(session, "Cup A", [p0, p1, p2])
+    await race(session, a, 1, [p0, p1, p2])
+    await race(session, a, 2, [p0, p1, p2])
+    service = PlayerStatsService(session, settle_seconds=0)
+    await service.run_once()
+    assert (await stats_of(session, p0))["ace_count"] == 1
+
+    # Nothing new: nobody is touched
+    assert (await service.run_once())["players"] == 0
+
+    await race(session, a, 3, [p2, p1, p0])
+    await race(session, a, 4, [p2, p0, p1])
+    assert await service.backlog() == 6
+    assert (await service.run_once())["players"] == 3
+    # 2 wins out of 4 races is no longer an ace
+    assert (await stats_of(session, p0))["ace_count"] == 0
+    assert (await stats_of(session, p2))["first_place_count"] == 2
+
+    # Re-submitting a race replaces its results instead of counting twice
+    await race(session, a, 4, [p0, p2, p1])
+    await service.run_once()
+    assert await stats_of(session, p0) == {"first_place_count": 3, "race_count": 4, "match_count": 1,
+                                           "ace_count": 1, "tournament_count": 1}
+    assert (await stats_of(session, p2))["first_place_count"] == 1
+    assert await stats_of(session, outsider) == {}
+
+@pytest.mark.asyncio
+async def test_batches_follow_the_high_water_mark(session, monkeypatch):
+    players = await make_players(session, 4)
+    _, a = await make_match(session, "Cup A", players)
+    await race(session, a, 1, players)
+    service = PlayerStatsService(session, settle_seconds=0)
+    await service.run_once()
+
+    for n in range(2, 6):
+        await race(session, a, n, players[n % 4:] + players[:n % 4])
+    assert await service.backlog() == 16
+    first = await service.run_once(batch=6)
+    # Cut after the 6th result, plus the rest of its race (same timestamp or not, never split a mark)
+    assert not first["caught_up"]
+    assert 0 < await service.backlog() <= 10
+    while not (await service.run_once(batch=6))["caught_up"]:
+        pass
+    assert await service.backlog() == 0
+    assert (await stats_of(session, players[0]))["race_count"] == 5
+    assert sum([(await stats_of(session, p))["first_place_count"] for p in players]) == 5
+
+@pytest.mark.asyncio
+async def test_job_reports_queue_depth_and_standings_read_career_stats(session, monkeypatch):
+    p0, p1 = await make_players(session, 2)
+    rules = {"tie_breakers": ["career_first_places"]}
+    _, old = await make_match(session, "Last Season", [p0, p1])
+    await race(session, old, 1, [p1, p0])
+    await race(session, old, 2, [p1, p0])
+    stage, match = await make_match(session, "This Season", [p0, p1], rules)
+    await race(session, match, 1, [p0, p1])
+    await race(session, match, 2, [p1, p0])
+
+    registry = MetricsRegistry()
+    monkeypatch.setattr(stats_service.metrics, "register_queue", registry.register_queue)
+    job = PlayerStatsJob(session.bind, interval=3600)
+    await job.start()
+    try:
+        # First cycle rebuilds everyone; then the loop sleeps for the interval
+        for _ in range(200):
+            if job.depth:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await job.stop()
+    # Everything is younger than the settle window, so it's still queued for the next cycle
+    assert job.depth == 8
+    assert 'background_queue_depth{queue="player_stats"} 8' in registry.render()
+    assert await job.run_until_idle() == 0
+    await session.refresh(p0)
+    await session.refresh(p1)
+
+    # Level on points and first places this stage: the all-time count decides
+    standings = await TournamentService(session).get_stage_standings(str(stage.id))
+    assert [e["player_id"] for e in standings] == [p1.id, p0.id]
+    assert standings[0]["career_first_places"] == 3
+
+    app = FastAPI()
+    app.include_router(players_api.router, prefix="/api/v1/players")
+    app.dependency_overrides[get_session] = lambda: session
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        profile = (await client.get(f"/api/v1/players/{p1.id}/profile")).json()
+        missing = await client.get(f"/api/v1/players/{p0.id.hex[::-1]}/profile")
+    assert profile["in_game_name"] == "P1" and profile["stats"]["first_place_count"] == 3
+    assert profile["stats"]["tournament_count"] == 2
+    assert missing.status_code in (404, 422)
+
+def test_career_tie_breaker_orders_only_the_tied_players():
+    standings = [
+        {"player_id": "a", "points": 10, "wins": 1, "career_first_places": 1},
+        {"player_id": "b", "points": 10, "wins": 1, "career_first_places": 7},
+        {"player_id": "c", "points": 12, "wins": 0},
+    ]
+    ranked = TieBreakEngine.sort_standings(standings, [], {"tie_breakers": ["first_places", "career_first_places"]})
+    assert [e["player_id"] for e in ranked] == ["c", "b", "a"]
+
+@pytest.mark.asyncio
+async def test_players_dropped_by_a_correction_are_recomputed(session):
+    p0, p1, p2, p3 = await make_players(session, 4)
+    _, a = await make_match(session, "Cup A", [p0, p1, p2, p3])
+    await race(session, a, 1, [p3, p0, p1])
+    service = PlayerStatsService(session, settle_seconds=0)
+    await service.run_once()
+    assert (await stats_of(session, p3))["first_place_count"] == 1
+
+    # P3 was entered by mistake: the corrected race has no row for them at all
+    await race(session, a, 1, [p2, p0, p1])
+    assert (await stats_of(session, p3))["race_count"] == 0
+    assert (await stats_of(session, p3))["first_place_count"] == 0
+    await service.run_once()
+    assert (await stats_of(session, p2))["first_place_count"] == 1
+
+@pytest.mark.asyncio
+async def test_only_the_worker_holding_the_lock_runs_a_cycle(session, monkeypatch):
+    from contextlib import asynccontextmanager
+
+    p0, p1 = await make_players(session, 2)
+    _, a = await make_match(session, "Cup A", [p0, p1])
+    await race(session, a, 1, [p0, p1])
+
+    @asynccontextmanager
+    async def follower():
+        yield False
+
+    job = PlayerStatsJob(session.bind, interval=3600)
+    monkeypatch.setattr(job, "_leader", follower)
+    # Another worker has the lock: nothing is folded in, the backlog is still reported
+    assert await job.run_until_idle() == 0
+    assert job.depth == 2
+    assert await PlayerStatsService(session).checkpoint() is None
@@ -76,3 +76,61 @@ def test_determine_qualifiers_group_stage_split():
     p2 = next(q for q in qualifiers if q["player_id"] == "p2")
     assert p2["destination"] == "loser_bracket"
 
+
+def test_dominance_bonuses_for_all_players():
+    from app.models.tournament import RaceResult
+    stage = Stage(
+        name="Groups",
+        stage_type=StageType.ROUND_ROBIN,
+        sequence_order=2,
+        rules_config={"bonus_rules": [{"type": "dominance_bonus"}]}
+    )
+
+    # 6 races (2 per match); "a" takes 5 of them, "b" one
+    results = []
+    for race_no in range(6):
+        winner = "b" if race_no == 5 else "a"
+        loser = "a" if winner == "b" else "b"
+        results.append(RaceResult(race_id=f"r{race_no}", player_id=winner, rank=1, points_awarded=9))
+        results.append(RaceResult(race_id=f"r{race_no}", player_id=loser, rank=2, points_awarded=5))
+
+    # 3 matches each: threshold floor(3 / 2) = 1 -> "a" gets (5 - 1) * 2, "b" nothing
+    bonuses = ProgressionEngine.calculate_dominance_bonuses(stage, results, {"a": 3, "b": 3})
+    assert bonuses == {"a": 8}
+
+    # The single-player helper agrees
+    assert ProgressionEngine.calculate_dominance_bonus(stage, "a", [None] * 3, results) == 8
+
+    # No bonus rule configured -> no bonus
+    stage.rules_config = {}
+    assert ProgressionEngine.calculate_dominance_bonuses(stage, results, {"a": 3, "b": 3}) == {}
+
+def test_wildcards_normalize_uneven_groups():
+    stage = Stage(
+        name="Audition",
+        stage_type=StageType.ROUND_ROBIN,
+        sequence_order=1,
+        wildcard_rules={"wildcard_count": 2, "strategy": "global_best_losers"}
+    )
+    non_qualifiers = [
+        # 6-player group, 5 matches
+        {"player_id": "six_a", "points": 30, "wins": 2, "matches": 5, "rank": 5},
+        {"player_id": "six_b", "points": 20, "wins": 1, "matches": 5, "rank": 6},
+        # 4-player group, 3 matches: fewer points but more per match
+        {"player_id": "four_a", "points": 21, "wins": 2, "matches": 3, "rank": 3},
+        {"player_id": "four_b", "points": 12, "wins": 0, "matches": 3, "rank": 4},
+    ]
+
+    wildcards = ProgressionEngine.select_wildcards(stage, non_qualifiers)
+    assert [w["player_id"] for w in wildcards] == ["four_a", "six_a"]
+    assert all(w["destination"] == "wildcard" for w in wildcards)
+
+    stage.wildcard_rules = {"wildcard_count": 2, "normalize": "raw"}
+    assert [w["player_id"] for w in ProgressionEngine.select_wildcards(stage, non_qualifiers)] == ["six_a", "four_a"]
+
+    stage.wildcard_rules = {"wildcard_count": 2, "strategy": "lottery"}
+    with pytest.raises(ValueError):
+        ProgressionEngine.select_wildcards(stage, non_qualifiers)
+
+    stage.wildcard_rules = {}
+    assert ProgressionEngine.select_wildcards(stage, non_qualifiers) == []
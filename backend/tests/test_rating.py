@@ -0,0 +1,165 @@
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import players as players_api
+from app.api.auth import get_current_user
+from app.db import get_session
+from app.models.tournament import (
+    Tournament, Stage, StageType, Group, Match, MatchParticipant, PlayerRating, RatingHistory,
+)
+from app.models.user import Player, User
+from app.services.logic.rating import DEFAULT_RATING, K_FACTOR, EloEngine
+from app.services.rating_service import RatingService
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+class Rank:
+    def __init__(self, player_id, rank):
+        self.player_id = player_id
+        self.rank = rank
+
+async def make_match(session, players):
+    tourney = Tournament(name="Rated Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=1)
+    session.add(stage)
+    await session.commit()
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+    match = Match(group_id=group.id, name="Match 1")
+    session.add(match)
+    await session.commit()
+    session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+    await session.commit()
+    return match
+
+async def race(session, match, race_number, order):
+    await TournamentService(session).record_race_result(
+        str(match.id), race_number, [Rank(p.id, i + 1) for i, p in enumerate(order)]
+    )
+
+async def ratings(session):
+    rows = (await session.exec(select(PlayerRating))).all()
+    for r in rows:
+        await session.refresh(r)
+    return {r.player_id: r.rating for r in rows}
+
+def test_race_deltas_are_zero_sum_and_reward_upsets():
+    even = EloEngine.race_deltas([1500, 1500, 1500])
+    assert even[0] == pytest.approx(K_FACTOR / 2) and even[2] == pytest.approx(-K_FACTOR / 2)
+    assert even[1] == pytest.approx(0) and sum(even) == pytest.approx(0)
+
+    upset = EloEngine.race_deltas([1300, 1700])
+    favourite = EloEngine.race_deltas([1700, 1300])
+    assert upset[0] > 25 > 3 > favourite[0] > 0
+    assert EloEngine.race_deltas([1500]) == [0.0]
+
+    ratings, counts, history = EloEngine.replay([("r1", ["a", "b"]), ("r2", ["b", "a"])])
+    assert counts == {"a": 2, "b": 2}
+    assert history[0] == ("a", "r1", DEFAULT_RATING, DEFAULT_RATING + K_FACTOR / 2)
+    # Winning back against a stronger player earns more than was lost
+    assert ratings["b"] > ratings["a"]
+
+@pytest.mark.asyncio
+async def test_recording_results_rates_players_and_corrections_replace_the_race(session):
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(3)]
+    npc = Player(in_game_name="Bot", qq_id="npc", is_npc=True)
+    session.add_all(players + [npc])
+    await session.commit()
+    p0, p1, p2 = players
+    match = await make_match(session, players + [npc])
+
+    await race(session, match, 1, [npc, p0, p1, p2])
+    after_one = await ratings(session)
+    # NPCs are not rated and don't count as opponents
+    assert set(after_one) == {p0.id, p1.id, p2.id}
+    assert after_one[p0.id] == pytest.approx(DEFAULT_RATING + K_FACTOR / 2)
+    assert sum(after_one.values()) == pytest.approx(3 * DEFAULT_RATING)
+
+    await race(session, match, 2, [p2, p1, p0])
+    # Race 1 corrected: its old deltas are taken back, the new order is rated
+    await race(session, match, 1, [p2, p1, p0, npc])
+    history = (await session.exec(select(RatingHistory))).all()
+    assert len(history) == 6
+    current = await ratings(session)
+    assert current[p2.id] > current[p1.id] > current[p0.id]
+    assert sum(current.values()) == pytest.approx(3 * DEFAULT_RATING)
+    assert (await session.get(PlayerRating, p0.id)).races == 2
+
+    # The batch recompute rates races in submission order from scratch
+    summary = await RatingService(session).recompute()
+    assert summary == {"races": 2, "players": 3, "history_rows": 6}
+    expected, _, _ = EloEngine.replay([
+        ("race 2", [str(p2.id), str(p1.id), str(p0.id)]),
+        ("race 1", [str(p2.id), str(p1.id), str(p0.id)]),
+    ])
+    session.expunge_all()
+    recomputed = await ratings(session)
+    for p in players:
+        assert recomputed[p.id] == pytest.approx(expected[str(p.id)])
+
+@pytest.mark.asyncio
+async def test_incremental_and_batch_agree_without_corrections(session):
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(5)]
+    session.add_all(players)
+    await session.commit()
+    match = await make_match(session, players)
+    for n in range(1, 9):
+        order = players[n % 5:] + players[:n % 5]
+        await race(session, match, n, order[:4] if n % 2 else order)
+    incremental = await ratings(session)
+
+    await RatingService(session).recompute()
+    session.expunge_all()
+    batch = await ratings(session)
+    assert batch.keys() == incremental.keys()
+    for pid, rating in incremental.items():
+        assert batch[pid] == pytest.approx(rating)
+
+@pytest.mark.asyncio
+async def test_rating_endpoints(session):
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(3)]
+    session.add_all(players)
+    await session.commit()
+    match = await make_match(session, players)
+    await race(session, match, 1, [players[1], players[0], players[2]])
+    await race(session, match, 2, [players[1], players[2], players[0]])
+
+    admin = User(username="admin", hashed_password="x", is_admin=True)
+    app = FastAPI()
+    app.include_router(players_api.router, prefix="/api/v1/players")
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: admin
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        board = (await client.get("/api/v1/players/ratings", params={"limit": 2})).json()
+        detail = (await client.get(f"/api/v1/players/{players[1].id}/rating")).json()
+        unrated = await client.get(f"/api/v1/players/{players[0].id.hex[::-1]}/rating")
+        recomputed = (await client.post("/api/v1/players/ratings/recompute")).json()
+
+    assert len(board) == 2 and board[0]["player_name"] == "P1"
+    assert [e["rank"] for e in board] == [1, 2] and board[0]["races"] == 2
+    assert detail["races"] == 2 and len(detail["history"]) == 2
+    assert detail["history"][0]["rating_after"] == detail["rating"]
+    assert unrated.status_code == 404
+    assert recomputed["history_rows"] == 6
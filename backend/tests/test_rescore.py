@@ -0,0 +1,141 @@
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages as stages_api
+from app.api.auth import get_current_user
+from app.db import get_session
+from app.models.tournament import (
+    Tournament, Stage, StageType, Group, Match, MatchParticipant, RaceResult,
+)
+from app.models.user import Player, User
+from app.services.event_service import ResultLog
+from app.services.rescore_service import RescoreService
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+class Rank:
+    def __init__(self, player_id, rank):
+        self.player_id = player_id
+        self.rank = rank
+
+async def make_stage(session):
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(3)]
+    session.add_all(players)
+    tourney = Tournament(name="Rescored Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=1)
+    session.add(stage)
+    await session.commit()
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+    match = Match(group_id=group.id, name="Match 1")
+    session.add(match)
+    await session.commit()
+    session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+    await session.commit()
+
+    a, b, c = players
+    service = TournamentService(session)
+    # a: 9 + 3 + 3, b: 5 + 9 + 5 -> b leads under the default 9/5/3 table
+    for n, order in enumerate([(a, b, c), (b, c, a), (c, b, a)], start=1):
+        await service.record_race_result(str(match.id), n, [Rank(p.id, i + 1) for i, p in enumerate(order)])
+    return stage, players
+
+def points(standings):
+    return {s["player_id"]: s["total_points"] for s in standings}
+
+@pytest.mark.asyncio
+async def test_dry_run_reports_the_ranking_diff_without_writing(session):
+    stage, (a, b, c) = await make_stage(session)
+    before = await TournamentService(session).get_stage_standings(str(stage.id))
+
+    summary = await RescoreService(session).rescore(stage.id, {"points_map": [10, 1, 0]}, dry_run=True)
+    assert summary["races"] == 3 and summary["races_changed"] == 3 and summary["results_changed"] == 9
+    diff = {d["player_id"]: d for d in summary["ranking_diff"]}
+    assert diff[a.id]["new_points"] == 10 and diff[b.id]["new_points"] == 12
+    assert diff[c.id]["old_rank"] == 2 and diff[c.id]["new_rank"] == 2 and diff[c.id]["new_points"] == 11
+
+    session.expunge_all()
+    assert points(await TournamentService(session).get_stage_standings(str(stage.id))) == points(before)
+    assert (await session.get(Stage, stage.id)).rules_config == {}
+
+@pytest.mark.asyncio
+async def test_rescore_rewrites_points_logs_them_and_saves_the_rules(session):
+    stage, (a, b, c) = await make_stage(session)
+    summary = await RescoreService(session).rescore(stage.id, {"points_map": {"1": 10, "2": 1}})
+    assert summary["results_changed"] == 9 and not summary["dry_run"]
+
+    session.expunge_all()
+    saved = await session.get(Stage, stage.id)
+    assert saved.rules_config == {"points_map": {"1": 10, "2": 1}}
+    stored = sorted(r.points_awarded for r in (await session.exec(select(RaceResult))).all())
+    assert stored == [0, 0, 0, 1, 1, 1, 10, 10, 10]
+    live = await TournamentService(session).get_stage_standings(str(stage.id))
+    assert points(live) == {a.id: 10, b.id: 12, c.id: 11}
+    # Winners of each race keep their first place counters
+    assert (await session.get(Player, b.id)).stats["first_place_count"] == 1
+
+    # The log replays to the rescored state
+    view = await ResultLog(session).rebuild_view(stage.id)
+    assert [e["kind"] for e in await ResultLog(session).events(stage.id)][-3:] == ["rescored"] * 3
+    assert points(view["standings"]) == points(live)
+
+    # Same rules again: nothing to do
+    again = await RescoreService(session).rescore(stage.id)
+    assert again["results_changed"] == 0 and again["ranking_diff"] == []
+
+@pytest.mark.asyncio
+async def test_invalid_tie_breakers_are_refused_before_anything_changes(session):
+    stage, _ = await make_stage(session)
+    for tie_breakers in (["coin_flip"], "wins"):
+        with pytest.raises(ValueError):
+            await RescoreService(session).rescore(stage.id, {"points_map": [10, 1], "tie_breakers": tie_breakers})
+    session.expunge_all()
+    assert (await session.get(Stage, stage.id)).rules_config == {}
+
+@pytest.mark.asyncio
+async def test_rescore_endpoint(session):
+    stage, _ = await make_stage(session)
+    user = User(username="user", hashed_password="x", is_admin=False)
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        refused = await client.post(f"/api/v1/stages/{stage.id}/rescore", json={"dry_run": True})
+        user.is_admin = True
+        preview = await client.post(f"/api/v1/stages/{stage.id}/rescore",
+                                    json={"rules_config": {"points_map": [10, 1]}, "dry_run": True})
+        invalid = await client.post(f"/api/v1/stages/{stage.id}/rescore",
+                                    json={"rules_config": {"points_map": [-1]}})
+        bad_chain = await client.post(f"/api/v1/stages/{stage.id}/rescore",
+                                      json={"rules_config": {"tie_breakers": ["coin_flip"]}})
+        missing = await client.post(f"/api/v1/stages/{stage.tournament_id}/rescore")
+
+    assert refused.status_code == 403
+    assert preview.status_code == 200 and preview.json()["dry_run"] is True
+    assert len(preview.json()["ranking_diff"]) == 3
+    assert invalid.status_code == 400
+    assert bad_chain.status_code == 400 and "coin_flip" in bad_chain.json()["detail"]
+    assert missing.status_code == 404
@@ -0,0 +1,93 @@
+import pytest
+import pytest_asyncio
+import httpx
+import msgpack
+from uuid import UUID, uuid4
+from fastapi import FastAPI
+from starlette.requests import Request
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages
+from app.core.responses import MsgPackResponse, wants_msgpack
+from app.db import get_session
+from app.models.tournament import Tournament, Stage, StageType
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+def _request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+def test_wants_msgpack_honors_q_values():
+    assert wants_msgpack(_request("application/msgpack"))
+    assert wants_msgpack(_request("application/msgpack, application/json"))
+    assert wants_msgpack(_request("application/json;q=0.5, application/x-msgpack"))
+    assert not wants_msgpack(_request("application/json, application/msgpack;q=0.5"))
+    assert not wants_msgpack(_request("*/*"))
+    assert not wants_msgpack(_request(""))
+
+def test_msgpack_response_packs_uuids_as_bytes():
+    pid = uuid4()
+    body = MsgPackResponse({"player_id": pid, "points": 9}).body
+    decoded = msgpack.unpackb(body, raw=False)
+    assert decoded == {"player_id": pid.bytes, "points": 9}
+    assert UUID(bytes=decoded["player_id"]) == pid
+
+@pytest_asyncio.fixture(name="client")
+async def client_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        tourney = Tournament(name="Pack Cup")
+        session.add(tourney)
+        await session.commit()
+        session.add(Stage(tournament_id=tourney.id, name="Audition", stage_type=StageType.ROUND_ROBIN, sequence_order=1))
+        await session.commit()
+
+    async def override_session():
+        async with async_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(stages.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = override_session
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_read_endpoint_negotiates_content_type(client):
+    as_json = await client.get("/api/v1/stages/")
+    as_msgpack = await client.get("/api/v1/stages/", headers={"Accept": "application/msgpack"})
+
+    assert as_json.headers["content-type"].startswith("application/json")
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    assert as_msgpack.headers["vary"] == "Accept"
+    assert as_json.headers["vary"] == "Accept"
+
+    json_stage = as_json.json()[0]
+    packed_stage = msgpack.unpackb(as_msgpack.content, raw=False)[0]
+    assert packed_stage["name"] == json_stage["name"] == "Audition"
+    assert packed_stage["stage_type"] == json_stage["stage_type"] == "round_robin"
+    assert UUID(bytes=packed_stage["id"]) == UUID(json_stage["id"])
+    assert len(as_msgpack.content) < len(as_json.content)
+
+@pytest.mark.asyncio
+async def test_stage_read_endpoints_negotiate_and_vary_on_accept(client):
+    stage_id = (await client.get("/api/v1/stages/")).json()[0]["id"]
+    for path in ("standings", "matches_view", "qualification_odds", "clinch", "events", "replay", "bracket"):
+        url = f"/api/v1/stages/{stage_id}/{path}"
+        as_json = await client.get(url)
+        as_msgpack = await client.get(url, headers={"Accept": "application/msgpack"})
+        assert as_json.status_code == as_msgpack.status_code == 200, path
+        assert as_json.headers["content-type"].startswith("application/json"), path
+        assert as_msgpack.headers["content-type"] == "application/msgpack", path
+        assert as_json.headers["vary"] == as_msgpack.headers["vary"] == "Accept", path
+        msgpack.unpackb(as_msgpack.content, raw=False)
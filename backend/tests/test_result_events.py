@@ -0,0 +1,213 @@
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages as stages_api
+from app.api.auth import get_current_user
+from app.db import get_session
+from app.models.tournament import (
+    Tournament, Stage, StageType, Group, Match, MatchParticipant, Race, RaceResult, ResultEvent, StageSnapshot,
+)
+from app.models.user import Player, User
+from app.services import event_service
+from app.services.event_service import ResultLog
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+class Rank:
+    def __init__(self, player_id, rank):
+        self.player_id = player_id
+        self.rank = rank
+
+async def make_stage(session, n_players=4, n_matches=2):
+    players = [Player(in_game_name=f"P{i}", qq_id=f"q{i}") for i in range(n_players)]
+    session.add_all(players)
+    tourney = Tournament(name="Logged Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=1)
+    session.add(stage)
+    await session.commit()
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+    matches = [Match(group_id=group.id, name=f"Match {i + 1}") for i in range(n_matches)]
+    session.add_all(matches)
+    await session.commit()
+    session.add_all([MatchParticipant(match_id=m.id, player_id=p.id) for m in matches for p in players])
+    await session.commit()
+    return stage, matches, players
+
+async def race(session, match, race_number, order):
+    await TournamentService(session).record_race_result(
+        str(match.id), race_number, [Rank(p.id, i + 1) for i, p in enumerate(order)]
+    )
+
+def totals(standings):
+    return {str(s["player_id"]): s["total_points"] for s in standings}
+
+@pytest.mark.asyncio
+async def test_submissions_and_corrections_are_logged_and_replay_matches_live_standings(session):
+    stage, (m1, m2), (a, b, c, d) = await make_stage(session)
+    await race(session, m1, 1, [a, b, c, d])
+    await race(session, m2, 1, [d, c, b, a])
+    await race(session, m1, 1, [b, a, c, d])  # correction
+
+    log = ResultLog(session)
+    events = await log.events(stage.id)
+    assert [e["kind"] for e in events] == ["submitted", "submitted", "corrected"]
+    assert [e["seq"] for e in events] == sorted(e["seq"] for e in events)
+    assert events[0]["results"][0] == [str(a.id), 1, events[0]["results"][0][2]]
+    assert await log.events(stage.id, after=events[1]["seq"]) == events[2:]
+
+    view = await log.rebuild_view(stage.id)
+    assert view["seq"] == events[-1]["seq"] and view["events_replayed"] == 3
+    live = await TournamentService(session).get_stage_standings(str(stage.id))
+    assert totals(view["standings"]) == totals(live)
+    assert len(view["match_scores"]) == 2
+
+    # Results lost or edited behind the log's back come back from the replay
+    m1_results = (await session.exec(
+        select(RaceResult).join(Race, Race.id == RaceResult.race_id).where(Race.match_id == m1.id)
+    )).all()
+    for rr in m1_results:
+        await session.delete(rr)
+    await session.commit()
+    summary = await log.rebuild_results(stage.id)
+    assert summary["races"] == 2 and summary["results"] == 8
+    session.expunge_all()
+    assert totals(await TournamentService(session).get_stage_standings(str(stage.id))) == totals(live)
+
+@pytest.mark.asyncio
+async def test_existing_results_are_imported_and_snapshots_bound_the_replay(session, monkeypatch):
+    stage, (m1, m2), players = await make_stage(session)
+    # Results from before the log: no events
+    r = Race(match_id=m1.id, race_number=1)
+    session.add(r)
+    await session.commit()
+    session.add_all([RaceResult(race_id=r.id, player_id=p.id, rank=i + 1, points_awarded=4 - i)
+                     for i, p in enumerate(players)])
+    await session.commit()
+
+    # The next submission imports them first, so the correction keeps its original
+    await race(session, m1, 1, list(reversed(players)))
+    kinds = [e["kind"] for e in await ResultLog(session).events(stage.id)]
+    assert kinds == ["imported", "corrected"]
+    assert await ResultLog(session).ensure_backfilled(stage.id) == 0
+
+    monkeypatch.setattr(event_service, "SNAPSHOT_EVERY", 3)
+    for n in range(2, 5):
+        await race(session, m2, n, players[n % 4:] + players[:n % 4])
+    log = ResultLog(session)
+    # Plain replays (the read endpoints) never write a snapshot
+    assert (await log.replay(stage.id)).snapshot_seq == 0
+    assert (await session.exec(select(StageSnapshot))).all() == []
+    full = await log.replay(stage.id, snapshot=True)
+    assert full.events_applied == 5 and full.snapshot_seq == full.seq
+    assert len((await session.exec(select(StageSnapshot))).all()) == 1
+
+    await race(session, m2, 2, players)
+    after = await log.replay(stage.id)
+    assert after.snapshot_seq == full.seq and after.events_applied == 1
+    assert len(after.races) == 4
+
+    # Replaying from the snapshot gives what replaying the whole log gives
+    await session.exec(StageSnapshot.__table__.delete())
+    await session.commit()
+    scratch = await log.replay(stage.id, snapshot=False)
+    assert scratch.events_applied == 6
+    assert scratch.races == after.races
+
+@pytest.mark.asyncio
+async def test_event_log_endpoints(session):
+    stage, (m1, _), (a, b, c, d) = await make_stage(session)
+    await race(session, m1, 1, [a, b, c, d])
+    await race(session, m1, 2, [c, d, a, b])
+
+    user = User(username="user", hashed_password="x", is_admin=False)
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        events = (await client.get(f"/api/v1/stages/{stage.id}/events", params={"limit": 1})).json()
+        view = (await client.get(f"/api/v1/stages/{stage.id}/replay")).json()
+        refused = [await client.post(f"/api/v1/stages/{stage.id}/snapshot"),
+                   await client.post(f"/api/v1/stages/{stage.id}/replay/rebuild")]
+        user.is_admin = True
+        snap = (await client.post(f"/api/v1/stages/{stage.id}/snapshot")).json()
+        rebuilt = (await client.post(f"/api/v1/stages/{stage.id}/replay/rebuild")).json()
+        missing = await client.get(f"/api/v1/stages/{m1.id}/replay")
+
+    assert [r.status_code for r in refused] == [403, 403]
+    assert len(events) == 1 and events[0]["kind"] == "submitted"
+    assert len(view["standings"]) == 4 and view["seq"] == snap["seq"]
+    assert snap["races"] == 2
+    assert rebuilt["results"] == 8
+    assert missing.status_code == 404
+    assert (await session.exec(select(ResultEvent))).all()[-1].seq == snap["seq"]
+
+@pytest.mark.asyncio
+async def test_backfill_state_comes_from_the_log(session):
+    stage, (m1, _), players = await make_stage(session)
+    r = Race(match_id=m1.id, race_number=1)
+    session.add(r)
+    await session.commit()
+    session.add_all([RaceResult(race_id=r.id, player_id=p.id, rank=i + 1, points_awarded=4 - i)
+                     for i, p in enumerate(players)])
+    await session.commit()
+
+    # An import that never commits leaves the stage unimported
+    stage_id = stage.id
+    assert await ResultLog(session).ensure_backfilled(stage_id) == 1
+    await session.rollback()
+    assert await ResultLog(session).ensure_backfilled(stage_id) == 1
+    await session.commit()
+    assert await ResultLog(session).ensure_backfilled(stage_id) == 0
+
+@pytest.mark.asyncio
+async def test_reading_a_stage_from_before_the_log_writes_nothing(session):
+    stage, (m1, _), players = await make_stage(session)
+    r = Race(match_id=m1.id, race_number=1)
+    session.add(r)
+    await session.commit()
+    session.add_all([RaceResult(race_id=r.id, player_id=p.id, rank=i + 1, points_awarded=4 - i)
+                     for i, p in enumerate(players)])
+    await session.commit()
+    stage_id = stage.id
+
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        view = (await client.get(f"/api/v1/stages/{stage_id}/replay")).json()
+        events = (await client.get(f"/api/v1/stages/{stage_id}/events")).json()
+
+    # The old results are in the view, folded in memory
+    assert totals(view["standings"]) == {str(p.id): 4 - i for i, p in enumerate(players)}
+    assert view["seq"] == 0 and events == []
+    assert (await session.exec(select(ResultEvent))).all() == []
+    assert (await session.exec(select(StageSnapshot))).all() == []
+
+    # The admin snapshot imports them
+    summary = await ResultLog(session).snapshot(stage_id)
+    assert summary["races"] == 1
+    assert [e["kind"] for e in await ResultLog(session).events(stage_id)] == ["imported"]
@@ -0,0 +1,54 @@
+from itertools import combinations
+from app.services.logic.schedule import ScheduleEngine
+
+def _appearances(design, n):
+    return [sum(1 for m in design if p in m) for p in range(n)]
+
+def test_six_player_group_is_a_bibd():
+    """
+    The audition format: 6 players, 3 per match, 5 matches each.
+    10 matches where every pair meets exactly twice.
+    """
+    design = ScheduleEngine.generate(6, 3, 5)
+
+    assert len(design) == 10
+    assert all(len(m) == 3 for m in design)
+    assert _appearances(design, 6) == [5] * 6
+
+    pairs = ScheduleEngine.pair_counts(design)
+    assert len(pairs) == 15
+    assert set(pairs.values()) == {2}
+
+def test_default_length_is_round_robin_for_any_size():
+    for n in (7, 9, 12):
+        design = ScheduleEngine.generate(n, 3)
+        apps = _appearances(design, n)
+        assert max(apps) - min(apps) <= 1
+        assert min(apps) == n - 1
+
+        pairs = ScheduleEngine.pair_counts(design)
+        counts = [pairs.get(p, 0) for p in combinations(range(n), 2)]
+        # Pair meetings never differ by more than one from the mean
+        mean = sum(counts) / len(counts)
+        assert all(abs(c - mean) < 1.5 for c in counts)
+
+def test_uneven_slot_counts_stay_balanced():
+    # 5 players * 4 matches = 20 slots, not divisible by 3 -> 7 matches, counts differ by at most 1
+    design = ScheduleEngine.generate(5, 3)
+    apps = _appearances(design, 5)
+    assert len(design) == 7
+    assert min(apps) == 4 and max(apps) <= 5
+
+def test_small_groups_and_configurable_match_size():
+    assert ScheduleEngine.generate(1) == ()
+    assert ScheduleEngine.generate(3) == ((0, 1, 2),)
+    assert ScheduleEngine.generate(2) == ((0, 1),)
+
+    design = ScheduleEngine.generate(16, 4, 5)
+    assert all(len(m) == 4 for m in design)
+    assert _appearances(design, 16) == [5] * 16
+
+def test_designs_are_memoized_and_deterministic():
+    first = ScheduleEngine.generate(12, 3, 6)
+    second = ScheduleEngine.generate(12, 3, 6)
+    assert first is second
@@ -138,3 +138,132 @@ async def test_get_stage_standings(session: AsyncSession):
     assert bob["rank"] == 2
     assert bob["total_points"] == 5
     assert bob["wins"] == 0
+
+@pytest.mark.asyncio
+async def test_get_stage_standings_adds_dominance_bonus(session: AsyncSession):
+    from app.models.tournament import Tournament
+
+    tourney = Tournament(name="Bonus Cup")
+    session.add(tourney)
+    await session.commit()
+
+    stage = Stage(
+        tournament_id=tourney.id,
+        name="Groups",
+        stage_type="round_robin",
+        sequence_order=1,
+        rules_config={"bonus_rules": [{"type": "dominance_bonus"}]}
+    )
+    p1 = Player(in_game_name="Alice", qq_id="111")
+    p2 = Player(in_game_name="Bob", qq_id="222")
+    session.add_all([stage, p1, p2])
+    await session.commit()
+
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+
+    # Alice wins both races of one match: 2 firsts > floor(1 / 2) -> +4
+    match = Match(group_id=group.id, name="M1")
+    session.add(match)
+    await session.commit()
+    for race_number in (1, 2):
+        race = Race(match_id=match.id, race_number=race_number)
+        session.add(race)
+        await session.commit()
+        session.add(RaceResult(race_id=race.id, player_id=p1.id, rank=1, points_awarded=9))
+        session.add(RaceResult(race_id=race.id, player_id=p2.id, rank=2, points_awarded=5))
+    await session.commit()
+
+    standings = await TournamentService(session).get_stage_standings(str(stage.id))
+
+    alice, bob = standings
+    assert alice["bonus_points"] == 4
+    assert alice["total_points"] == 18 + 4
+    assert bob["bonus_points"] == 0
+    assert bob["total_points"] == 10
+
+def test_scoring_rules_compile_and_cache():
+    from app.services.logic.rules import ScoringRules, DEFAULT_POINTS
+
+    assert ScoringRules.compile().points == DEFAULT_POINTS
+
+    # JSON configs arrive with string keys; gaps score 0
+    rules = ScoringRules.compile({"points_map": {"1": 10, "2": 6, "4": 0}, "ace_bonus_points": 3})
+    assert rules.points == (10, 6, 0, 0)
+    assert rules.points_for(1) == 10 and rules.points_for(5) == 0
+    assert rules.ace_bonus == 3
+
+    # Equal configs (even as new dicts) share one compiled object
+    again = ScoringRules.compile({"ace_bonus_points": 3, "points_map": {"1": 10, "2": 6, "4": 0}})
+    assert again is rules
+
+    # The tournament's points_map is the fallback; the stage's wins
+    assert ScoringRules.compile({}, {"points_map": [7, 4]}).points == (7, 4)
+    assert ScoringRules.compile({"points_map": [8]}, {"points_map": [7, 4]}).points == (8,)
+
+    # Points that go up as the rank gets worse (also through a gap) are refused
+    for bad in ({"points_map": {"first": 9}}, {"points_map": {"1": -1}},
+                {"points_map": [5, 9, 3]}, {"points_map": {"1": 10, "2": 6, "4": 1}},
+                {"ace_bonus_points": "2"}, {"npc_scoring": "ignore"}):
+        with pytest.raises(ValueError):
+            ScoringRules.compile(bad)
+
+def test_calculate_race_points_npc_modes():
+    from app.services.logic.rules import ScoringRules
+
+    human_a = Player(id=uuid4(), in_game_name="A", qq_id="a")
+    npc = Player(id=uuid4(), in_game_name="Bot", qq_id="bot", is_npc=True)
+    human_b = Player(id=uuid4(), in_game_name="B", qq_id="b")
+    players_map = {str(p.id): p for p in (human_a, npc, human_b)}
+
+    def race():
+        return [RaceResult(player_id=p.id, rank=i + 1) for i, p in enumerate((human_a, npc, human_b))]
+
+    # Default: the NPC is ranked and scored at its place, as before stages had rules
+    scored = ScoringEngine.calculate_race_points(race(), players_map)
+    assert [r.points_awarded for r in scored] == [9, 5, 3]
+    assert ScoringRules.compile().npc_mode == "rank"
+
+    rules = ScoringRules.compile({"npc_scoring": "rank", "points_map": [4, 2, 1]})
+    scored = ScoringEngine.calculate_race_points(race(), players_map, rules)
+    assert [r.points_awarded for r in scored] == [4, 2, 1]
+
+    # "skip" only when configured: the NPC takes no rank, B moves up to 2nd
+    rules = ScoringRules.compile({"npc_scoring": "skip"})
+    scored = ScoringEngine.calculate_race_points(race(), players_map, rules)
+    assert [r.points_awarded for r in scored] == [9, 0, 5]
+
+@pytest.mark.asyncio
+async def test_unconfigured_stage_scores_npcs_like_the_fixed_table(session: AsyncSession):
+    from app.models.tournament import Tournament, MatchParticipant
+
+    tourney = Tournament(name="Old Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type="round_robin", sequence_order=1)
+    session.add(stage)
+    await session.commit()
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+    match = Match(group_id=group.id, name="M1")
+    session.add(match)
+    players = [Player(in_game_name="Alice", qq_id="1"), Player(in_game_name="Bot", qq_id="2", is_npc=True),
+               Player(in_game_name="Bob", qq_id="3"), Player(in_game_name="Carol", qq_id="4")]
+    session.add_all(players)
+    await session.commit()
+    session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+    await session.commit()
+
+    class Rank:
+        def __init__(self, player_id, rank):
+            self.player_id = player_id
+            self.rank = rank
+
+    results = await TournamentService(session).record_race_result(
+        str(match.id), 1, [Rank(p.id, i + 1) for i, p in enumerate(players)]
+    )
+    # The fixed 9/5/3/2/1 table by raw rank, NPC included: nobody behind the bot moves up
+    by_player = {r.player_id: r.points_awarded for r in results}
+    assert [by_player[p.id] for p in players] == [9, 5, 3, 2]
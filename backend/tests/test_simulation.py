@@ -0,0 +1,195 @@
+import pytest
+from uuid import uuid4
+import pytest_asyncio
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.tournament import (
+    Tournament, Stage, StageType, Group, GroupParticipant, Match, MatchParticipant, MatchStatus, Race, RaceResult,
+)
+from app.models.user import Player
+from app.services.logic.simulation import QualificationSimulator
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+POINTS = {1: 9, 2: 5, 3: 3, 4: 2}
+
+async def make_group_stage(session, num_groups=2, group_size=4, rules=None):
+    """Groups of `group_size`; every player meets the rest of the group once, in 3-player matches."""
+    tourney = Tournament(name="Odds Cup")
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Audition", stage_type=StageType.ROUND_ROBIN, sequence_order=1,
+                  rules_config=rules or {"advancement": {"type": "top_n", "value": 2}})
+    session.add(stage)
+    await session.commit()
+
+    groups = []
+    for g in range(num_groups):
+        group = Group(stage_id=stage.id, name=f"Group {chr(65 + g)}")
+        players = [Player(in_game_name=f"G{g}P{i}", qq_id=f"q{g}-{i}") for i in range(group_size)]
+        session.add(group)
+        session.add_all(players)
+        await session.commit()
+        session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+
+        matches = []
+        for m in range(group_size):
+            seats = [players[(m + j) % group_size] for j in range(3)]
+            match = Match(group_id=group.id, name=f"Match {m + 1}")
+            session.add(match)
+            await session.commit()
+            session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in seats])
+            matches.append((match, seats))
+        await session.commit()
+        groups.append((group, players, matches))
+    return stage, groups
+
+async def finish(session, match, order):
+    """Records one race with `order` as the finishing order and closes the match."""
+    race = Race(match_id=match.id, race_number=1)
+    session.add(race)
+    await session.commit()
+    session.add_all([RaceResult(race_id=race.id, player_id=p.id, rank=r, points_awarded=POINTS[r])
+                     for r, p in enumerate(order, start=1)])
+    match.status = MatchStatus.FINISHED
+    session.add(match)
+    await session.commit()
+
+@pytest.mark.asyncio
+async def test_finished_stage_has_certain_odds(session: AsyncSession):
+    stage, groups = await make_group_stage(session, num_groups=1)
+    group, players, matches = groups[0]
+    for match, seats in matches:
+        # Lower index always wins: P0 and P1 finish top 2
+        await finish(session, match, sorted(seats, key=lambda p: players.index(p)))
+
+    odds = await QualificationSimulator(session).qualification_odds(stage.id, iterations=200)
+
+    assert odds["pending_matches"] == 0
+    by_name = {p["player_name"]: p for p in odds["players"]}
+    assert by_name["G0P0"]["qualify_probability"] == 1.0
+    assert by_name["G0P1"]["qualify_probability"] == 1.0
+    assert by_name["G0P2"]["qualify_probability"] == 0.0
+    assert by_name["G0P3"]["qualify_probability"] == 0.0
+    assert by_name["G0P0"]["expected_rank"] == 1.0
+
+@pytest.mark.asyncio
+async def test_open_stage_probabilities_add_up(session: AsyncSession):
+    stage, groups = await make_group_stage(session, num_groups=2)
+    # Half of each group's matches played
+    for group, players, matches in groups:
+        for match, seats in matches[:2]:
+            await finish(session, match, seats)
+
+    odds = await QualificationSimulator(session).qualification_odds(stage.id, iterations=2000, seed=7)
+
+    assert odds["pending_matches"] == 4
+    assert len(odds["players"]) == 8
+    # Exactly two direct qualifiers per group in every simulated outcome
+    assert sum(p["direct_probability"] for p in odds["players"]) == pytest.approx(4.0)
+    for p in odds["players"]:
+        assert 0.0 <= p["qualify_probability"] <= 1.0
+    assert any(0.0 < p["qualify_probability"] < 1.0 for p in odds["players"])
+
+@pytest.mark.asyncio
+async def test_wildcards_are_simulated(session: AsyncSession):
+    stage, groups = await make_group_stage(session, num_groups=2)
+    stage.wildcard_rules = {"wildcard_count": 1}
+    session.add(stage)
+    await session.commit()
+
+    odds = await QualificationSimulator(session).qualification_odds(stage.id, iterations=1000, seed=3)
+
+    assert sum(p["wildcard_probability"] for p in odds["players"]) == pytest.approx(1.0)
+    assert sum(p["qualify_probability"] for p in odds["players"]) == pytest.approx(5.0)
+
+@pytest.mark.asyncio
+async def test_odds_are_cached_until_results_change(session: AsyncSession):
+    stage, groups = await make_group_stage(session, num_groups=1)
+    simulator = QualificationSimulator(session)
+
+    first = await simulator.qualification_odds(stage.id, iterations=500)
+    again = await simulator.qualification_odds(stage.id, iterations=500)
+    assert again is first
+
+    group, players, matches = groups[0]
+    match, seats = matches[0]
+    await finish(session, match, seats)
+
+    after = await simulator.qualification_odds(stage.id, iterations=500)
+    assert after["version"] != first["version"]
+    assert after["pending_matches"] == first["pending_matches"] - 1
+
+@pytest.mark.asyncio
+async def test_invalid_arguments(session: AsyncSession):
+    stage, _ = await make_group_stage(session, num_groups=1)
+    simulator = QualificationSimulator(session)
+
+    with pytest.raises(ValueError):
+        await simulator.qualification_odds(stage.id, iterations=0)
+    with pytest.raises(ValueError):
+        await simulator.qualification_odds(stage.id, model="elo")
+    with pytest.raises(ValueError, match="Stage not found"):
+        await simulator.qualification_odds(uuid4())
+
+@pytest.mark.asyncio
+async def test_ties_follow_the_stage_tie_breakers(session: AsyncSession):
+    stage, groups = await make_group_stage(session, num_groups=1)
+    group, players, matches = groups[0]
+    # One 1st place each; P2 and P3 finish level on 17 points, P2 ahead of P3 twice
+    orders = [(0, 1, 2), (0, 1, 2), (0, 1, 2), (0, 2, 1)]
+    for (match, seats), order in zip(matches, orders):
+        await finish(session, match, [seats[i] for i in order])
+
+    odds = await QualificationSimulator(session).qualification_odds(stage.id, iterations=200)
+    standings = await TournamentService(session).get_stage_standings(stage.id)
+
+    by_name = {p["player_name"]: p for p in odds["players"]}
+    assert by_name["G0P2"]["qualify_probability"] == 1.0
+    assert by_name["G0P3"]["qualify_probability"] == 0.0
+    for entry in standings:
+        assert by_name[entry["player_name"]]["expected_rank"] == entry["rank"]
+
+@pytest.mark.asyncio
+async def test_a_match_under_way_keeps_its_recorded_races(session: AsyncSession):
+    stage, groups = await make_group_stage(session, num_groups=1, rules={
+        "advancement": {"type": "top_n", "value": 2}, "races_per_match": 3, "ace_bonus_points": 10,
+    })
+    group, players, matches = groups[0]
+    p0 = players[0]
+    for match, seats in matches[1:]:
+        await finish(session, match, sorted(seats, key=lambda p: p is p0))
+
+    # P0 won the first two of three races: 18 points and the ace bonus, whatever the third does
+    match, seats = matches[0]
+    for number in (1, 2):
+        race = Race(match_id=match.id, race_number=number)
+        session.add(race)
+        await session.commit()
+        order = sorted(seats, key=lambda p: p is not p0)
+        session.add_all([RaceResult(race_id=race.id, player_id=p.id, rank=r, points_awarded=POINTS[r])
+                         for r, p in enumerate(order, start=1)])
+        await session.commit()
+
+    odds = await QualificationSimulator(session).qualification_odds(stage.id, iterations=500, model="uniform")
+
+    assert odds["pending_matches"] == 1
+    by_name = {p["player_name"]: p for p in odds["players"]}
+    # 3 + 3 from the finished matches, 18 + 10 recorded, 3 to 9 from the last race
+    assert 37 <= by_name["G0P0"]["expected_points"] <= 43
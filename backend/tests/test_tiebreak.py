@@ -0,0 +1,126 @@
+import pytest
+import pytest_asyncio
+import httpx
+from uuid import uuid4
+from fastapi import FastAPI
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages as stages_api
+from app.db import get_session
+from app.models.tournament import RaceResult, Tournament, Stage, StageType, Group, GroupParticipant, Match, MatchParticipant
+from app.models.user import Player
+from app.services.tournament_service import TournamentService
+from app.services.logic.tiebreak import HeadToHead, TieBreakEngine
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+class Rank:
+    def __init__(self, player_id, rank):
+        self.player_id = player_id
+        self.rank = rank
+
+def race(*finishers):
+    """RaceResults for one race, finishers best first."""
+    race_id = str(uuid4())
+    points = [9, 5, 3, 2, 1]
+    return [
+        RaceResult(race_id=race_id, player_id=pid, rank=i + 1, points_awarded=points[i])
+        for i, pid in enumerate(finishers)
+    ]
+
+def entry(pid, points, wins):
+    return {"player_id": pid, "points": points, "wins": wins}
+
+def order(standings):
+    return [e["player_id"] for e in standings]
+
+def test_head_to_head_beats_first_places():
+    results = race("A", "B", "X")
+    standings = [entry("B", 20, 2), entry("A", 20, 1), entry("X", 30, 0)]
+
+    ranked = TieBreakEngine.sort_standings(standings, results)
+
+    assert order(ranked) == ["X", "A", "B"]
+    assert [e["rank"] for e in ranked] == [1, 2, 3]
+
+    # The old behaviour (points, then wins) is still available as a chain
+    ranked = TieBreakEngine.sort_standings(standings, results, {"tie_breakers": ["wins"]})
+    assert order(ranked) == ["X", "B", "A"]
+
+def test_circular_head_to_head_falls_through_to_first_places():
+    results = race("A", "B") + race("B", "C") + race("C", "A")
+    standings = [entry("A", 10, 1), entry("B", 10, 3), entry("C", 10, 2)]
+
+    ranked = TieBreakEngine.sort_standings(standings, results)
+
+    assert order(ranked) == ["B", "C", "A"]
+
+def test_head_to_head_is_reapplied_to_smaller_ties():
+    # Among all four, B and C both net +1; between themselves C beat B
+    results = (
+        race("A", "B", "D") + race("A", "C", "D") + race("C", "B")
+        + race("B", "A") + race("D", "C")
+    )
+    standings = [entry(p, 10, 0) for p in "ABCD"]
+
+    h2h = HeadToHead(results)
+    assert h2h.score("B", {"A", "B", "C", "D"}) == h2h.score("C", {"A", "B", "C", "D"})
+
+    ranked = TieBreakEngine.sort_standings(standings, results)
+    assert order(ranked) == ["A", "C", "B", "D"]
+
+def test_unknown_tie_breaker_is_rejected():
+    with pytest.raises(ValueError):
+        TieBreakEngine.sort_standings([], [], {"tie_breakers": ["coin_flip"]})
+
+@pytest.mark.asyncio
+async def test_matches_view_keeps_the_tie_breaker_order(session):
+    a, b, c = players = [Player(in_game_name=n, qq_id=f"tb-{n}") for n in "ABC"]
+    tourney = Tournament(name="Tie Cup")
+    session.add_all(players + [tourney])
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Groups", stage_type=StageType.ROUND_ROBIN, sequence_order=1)
+    session.add(stage)
+    await session.commit()
+    group = Group(stage_id=stage.id, name="Group A")
+    session.add(group)
+    await session.commit()
+    match = Match(group_id=group.id, name="Match 1")
+    session.add(match)
+    session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+    await session.commit()
+    session.add_all([MatchParticipant(match_id=match.id, player_id=p.id) for p in players])
+    await session.commit()
+
+    # B and C level on 15 points; C has the only win, B is ahead of C in two races of three
+    service = TournamentService(session)
+    for n, order in enumerate([(a, b, c), (a, b, c), (c, b, a)], start=1):
+        await service.record_race_result(str(match.id), n, [Rank(p.id, i + 1) for i, p in enumerate(order)])
+
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        standings = (await client.get(f"/api/v1/stages/{stage.id}/standings")).json()["standings"]
+        view = (await client.get(f"/api/v1/stages/{stage.id}/matches_view")).json()
+
+    expected = [str(a.id), str(b.id), str(c.id)]
+    assert [s["player_id"] for s in standings] == expected
+    group_standings = view[0]["standings"]
+    assert [s["player_id"] for s in group_standings] == expected
+    assert [s["rank"] for s in group_standings] == [1, 2, 3]
@@ -0,0 +1,173 @@
+import functools
+import random
+import pytest
+import pytest_asyncio
+import httpx
+from fastapi import FastAPI
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.api import stages as stages_api
+from app.api.auth import get_current_user
+from app.db import get_session
+from app.models.tournament import Tournament, Stage, StageType, Group, GroupParticipant
+from app.models.user import Player, User
+from app.services.logic.host_assignment import HostAssignmentEngine
+from app.services.logic.schedule import ScheduleEngine
+from app.services.logic.timeslots import TimeSlotEngine
+from app.services.tournament_service import TournamentService
+
+# Use SQLite for testing
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(name="session")
+async def session_fixture():
+    engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async_session = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session() as session:
+        yield session
+
+def assert_valid(matches, hosts, slots, host_rest, max_parallel=None):
+    busy = {}
+    for i, (members, t) in enumerate(zip(matches, slots)):
+        for p in members:
+            assert (p, t) not in busy, f"{p} double-booked in slot {t}"
+            busy[(p, t)] = i
+    for members, host, t in zip(matches, hosts, slots):
+        for d in range(1, host_rest + 1):
+            assert (host, t - d) not in busy and (host, t + d) not in busy, f"host {host} gets no rest"
+    if max_parallel:
+        assert max(Counter(slots).values()) <= max_parallel
+
+def stage_design(num_groups, group_size, seed=None):
+    """ScheduleEngine groups; with a seed, match order and player labels are shuffled per group."""
+    rng = random.Random(seed)
+    matches = []
+    for g in range(num_groups):
+        design = list(ScheduleEngine.generate(group_size, 3))
+        labels = list(range(group_size))
+        if seed is not None:
+            rng.shuffle(design)
+            rng.shuffle(labels)
+        matches.extend(tuple(f"g{g}p{labels[i]}" for i in m) for m in design)
+    return matches, HostAssignmentEngine.assign(matches)
+
+def shortest_sequence(matches, hosts):
+    """Exact length for a group whose matches all overlap: the best order, with rest gaps."""
+    n = len(matches)
+
+    def gap(a, b):
+        return 2 if hosts[a] in matches[b] or hosts[b] in matches[a] else 1
+
+    @functools.lru_cache(maxsize=None)
+    def best(mask, last):
+        if mask == (1 << n) - 1:
+            return 0
+        return min(gap(last, j) + best(mask | 1 << j, j) for j in range(n) if not mask >> j & 1)
+
+    return 1 + min(best(1 << i, i) for i in range(n))
+
+def test_six_player_groups_reach_the_lower_bound():
+    matches, hosts = stage_design(200, 6)
+    slots = TimeSlotEngine.assign(matches, hosts, host_rest=1)
+
+    assert_valid(matches, hosts, slots, 1)
+    # Every two matches of the 6-player design share a player: 10 slots minimum
+    assert TimeSlotEngine.lower_bound(matches, hosts, 1) == 10
+    assert max(slots) + 1 == 10
+
+def test_matches_exact_optimum_on_shuffled_groups():
+    matches, hosts = stage_design(20, 6, seed=3)
+    slots = TimeSlotEngine.assign(matches, hosts, host_rest=1)
+    assert_valid(matches, hosts, slots, 1)
+
+    exact = max(shortest_sequence(matches[g * 10:(g + 1) * 10], hosts[g * 10:(g + 1) * 10]) for g in range(20))
+    assert max(slots) + 1 <= exact + 1
+
+def test_room_limit_and_no_host_rules():
+    matches, hosts = stage_design(20, 6)
+    slots = TimeSlotEngine.assign(matches, hosts, host_rest=1, max_parallel=8)
+    assert_valid(matches, hosts, slots, 1, max_parallel=8)
+    assert max(slots) + 1 == 25  # 200 matches / 8 rooms
+
+    plain = TimeSlotEngine.assign(matches, host_rest=0)
+    assert_valid(matches, [None] * len(matches), plain, 0)
+    assert max(plain) + 1 == 10
+    assert TimeSlotEngine.assign([]) == []
+
+async def make_stage(session, start_time=None, rules=None):
+    tourney = Tournament(name="Clock Cup", start_time=start_time)
+    session.add(tourney)
+    await session.commit()
+    stage = Stage(tournament_id=tourney.id, name="Audition", stage_type=StageType.ROUND_ROBIN,
+                  sequence_order=1, rules_config=rules or {})
+    session.add(stage)
+    await session.commit()
+    for g in range(2):
+        group = Group(stage_id=stage.id, name=f"Group {chr(65 + g)}")
+        players = [Player(in_game_name=f"G{g}P{i}", qq_id=f"q{g}-{i}") for i in range(6)]
+        session.add(group)
+        session.add_all(players)
+        await session.commit()
+        session.add_all([GroupParticipant(group_id=group.id, player_id=p.id) for p in players])
+    await session.commit()
+    return tourney, stage
+
+@pytest.mark.asyncio
+async def test_generated_matches_get_start_times(session: AsyncSession):
+    start = datetime(2026, 5, 1, 12, 0)
+    tourney, stage = await make_stage(session, start_time=start, rules={"slot_minutes": 20})
+
+    matches = await TournamentService(session).generate_matches_for_stage(str(stage.id))
+
+    assert all(m.start_time is not None for m in matches)
+    assert min(m.start_time for m in matches) == start
+    assert max(m.start_time for m in matches) == start + timedelta(minutes=9 * 20)
+
+@pytest.mark.asyncio
+async def test_schedule_stage_overrides_and_errors(session: AsyncSession):
+    tourney, stage = await make_stage(session)
+    service = TournamentService(session)
+    matches = await service.generate_matches_for_stage(str(stage.id))
+    # No tournament start time: generation leaves times empty
+    assert all(m.start_time is None for m in matches)
+
+    with pytest.raises(ValueError, match="No start time"):
+        await service.schedule_stage(str(stage.id))
+
+    start = datetime(2026, 5, 2, 9, 0)
+    summary = await service.schedule_stage(str(stage.id), start, slot_minutes=15, max_parallel=1)
+    assert summary["matches"] == 20
+    assert summary["slots"] == 20
+    assert summary["end_time"] == start + timedelta(minutes=20 * 15)
+    assert len({m.start_time for m in matches}) == 20
+
+    with pytest.raises(ValueError):
+        await service.schedule_stage(str(stage.id), start, slot_minutes=0)
+
+@pytest.mark.asyncio
+async def test_schedule_endpoint_requires_an_admin(session: AsyncSession):
+    tourney, stage = await make_stage(session)
+    await TournamentService(session).generate_matches_for_stage(str(stage.id))
+
+    user = User(username="user", hashed_password="x", is_admin=False)
+    app = FastAPI()
+    app.include_router(stages_api.router, prefix="/api/v1/stages")
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    body = {"start_time": "2026-05-02T09:00:00", "slot_minutes": 15}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        refused = await client.post(f"/api/v1/stages/{stage.id}/schedule", json=body)
+        user.is_admin = True
+        scheduled = await client.post(f"/api/v1/stages/{stage.id}/schedule", json=body)
+
+    assert refused.status_code == 403
+    assert scheduled.status_code == 200 and scheduled.json()["matches"] == 20